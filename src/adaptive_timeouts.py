@@ -0,0 +1,177 @@
+import json
+import math
+import os
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional
+from logger_config import get_logger
+
+DEFAULT_STATE_FILE = os.path.join(".cache", "timeout_stats.json")
+
+# Worst-case timeouts used until enough latencies have been observed
+DEFAULT_TIMEOUTS = {
+    "default": 10.0,
+    "page_ready": 10.0,
+    "spa_load": 15.0,
+    "patient_search": 10.0,
+    "total_patients": 15.0,
+    "patient_list": 10.0,
+    "next_page": 10.0,
+    "patient_click": 10.0,
+    "timeline_filter": 10.0,
+    "date_hour": 5.0,
+    "medical_care": 5.0,
+}
+
+# Elements that are legitimately missing for some patients
+OPTIONAL_STEPS = ("date_hour", "medical_care")
+
+
+def percentile(values: Iterable[float], fraction: float) -> float:
+    """Nearest-rank percentile of values (fraction between 0 and 1)."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(math.ceil(fraction * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+class AdaptiveTimeouts:
+    """
+    Derive per-step wait timeouts from observed latencies.
+
+    Each step keeps a rolling window of how long its element took to
+    appear. Once a step has min_samples observations its timeout becomes
+    percentile(latencies) * margin + padding, clamped to
+    [min_timeout, default]. A timed-out wait is recorded as a sample of the
+    time it waited (the element took at least that long), so the window,
+    and the stats saved for the next run, move up when the server slows
+    down. Required steps that time out also double their timeout until
+    they succeed again. For optional steps a single timeout is the expected
+    "not present" answer, so they only start widening after
+    miss_tolerance consecutive misses.
+    """
+
+    def __init__(
+        self,
+        defaults: Optional[Dict[str, float]] = None,
+        optional_steps: Iterable[str] = OPTIONAL_STEPS,
+        quantile: float = 0.95,
+        margin: float = 1.5,
+        padding: float = 0.5,
+        min_timeout: float = 1.0,
+        window: int = 200,
+        min_samples: int = 10,
+        miss_tolerance: int = 3,
+        state_file: Optional[str] = DEFAULT_STATE_FILE,
+    ):
+        self.defaults = dict(DEFAULT_TIMEOUTS)
+        self.defaults.update(defaults or {})
+        self.optional_steps = set(optional_steps)
+        self.quantile = quantile
+        self.margin = margin
+        self.padding = padding
+        self.min_timeout = min_timeout
+        self.window = window
+        self.min_samples = min_samples
+        self.miss_tolerance = miss_tolerance
+        self.state_file = state_file
+        self.latencies: Dict[str, Deque[float]] = {}
+        self.misses: Dict[str, int] = {}
+        self.logger = get_logger()
+
+        if state_file:
+            self.load(state_file)
+
+    def timeout(self, step: str) -> float:
+        """Timeout to use for the next wait of step."""
+        ceiling = self.defaults.get(step, self.defaults["default"])
+        samples = self.latencies.get(step)
+
+        if not samples or len(samples) < self.min_samples:
+            return ceiling
+
+        learned = percentile(samples, self.quantile) * self.margin + self.padding
+        learned *= 2 ** self._excess_misses(step)
+
+        return min(max(learned, self.min_timeout), ceiling)
+
+    def _excess_misses(self, step: str) -> int:
+        """Consecutive misses that should widen the timeout of step."""
+        misses = self.misses.get(step, 0)
+        if step in self.optional_steps:
+            return max(misses - self.miss_tolerance + 1, 0)
+        return misses
+
+    def _add_sample(self, step: str, seconds: float) -> None:
+        samples = self.latencies.get(step)
+        if samples is None:
+            samples = self.latencies[step] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def observe(self, step: str, seconds: float) -> None:
+        """Record how long step took to succeed."""
+        self._add_sample(step, seconds)
+        self.misses.pop(step, None)
+
+    def observe_timeout(self, step: str, waited: Optional[float] = None) -> None:
+        """
+        Record that a wait for step ran out of time.
+
+        Args:
+            step: Step name
+            waited: Seconds the wait lasted; None when it was cut short by
+                an outer deadline, which says nothing about the step
+        """
+        self.misses[step] = self.misses.get(step, 0) + 1
+        if waited is not None and self._excess_misses(step):
+            self._add_sample(step, waited)
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Current timeout and latency percentiles per step (for run metrics)."""
+        return {
+            step: {
+                "samples": len(samples),
+                "p50": round(percentile(samples, 0.5), 3),
+                "p95": round(percentile(samples, 0.95), 3),
+                "timeout": round(self.timeout(step), 3),
+            }
+            for step, samples in self.latencies.items()
+        }
+
+    def load(self, filename: str) -> None:
+        """Load latency windows saved by a previous run, if any."""
+        try:
+            with open(filename, encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable timeout stats {filename}: {e}")
+            return
+
+        for step, samples in state.get("latencies", {}).items():
+            self.latencies[step] = deque(samples, maxlen=self.window)
+        self.logger.debug(f"Loaded latency stats for {len(self.latencies)} steps")
+
+    def save(self, filename: Optional[str] = None) -> None:
+        """Persist the latency windows for the next run."""
+        filename = filename or self.state_file
+        if not filename:
+            return
+
+        state = {
+            "latencies": {
+                step: [round(value, 4) for value in samples]
+                for step, samples in self.latencies.items()
+            }
+        }
+        try:
+            directory = os.path.dirname(filename)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_filename = f"{filename}.tmp"
+            with open(tmp_filename, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_filename, filename)
+        except OSError as e:
+            self.logger.warning(f"Could not save timeout stats: {e}")
@@ -0,0 +1,150 @@
+import hashlib
+import re
+import signal
+import threading
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional
+from adaptive_timeouts import percentile
+from logger_config import get_logger
+from retry_policy import Deadline
+
+# Hash of the patient's row in the patient list (see `patient_id`)
+PatientKey = str
+
+
+class RunBudget:
+    """
+    Time budget for a whole scraping run.
+
+    The scraper asks `can_start_patient()` before each patient. It answers
+    False once the time left is smaller than the reserve kept for flushing
+    output and closing the browser plus a pessimistic estimate (90th
+    percentile) of how long one patient takes, or once a stop was
+    requested (e.g. the CI runner sent SIGTERM).
+    """
+
+    def __init__(
+        self,
+        seconds: Optional[float],
+        reserve: float = 30.0,
+        default_patient_seconds: float = 45.0,
+        window: int = 50,
+    ):
+        self.deadline = Deadline(seconds)
+        self.reserve = reserve
+        self.default_patient_seconds = default_patient_seconds
+        self.durations: Deque[float] = deque(maxlen=window)
+        self.stop_reason: Optional[str] = None
+        self._stop = threading.Event()
+        self.logger = get_logger()
+
+    def observe_patient(self, seconds: float) -> None:
+        """Record how long one patient took, successful or not."""
+        self.durations.append(seconds)
+
+    def patient_estimate(self) -> float:
+        if not self.durations:
+            return self.default_patient_seconds
+        return percentile(self.durations, 0.9)
+
+    def request_stop(self, reason: str = "stop requested") -> None:
+        if not self._stop.is_set():
+            self.stop_reason = reason
+            self._stop.set()
+            self.logger.warning(f"Stopping after the current patient: {reason}")
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    def can_start_patient(self) -> bool:
+        if self.stopped:
+            return False
+        needed = self.reserve + self.patient_estimate()
+        if self.deadline.remaining() < needed:
+            self.request_stop(
+                f"time budget nearly used ({self.deadline.remaining():.0f}s left, "
+                f"{needed:.0f}s needed per patient)"
+            )
+            return False
+        return True
+
+    def install_signal_handlers(
+        self, signals: Iterable[int] = (signal.SIGTERM,)
+    ) -> None:
+        """
+        Turn termination signals into a graceful stop.
+
+        The first signal lets the current patient finish and the output be
+        flushed; a second one terminates the process immediately.
+        """
+
+        def handle(signum, frame):
+            if self.stopped:
+                raise SystemExit(128 + signum)
+            self.request_stop(f"received {signal.Signals(signum).name}")
+
+        for signum in signals:
+            signal.signal(signum, handle)
+
+
+def patient_id(row_text: str) -> PatientKey:
+    """
+    Stable identifier of a patient from its row in the patient list.
+
+    Positions shift whenever a patient is added or the list is re-sorted,
+    so patients are identified by their row text instead. Only a hash is
+    kept, the output files do not need another copy of the patient's name.
+    """
+    canonical = re.sub(r"\s+", " ", row_text or "").strip().casefold()
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def load_priorities(records: Iterable[dict]) -> Dict[PatientKey, str]:
+    """
+    Latest consultation date per patient from a previous run.
+
+    Args:
+        records: Cleaned records of a previous patient_data_*.json file;
+            records without a patient_id (older runs) are ignored
+
+    Returns:
+        dict: patient_id -> ISO date_hour
+    """
+    priorities: Dict[PatientKey, str] = {}
+    for record in records:
+        key = record.get("patient_id")
+        date_hour = record.get("date_hour")
+        if not key or not date_hour:
+            continue
+        # Only ISO dates compare correctly as strings
+        if not date_hour[:4].isdigit():
+            continue
+        if date_hour > priorities.get(key, ""):
+            priorities[key] = date_hour
+    return priorities
+
+
+def order_patients(
+    ids: List[PatientKey], priorities: Optional[Dict[PatientKey, str]]
+) -> List[int]:
+    """
+    Order in which to visit patients (0-based indexes into ids).
+
+    Args:
+        ids: patient_id of every row to visit, in list order
+        priorities: Result of `load_priorities`
+
+    Patients with no previous record come first (they are new or were
+    missed last time), followed by the most recently active ones.
+    """
+    if not priorities:
+        return list(range(len(ids)))
+
+    unknown = [i for i, key in enumerate(ids) if key not in priorities]
+    known = sorted(
+        (i for i, key in enumerate(ids) if key in priorities),
+        key=lambda i: priorities[ids[i]],
+        reverse=True,
+    )
+    return unknown + known
@@ -0,0 +1,405 @@
+import atexit
+import errno
+import json
+import os
+import shutil
+import signal
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+from logger_config import get_logger
+
+PROFILE_PREFIX = "chrome_selenium_"
+TEMPLATE_DIRNAME = "chrome_selenium_template"
+OWNER_FILE = ".owner.json"
+WARM_MARKER = ".warmed"
+
+# Files Chrome uses to lock a running profile; they must never be cloned
+PROFILE_LOCK_FILES = ("SingletonLock", "SingletonSocket", "SingletonCookie")
+
+
+def profile_root() -> str:
+    """Directory for driver profiles: tmpfs (/dev/shm) when available."""
+    shm = "/dev/shm"
+    if os.path.isdir(shm) and os.access(shm, os.W_OK):
+        return shm
+    return tempfile.gettempdir()
+
+
+def _read_proc(pid: int, name: str) -> Optional[bytes]:
+    try:
+        with open(f"/proc/{pid}/{name}", "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def process_start_time(pid: int) -> Optional[int]:
+    """
+    Kernel start time of a process, used to detect PID reuse.
+
+    Returns None when the process does not exist (or /proc is unavailable).
+    """
+    stat = _read_proc(pid, "stat")
+    if not stat:
+        return None
+    # The command name may contain spaces, fields start after the last ')'
+    fields = stat[stat.rfind(b")") + 2 :].split()
+    return int(fields[19])
+
+
+def _parent_pid(pid: int) -> Optional[int]:
+    stat = _read_proc(pid, "stat")
+    if not stat:
+        return None
+    return int(stat[stat.rfind(b")") + 2 :].split()[1])
+
+
+def process_memory(pid: int) -> Optional[int]:
+    """
+    Memory used by a process in bytes, or None if it is gone.
+
+    Uses the proportional set size when the kernel provides it, so memory
+    shared between Chrome's processes is not counted once per process.
+    """
+    for name, field in (("smaps_rollup", b"Pss:"), ("status", b"VmRSS:")):
+        data = _read_proc(pid, name)
+        if not data:
+            continue
+        for line in data.splitlines():
+            if line.startswith(field):
+                return int(line.split()[1]) * 1024
+    return None
+
+
+def _all_pids() -> List[int]:
+    try:
+        return [int(name) for name in os.listdir("/proc") if name.isdigit()]
+    except OSError:
+        return []
+
+
+def find_profile_processes(profile_dir: str) -> List[int]:
+    """PIDs of every Chrome process started with the given --user-data-dir."""
+    needle = f"--user-data-dir={profile_dir}".encode()
+    pids = []
+    for pid in _all_pids():
+        cmdline = _read_proc(pid, "cmdline")
+        if cmdline and needle in cmdline.split(b"\0"):
+            pids.append(pid)
+    return pids
+
+
+def find_descendants(root_pid: int) -> List[int]:
+    """PIDs of all processes below root_pid in the process tree."""
+    children: Dict[int, List[int]] = {}
+    for pid in _all_pids():
+        parent = _parent_pid(pid)
+        if parent is not None:
+            children.setdefault(parent, []).append(pid)
+
+    descendants = []
+    stack = [root_pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            descendants.append(child)
+            stack.append(child)
+    return descendants
+
+
+def _signal_tracked(tracked: Dict[int, int], sig: int) -> List[int]:
+    """Send sig to tracked processes that still have their original start time."""
+    alive = []
+    for pid, start_time in tracked.items():
+        if process_start_time(pid) != start_time:
+            continue
+        try:
+            os.kill(pid, sig)
+            alive.append(pid)
+        except ProcessLookupError:
+            pass
+        except PermissionError:
+            get_logger().warning(f"Not allowed to signal process {pid}")
+    return alive
+
+
+def terminate_tracked(tracked: Dict[int, int], timeout: float = 5.0) -> None:
+    """SIGTERM the tracked processes, then SIGKILL whatever is left."""
+    if not _signal_tracked(tracked, signal.SIGTERM):
+        return
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if not any(process_start_time(pid) == st for pid, st in tracked.items()):
+            return
+        time.sleep(0.1)
+
+    _signal_tracked(tracked, signal.SIGKILL)
+
+
+def _owner_record(tracked: Dict[int, int]) -> dict:
+    """Owner file contents; the start time tells a reused PID from the owner."""
+    return {
+        "owner_pid": os.getpid(),
+        "owner_start": process_start_time(os.getpid()),
+        "tracked": tracked,
+    }
+
+
+def _owner_alive(owner: dict) -> bool:
+    owner_pid = owner.get("owner_pid")
+    if not owner_pid or not _pid_alive(owner_pid):
+        return False
+    start_time = owner.get("owner_start")
+    if start_time is None:
+        # Owner files written before start times were recorded
+        return True
+    return process_start_time(owner_pid) == start_time
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def ensure_profile_template(warm: Optional[Callable[[str], None]] = None) -> str:
+    """
+    Return the shared profile template, creating it on first use.
+
+    The template is built in a private directory and atomically renamed into
+    place, so concurrent workers never see a half-written profile. Building
+    it costs a Chrome launch, which only pays off when the template is
+    cloned several times; callers that start a single browser pass no
+    `warm` and get the template only if an earlier run left one (on a fresh
+    CI runner /dev/shm starts empty, so there is nothing to reuse).
+
+    Args:
+        warm: Optional callable that launches Chrome once with the given
+            directory as --user-data-dir to populate the profile
+
+    Returns:
+        str: Path of the template directory, or "" when there is none
+    """
+    logger = get_logger()
+    template = os.path.join(profile_root(), TEMPLATE_DIRNAME)
+    if os.path.exists(os.path.join(template, WARM_MARKER)):
+        return template
+    if warm is None:
+        return ""
+
+    staging = tempfile.mkdtemp(
+        prefix=f"{PROFILE_PREFIX}{os.getpid()}_template_", dir=profile_root()
+    )
+    try:
+        # Lets reap_orphans clean up if this process dies mid-build
+        with open(os.path.join(staging, OWNER_FILE), "w") as f:
+            json.dump(_owner_record({}), f)
+        # Skip the first-run experience in every clone
+        open(os.path.join(staging, "First Run"), "w").close()
+        warm(staging)
+        for name in (*PROFILE_LOCK_FILES, OWNER_FILE):
+            path = os.path.join(staging, name)
+            if os.path.lexists(path):
+                os.unlink(path)
+        open(os.path.join(staging, WARM_MARKER), "w").close()
+        try:
+            os.rename(staging, template)
+        except OSError as e:
+            # Renaming onto an existing (non-empty) directory: another worker
+            # won the race, use its template. Anything else is a real error.
+            if e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+                raise
+            shutil.rmtree(staging, ignore_errors=True)
+            return template
+        logger.info(f"Chrome profile template prepared at {template}")
+    except Exception as e:
+        shutil.rmtree(staging, ignore_errors=True)
+        logger.warning(f"Could not prewarm Chrome profile template: {e}")
+        return template if os.path.isdir(template) else ""
+
+    return template
+
+
+class ChromeLifecycle:
+    """
+    Track the Chrome and chromedriver processes owned by one driver.
+
+    Each driver runs on its own --user-data-dir cloned from the shared
+    template. Owned PIDs are written to an owner file inside that directory
+    so a later run can reap them if this process dies without cleaning up.
+    Only processes recorded here are ever signalled, so several drivers can
+    share a host without killing each other.
+    """
+
+    _live: List["ChromeLifecycle"] = []
+    _atexit_registered = False
+
+    def __init__(self, template_dir: Optional[str] = None):
+        self.template_dir = template_dir
+        self.profile_dir: Optional[str] = None
+        self.owns_service = True
+        self.service_pid: Optional[int] = None
+        self.tracked: Dict[int, int] = {}
+        self.logger = get_logger()
+
+    def prepare_profile(self, profile_dir: Optional[str] = None) -> str:
+        """
+        Create this driver's profile directory from the template.
+
+        Args:
+            profile_dir: Track an existing directory instead (the template
+                being built), without copying anything into it
+        """
+        if profile_dir is None:
+            profile_dir = tempfile.mkdtemp(
+                prefix=f"{PROFILE_PREFIX}{os.getpid()}_", dir=profile_root()
+            )
+            if self.template_dir and os.path.isdir(self.template_dir):
+                shutil.copytree(
+                    self.template_dir,
+                    profile_dir,
+                    dirs_exist_ok=True,
+                    symlinks=True,
+                    ignore=shutil.ignore_patterns(
+                        *PROFILE_LOCK_FILES, OWNER_FILE, WARM_MARKER
+                    ),
+                )
+
+        self.profile_dir = profile_dir
+        self._write_owner_file()
+
+        ChromeLifecycle._live.append(self)
+        if not ChromeLifecycle._atexit_registered:
+            atexit.register(ChromeLifecycle.terminate_all)
+            ChromeLifecycle._atexit_registered = True
+
+        return profile_dir
+
+    def register(self, driver, owns_service: bool = True) -> None:
+        """
+        Record the PIDs behind a freshly started driver.
+
+        Args:
+            driver: The WebDriver using this lifecycle's profile directory
+            owns_service: False when the chromedriver process is shared with
+                other drivers and must outlive this one
+        """
+        self.owns_service = owns_service
+        service = getattr(driver, "service", None)
+        process = getattr(service, "process", None)
+        if process is not None:
+            self.service_pid = process.pid
+        self.refresh()
+        self.logger.debug(f"Tracking Chrome processes {sorted(self.tracked)}")
+
+    def track_service(self, service) -> None:
+        """Take ownership of a chromedriver Service shared by several drivers."""
+        self.owns_service = True
+        self.service_pid = service.process.pid
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Pick up processes Chrome started since the last call (renderers)."""
+        pids = set()
+        if self.profile_dir:
+            pids.update(find_profile_processes(self.profile_dir))
+        if self.service_pid and self.owns_service:
+            pids.add(self.service_pid)
+            pids.update(find_descendants(self.service_pid))
+
+        for pid in pids:
+            if pid not in self.tracked:
+                start_time = process_start_time(pid)
+                if start_time is not None:
+                    self.tracked[pid] = start_time
+
+        self._write_owner_file()
+
+    def pids(self) -> List[int]:
+        """Tracked PIDs that are still running."""
+        return [
+            pid
+            for pid, start_time in self.tracked.items()
+            if process_start_time(pid) == start_time
+        ]
+
+    def terminate(self, timeout: float = 5.0, remove_profile: bool = True) -> None:
+        """
+        Stop owned processes that survived driver.quit() and drop the profile.
+
+        Args:
+            timeout: Seconds to wait after SIGTERM before sending SIGKILL
+            remove_profile: False to keep the profile directory (a template
+                that is still being built)
+        """
+        if self.profile_dir:
+            # Catch processes spawned after the last refresh
+            self.refresh()
+        terminate_tracked(self.tracked, timeout)
+        self.tracked.clear()
+
+        if self.profile_dir:
+            if remove_profile:
+                shutil.rmtree(self.profile_dir, ignore_errors=True)
+            self.profile_dir = None
+
+        if self in ChromeLifecycle._live:
+            ChromeLifecycle._live.remove(self)
+
+    def _write_owner_file(self) -> None:
+        if not self.profile_dir or not os.path.isdir(self.profile_dir):
+            return
+        owner = _owner_record(self.tracked)
+        try:
+            with open(os.path.join(self.profile_dir, OWNER_FILE), "w") as f:
+                json.dump(owner, f)
+        except OSError as e:
+            self.logger.warning(f"Could not write Chrome owner file: {e}")
+
+    @classmethod
+    def terminate_all(cls) -> None:
+        """Terminate every lifecycle still alive in this process (atexit hook)."""
+        for lifecycle in list(cls._live):
+            lifecycle.terminate(timeout=2.0)
+
+    @staticmethod
+    def reap_orphans() -> int:
+        """
+        Kill processes and remove profiles left behind by dead owners.
+
+        Profiles whose owner process is still alive are left alone.
+
+        Returns:
+            int: Number of orphaned profiles reaped
+        """
+        logger = get_logger()
+        root = profile_root()
+        reaped = 0
+
+        for name in os.listdir(root):
+            if not name.startswith(PROFILE_PREFIX) or name == TEMPLATE_DIRNAME:
+                continue
+            profile_dir = os.path.join(root, name)
+            try:
+                with open(os.path.join(profile_dir, OWNER_FILE)) as f:
+                    owner = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if _owner_alive(owner):
+                continue
+
+            tracked = {int(k): v for k, v in owner.get("tracked", {}).items()}
+            for pid in find_profile_processes(profile_dir):
+                tracked.setdefault(pid, process_start_time(pid))
+            terminate_tracked(tracked, timeout=2.0)
+
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            reaped += 1
+            logger.info(f"Reaped orphaned Chrome profile {profile_dir}")
+
+        return reaped
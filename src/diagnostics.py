@@ -0,0 +1,167 @@
+import itertools
+import json
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Optional, Tuple
+from logger_config import get_logger
+from metrics import RunMetrics
+
+# outerHTML of the app (falls back to <body>) so artifacts show what rendered
+DOM_FRAGMENT_SCRIPT = """
+const root = document.querySelector('app-root') || document.body;
+return root ? root.outerHTML : document.documentElement.outerHTML;
+"""
+
+Event = Tuple[float, str, dict]
+
+# Shared by every Diagnostics in the process so file names never collide
+_sequence = itertools.count(1)
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^\w-]+", "_", text).strip("_")[:60] or "failure"
+
+
+class Diagnostics:
+    """
+    Keep recent step events in memory and capture artifacts on failure.
+
+    `record()` only appends to a bounded ring buffer, so successful runs
+    write nothing and start no threads. `capture()` grabs a screenshot and
+    a DOM fragment from the driver (they must be taken before the page
+    moves on) and hands them, with the recent events, to a background
+    thread that writes them to uniquely named files in directory.
+    """
+
+    def __init__(
+        self,
+        directory: str = "images",
+        capacity: int = 50,
+        max_captures: int = 20,
+        max_screenshot_bytes: int = 2 * 1024 * 1024,
+        max_dom_bytes: int = 256 * 1024,
+        metrics: Optional[RunMetrics] = None,
+    ):
+        self.directory = directory
+        self.events: Deque[Event] = deque(maxlen=capacity)
+        self.max_captures = max_captures
+        self.max_screenshot_bytes = max_screenshot_bytes
+        self.max_dom_bytes = max_dom_bytes
+        self.metrics = metrics
+        self.captures = 0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.logger = get_logger()
+
+    def record(self, event: str, **details) -> None:
+        """Remember a step event (kept only until it falls out of the buffer)."""
+        self.events.append((time.time(), event, details))
+
+    def capture(self, driver, reason: str) -> Optional[str]:
+        """
+        Capture a screenshot, DOM fragment and the recent events.
+
+        Args:
+            driver: Driver showing the failed page (may be None)
+            reason: Short description, also used in the file names
+
+        Returns:
+            str: Common path prefix of the artifacts, or None if skipped
+        """
+        with self._lock:
+            if self.captures >= self.max_captures:
+                if self.metrics:
+                    self.metrics.increment("diagnostics_dropped")
+                return None
+            self.captures += 1
+            sequence = next(_sequence)
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        prefix = os.path.join(
+            self.directory,
+            f"failure_{timestamp}_{os.getpid()}_{sequence:03d}_{_slug(reason)}",
+        )
+
+        screenshot = dom = None
+        url = None
+        if driver is not None:
+            try:
+                screenshot = driver.get_screenshot_as_png()
+            except Exception as e:
+                self.logger.debug(f"Could not capture screenshot: {e}")
+            try:
+                dom = driver.execute_script(DOM_FRAGMENT_SCRIPT)
+                url = driver.current_url
+            except Exception as e:
+                self.logger.debug(f"Could not capture DOM: {e}")
+
+        report = {
+            "reason": reason,
+            "url": url,
+            "captured_at": timestamp,
+            "events": [
+                {"time": round(at, 3), "event": event, **details}
+                for at, event, details in self.events
+            ],
+        }
+
+        self._ensure_writer()
+        self._queue.put((prefix, screenshot, dom, report))
+        if self.metrics:
+            self.metrics.increment("diagnostics_captures")
+        self.logger.info(f"Captured failure diagnostics: {prefix}.*")
+        return prefix
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Wait for pending artifacts to be written and stop the writer."""
+        if self._writer is None:
+            return
+        self._queue.put(None)
+        self._writer.join(timeout)
+        self._writer = None
+
+    def _ensure_writer(self) -> None:
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_loop, name="diagnostics-writer", daemon=True
+                )
+                self._writer.start()
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            try:
+                self._write(*item)
+            except Exception as e:
+                self.logger.error(f"Error writing diagnostics: {e}")
+
+    def _write(self, prefix: str, screenshot, dom, report: dict) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+
+        if screenshot:
+            if len(screenshot) <= self.max_screenshot_bytes:
+                with open(f"{prefix}.png", "wb") as f:
+                    f.write(screenshot)
+            else:
+                report["screenshot_skipped"] = f"{len(screenshot)} bytes"
+
+        if dom:
+            data = dom.encode("utf-8")
+            if len(data) > self.max_dom_bytes:
+                report["dom_truncated"] = f"{len(data)} bytes"
+                # Cut on a character boundary so the file stays valid UTF-8
+                data = data[: self.max_dom_bytes].decode("utf-8", "ignore").encode()
+            with open(f"{prefix}.html", "wb") as f:
+                f.write(data)
+
+        with open(f"{prefix}.json", "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
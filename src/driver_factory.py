@@ -0,0 +1,288 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, List, Optional
+from urllib.parse import urlsplit
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chromium.remote_connection import ChromiumRemoteConnection
+from selenium.webdriver.common.driver_finder import DriverFinder
+from chrome_lifecycle import ChromeLifecycle, ensure_profile_template
+from logger_config import get_logger
+from metrics import RunMetrics
+
+
+def build_chrome_options(headless: bool = False) -> Options:
+    """Chrome options used for every scraping session."""
+    chrome_options = Options()
+
+    if headless:
+        chrome_options.add_argument("--headless")
+
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--disable-plugins")
+    chrome_options.add_argument("--window-size=1920,1080")
+    # Keep rendering tabs that are not in front (prefetched patients)
+    chrome_options.add_argument("--disable-background-timer-throttling")
+    chrome_options.add_argument("--disable-backgrounding-occluded-windows")
+    chrome_options.add_argument("--disable-renderer-backgrounding")
+    chrome_options.add_argument("--remote-debugging-port=0")
+    return chrome_options
+
+
+def execute_cdp(driver, cmd: str, params: Optional[dict] = None) -> dict:
+    """
+    Run a Chrome DevTools Protocol command.
+
+    Works for both `webdriver.Chrome` and pooled `webdriver.Remote` sessions,
+    which lack `execute_cdp_cmd`.
+    """
+    response = driver.execute("executeCdpCommand", {"cmd": cmd, "params": params or {}})
+    return response["value"]
+
+
+class PooledSession:
+    """A Chrome session handed out by a DriverFactory."""
+
+    def __init__(self, driver, lifecycle: ChromeLifecycle):
+        self.driver = driver
+        self.lifecycle = lifecycle
+        self.uses = 0
+
+
+class DriverFactory:
+    """
+    Hand out ready Chrome sessions from a prestarted chromedriver.
+
+    A single chromedriver Service is started once and kept running. Up to
+    pool_size Chrome sessions (leased or ready) are kept alive; they are
+    launched ahead of time on a background thread, so `acquire()` normally
+    returns an already running browser. Released sessions have their
+    cookies, storage and extra tabs cleared and go back into the pool; only
+    discarded sessions are replaced by launching a new one.
+    """
+
+    def __init__(
+        self,
+        headless: bool = False,
+        pool_size: int = 1,
+        metrics: Optional[RunMetrics] = None,
+        options_factory: Optional[Callable[[], Options]] = None,
+    ):
+        self.headless = headless
+        self.pool_size = max(pool_size, 0)
+        self.metrics = metrics or RunMetrics()
+        self.options_factory = options_factory or (
+            lambda: build_chrome_options(self.headless)
+        )
+        self.service: Optional[Service] = None
+        self.service_lifecycle: Optional[ChromeLifecycle] = None
+        self.template_dir = ""
+        self._browser_path: Optional[str] = None
+        self._ready: Deque[Future] = deque()
+        self._leased: List[PooledSession] = []
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.logger = get_logger()
+
+    def start(self) -> "DriverFactory":
+        """Start chromedriver and begin launching the pooled sessions."""
+        if self.service:
+            return self
+
+        with self.metrics.timer("chromedriver_start"):
+            service = Service()
+            finder = DriverFinder(service, self.options_factory())
+            self._browser_path = finder.get_browser_path() or None
+            service.path = service.env_path() or finder.get_driver_path()
+            service.start()
+            self.service = service
+
+        # Own the chromedriver process (and every Chrome it starts) so it is
+        # reaped even if this process dies
+        self.service_lifecycle = ChromeLifecycle()
+        self.service_lifecycle.prepare_profile()
+        self.service_lifecycle.track_service(service)
+
+        # The template saves profile creation on every clone after the first,
+        # which only covers the warm-up launch when several sessions start
+        self.template_dir = ensure_profile_template(
+            warm=self._warm_profile if self.pool_size > 1 else None
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(self.pool_size, 1), thread_name_prefix="driver-pool"
+        )
+        self._fill_pool()
+        self.logger.info(
+            f"Driver factory started (chromedriver on {service.service_url}, "
+            f"pool size {self.pool_size})"
+        )
+        return self
+
+    def acquire(self) -> PooledSession:
+        """Return a ready session, waiting for one to finish launching if needed."""
+        self.start()
+
+        with self.metrics.timer("session_acquire"):
+            with self._lock:
+                future = self._ready.popleft() if self._ready else None
+            if future is None:
+                future = self._executor.submit(self._create_session)
+                self.metrics.increment("session_pool_misses")
+            else:
+                self.metrics.increment("session_pool_hits")
+
+            session = future.result()
+
+        session.uses += 1
+        with self._lock:
+            self._leased.append(session)
+        return session
+
+    def release(self, session: PooledSession, reuse: bool = True) -> None:
+        """
+        Return a session to the pool, or quit it.
+
+        Args:
+            session: Session obtained from `acquire()`
+            reuse: False to discard the session (e.g. after a crash)
+        """
+        with self._lock:
+            if session in self._leased:
+                self._leased.remove(session)
+            has_room = len(self._ready) + len(self._leased) < self.pool_size
+
+        if reuse and has_room and self._reset_session(session):
+            future = Future()
+            future.set_result(session)
+            with self._lock:
+                self._ready.append(future)
+            self.metrics.increment("session_reuses")
+            return
+
+        self._quit_session(session)
+        if self._executor:
+            # Replace the discarded session in the background
+            self._fill_pool()
+
+    def close(self) -> None:
+        """Quit every session and stop chromedriver."""
+        with self._lock:
+            ready = list(self._ready)
+            leased = list(self._leased)
+            self._ready.clear()
+            self._leased.clear()
+
+        for future in ready:
+            try:
+                self._quit_session(future.result())
+            except Exception:
+                pass
+        for session in leased:
+            self._quit_session(session)
+
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self.service:
+            self.service.stop()
+            self.service = None
+        if self.service_lifecycle:
+            self.service_lifecycle.terminate()
+            self.service_lifecycle = None
+
+    def _fill_pool(self) -> None:
+        """Launch sessions until pool_size are alive (leased or ready)."""
+        with self._lock:
+            while len(self._ready) + len(self._leased) < self.pool_size:
+                self._ready.append(self._executor.submit(self._create_session))
+
+    def _new_options(self, profile_dir: str) -> Options:
+        options = self.options_factory()
+        if self._browser_path:
+            options.binary_location = self._browser_path
+        options.add_argument(f"--user-data-dir={profile_dir}")
+        return options
+
+    def _connect(self, options: Options):
+        executor = ChromiumRemoteConnection(
+            remote_server_addr=self.service.service_url,
+            vendor_prefix="goog",
+            browser_name="chrome",
+        )
+        return webdriver.Remote(command_executor=executor, options=options)
+
+    def _warm_profile(self, profile_dir: str) -> None:
+        # Tracked like any session, so a hung warm-up Chrome is killed too
+        lifecycle = ChromeLifecycle()
+        lifecycle.prepare_profile(profile_dir)
+        try:
+            driver = self._connect(self._new_options(profile_dir))
+            lifecycle.register(driver, owns_service=False)
+            try:
+                driver.get("about:blank")
+            finally:
+                driver.quit()
+        finally:
+            lifecycle.terminate(remove_profile=False)
+
+    def _create_session(self) -> PooledSession:
+        start = time.perf_counter()
+        lifecycle = ChromeLifecycle(template_dir=self.template_dir)
+        options = self._new_options(lifecycle.prepare_profile())
+
+        try:
+            driver = self._connect(options)
+            lifecycle.register(driver, owns_service=False)
+        except Exception as e:
+            self.logger.error(f"Failed to start pooled Chrome session: {e}")
+            lifecycle.terminate()
+            raise
+
+        self.metrics.record_timing("session_start", time.perf_counter() - start)
+        return PooledSession(driver, lifecycle)
+
+    def _reset_session(self, session: PooledSession) -> bool:
+        """Clear tabs, cookies and storage. Returns False if the session is unusable."""
+        driver = session.driver
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+
+            parts = urlsplit(driver.current_url)
+            if parts.scheme in ("http", "https"):
+                execute_cdp(
+                    driver,
+                    "Storage.clearDataForOrigin",
+                    {
+                        "origin": f"{parts.scheme}://{parts.netloc}",
+                        "storageTypes": "all",
+                    },
+                )
+            execute_cdp(driver, "Network.clearBrowserCookies")
+            driver.get("about:blank")
+            return True
+        except Exception as e:
+            self.logger.warning(f"Could not reset pooled session, discarding it: {e}")
+            return False
+
+    def _quit_session(self, session: PooledSession) -> None:
+        try:
+            session.driver.quit()
+        except Exception as e:
+            self.logger.warning(f"Error quitting pooled session: {e}")
+        session.lifecycle.terminate()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,268 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+from logger_config import get_logger
+from normalizer import default_normalizer
+from utils import iter_json_array
+
+DEFAULT_DB = "patient_history.sqlite"
+
+# Fields that change between runs without the patient's record changing:
+# the run time, the list size and where the patient sits in the list
+VOLATILE_FIELDS = (
+    "extraction_timestamp",
+    "total_patients",
+    "page_number",
+    "patient_index_on_page",
+)
+
+RUN_FILE_RE = re.compile(
+    r"patient_data_(?:(?P<account>.+)_)?(?P<ts>\d{8}_\d{6})\.json$"
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    hash TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    account TEXT NOT NULL,
+    run_at TEXT NOT NULL,
+    source TEXT NOT NULL UNIQUE,
+    record_count INTEGER NOT NULL,
+    changed INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS changes (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    key TEXT NOT NULL,
+    hash TEXT REFERENCES records(hash),
+    PRIMARY KEY (key, run_id)
+);
+CREATE INDEX IF NOT EXISTS runs_account_time ON runs(account, run_at);
+"""
+
+# Latest change per patient among an account's runs up to a given time
+LATEST_STATE_SQL = """
+    SELECT c.key, c.hash
+    FROM changes c
+    JOIN (
+        SELECT ch.key, MAX(ch.run_id) AS run_id
+        FROM changes ch JOIN runs r ON r.id = ch.run_id
+        WHERE r.account = ? AND r.run_at <= ?
+        GROUP BY ch.key
+    ) latest ON latest.key = c.key AND latest.run_id = c.run_id
+    WHERE c.hash IS NOT NULL
+"""
+
+
+# List order, from the position stored with each record
+SNAPSHOT_ORDER = (
+    "json_extract(r.data, '$.page_number'), "
+    "json_extract(r.data, '$.patient_index_on_page'), "
+    "s.key"
+)
+
+
+def record_hash(record: dict) -> str:
+    """Content hash of a record, ignoring volatile fields."""
+    stable = {k: v for k, v in record.items() if k not in VOLATILE_FIELDS}
+    canonical = json.dumps(stable, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def record_key(record: dict, content_hash: str) -> str:
+    """
+    Identity of a patient across runs.
+
+    Records are keyed by patient_id, which does not move when the list is
+    re-sorted. Files written before it existed fall back to the position in
+    the patient list, or to the content when they carry neither.
+    """
+    if record.get("patient_id"):
+        return record["patient_id"]
+    page = record.get("page_number")
+    index = record.get("patient_index_on_page")
+    if page is not None and index is not None:
+        return f"{page}:{index}"
+    return content_hash
+
+
+def parse_run_file(filename: str):
+    """
+    Account and run time of a patient_data_*.json file.
+
+    Returns:
+        tuple: (account, run_at ISO string); the file's mtime is used when
+            the name carries no timestamp
+    """
+    match = RUN_FILE_RE.search(os.path.basename(filename))
+    if match:
+        run_at = datetime.strptime(match.group("ts"), "%Y%m%d_%H%M%S")
+        return match.group("account") or "", run_at.isoformat()
+    run_at = datetime.fromtimestamp(os.path.getmtime(filename))
+    return "", run_at.replace(microsecond=0).isoformat()
+
+
+class HistoryStore:
+    """
+    Content-addressed history of every run in a single SQLite file.
+
+    Each distinct record is stored once under its content hash. A run only
+    stores the patients whose record changed, appeared or disappeared
+    since the previous run of the same account, so storage grows with the
+    amount of change rather than with the number of runs. The snapshot at
+    any time is the latest change per patient up to that time, answered
+    from the (key, run_id) index.
+
+    Records keep the extraction_timestamp and list position of the run that
+    first produced their content.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+        self.logger = get_logger()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add_run(self, filename: str) -> Optional[Dict]:
+        """
+        Merge one patient_data_*.json file into the store.
+
+        Runs must be added in chronological order per account; files that
+        were already added, or are older than the account's latest run, are
+        skipped.
+
+        Returns:
+            dict: Run statistics, or None if the file was skipped
+        """
+        account, run_at = parse_run_file(filename)
+        source = os.path.abspath(filename)
+
+        if self.conn.execute(
+            "SELECT 1 FROM runs WHERE source = ?", (source,)
+        ).fetchone():
+            self.logger.info(f"Skipping {filename}: already in the store")
+            return None
+        latest = self.conn.execute(
+            "SELECT MAX(run_at) FROM runs WHERE account = ?", (account,)
+        ).fetchone()[0]
+        if latest and run_at < latest:
+            self.logger.warning(
+                f"Skipping {filename}: older than the latest run ({latest})"
+            )
+            return None
+
+        previous = dict(self._latest_state(account))
+        normalizer = default_normalizer()
+        current: Dict[str, str] = {}
+        new_records = 0
+        count = 0
+
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (account, run_at, source, record_count, changed) "
+                "VALUES (?, ?, ?, 0, 0)",
+                (account, run_at, source),
+            )
+            run_id = cursor.lastrowid
+
+            for record in iter_json_array(filename):
+                record = normalizer.normalize_record(record)
+                content_hash = record_hash(record)
+                current[record_key(record, content_hash)] = content_hash
+                count += 1
+                inserted = self.conn.execute(
+                    "INSERT OR IGNORE INTO records (hash, data) VALUES (?, ?)",
+                    (content_hash, json.dumps(record, ensure_ascii=False)),
+                )
+                new_records += inserted.rowcount
+
+            changes = [
+                (run_id, key, content_hash)
+                for key, content_hash in current.items()
+                if previous.get(key) != content_hash
+            ]
+            # Patients missing from this run are recorded as removed
+            changes.extend(
+                (run_id, key, None) for key in previous if key not in current
+            )
+            self.conn.executemany(
+                "INSERT INTO changes (run_id, key, hash) VALUES (?, ?, ?)", changes
+            )
+            self.conn.execute(
+                "UPDATE runs SET record_count = ?, changed = ? WHERE id = ?",
+                (count, len(changes), run_id),
+            )
+
+        stats = {
+            "file": filename,
+            "account": account,
+            "run_at": run_at,
+            "records": count,
+            "changed": len(changes),
+            "new_records": new_records,
+        }
+        self.logger.info(
+            f"Added {filename}: {count} records, {len(changes)} changed, "
+            f"{new_records} new"
+        )
+        return stats
+
+    def add_runs(self, filenames: Iterable[str]) -> List[Dict]:
+        """Add several run files, oldest first."""
+        ordered = sorted(filenames, key=lambda name: parse_run_file(name)[1])
+        return [stats for stats in map(self.add_run, ordered) if stats]
+
+    def _latest_state(self, account: str, at: Optional[str] = None):
+        """(key, hash) of every patient present at time at (default: now)."""
+        at = at or datetime.max.isoformat()
+        return self.conn.execute(LATEST_STATE_SQL, (account, at))
+
+    def snapshot(self, at: Optional[str] = None, account: str = "") -> Iterator[dict]:
+        """
+        Yield the records as they were after the last run at or before at.
+
+        Args:
+            at: ISO date or datetime (default: latest run)
+            account: Account name for multi-account stores
+        """
+        if at and len(at) == 10:
+            # A bare date includes every run of that day
+            at = f"{at}T23:59:59"
+        at = at or datetime.max.isoformat()
+        rows = self.conn.execute(
+            f"SELECT r.data FROM ({LATEST_STATE_SQL}) s "
+            f"JOIN records r ON r.hash = s.hash ORDER BY {SNAPSHOT_ORDER}",
+            (account, at),
+        )
+        for (data,) in rows:
+            yield json.loads(data)
+
+    def stats(self) -> Dict:
+        """Size of the store compared to the runs it holds."""
+        runs, records_in_runs, changes = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(record_count), 0), "
+            "COALESCE(SUM(changed), 0) FROM runs"
+        ).fetchone()
+        distinct = self.conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+        return {
+            "runs": runs,
+            "records_in_runs": records_in_runs,
+            "distinct_records": distinct,
+            "changes": changes,
+            "db_bytes": os.path.getsize(self.db_path),
+        }
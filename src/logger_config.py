@@ -2,10 +2,37 @@ import logging
 import logging.handlers
 import os
 from datetime import datetime
+from typing import Optional
+
+LOGS_DIR = "logs"
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def log_file_handler(
+    suffix: Optional[str] = None, level: int = logging.INFO
+) -> logging.Handler:
+    """
+    Rotating handler for logs/clinic_pipeline[_<suffix>]_YYYYMMDD.log.
+
+    Only one process may write to a rotating file, so worker processes use
+    their own suffix.
+    """
+    os.makedirs(LOGS_DIR, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d")
+    name = f"clinic_pipeline_{suffix}" if suffix else "clinic_pipeline"
+    handler = logging.handlers.RotatingFileHandler(
+        os.path.join(LOGS_DIR, f"{name}_{timestamp}.log"),
+        maxBytes=10 * 1024 * 1024,  # 10MB
+        backupCount=5,
+    )
+    handler.setLevel(level)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT))
+    return handler
 
 
 def setup_logger(
-    name: str = "clinic_pipeline", level: int = logging.INFO
+    name: str = "clinic_pipeline", level: int = logging.INFO, log_file: bool = True
 ) -> logging.Logger:
     """
     Set up a logger with file and console handlers.
@@ -13,6 +40,7 @@ def setup_logger(
     Args:
         name: Logger name
         level: Logging level (default: INFO)
+        log_file: Also write the shared rotating log file
 
     Returns:
         Configured logger instance
@@ -25,35 +53,14 @@ def setup_logger(
 
     logger.setLevel(level)
 
-    # Create logs directory if it doesn't exist
-    logs_dir = "logs"
-    if not os.path.exists(logs_dir):
-        os.makedirs(logs_dir)
-
-    # Create formatter
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
-
     # File handler with rotation
-    timestamp = datetime.now().strftime("%Y%m%d")
-    log_filename = os.path.join(logs_dir, f"clinic_pipeline_{timestamp}.log")
-    file_handler = logging.handlers.RotatingFileHandler(
-        log_filename,
-        maxBytes=10 * 1024 * 1024,  # 10MB
-        backupCount=5,
-    )
-    file_handler.setLevel(level)
-    file_handler.setFormatter(formatter)
+    if log_file:
+        logger.addHandler(log_file_handler(level=level))
 
     # Console handler
     console_handler = logging.StreamHandler()
     console_handler.setLevel(level)
-    console_handler.setFormatter(formatter)
-
-    # Add handlers to logger
-    logger.addHandler(file_handler)
+    console_handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT))
     logger.addHandler(console_handler)
 
     return logger
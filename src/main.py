@@ -1,34 +1,643 @@
+import argparse
+import glob
 import os
-from scraper import Scraper
-from dotenv import load_dotenv
-from utils import save_data_to_file
+import re
+import sys
+import time
 from logger_config import setup_logger
+from utils import (
+    IncrementalJsonWriter,
+    clean_patient_data,
+    export_data,
+    load_data_from_file,
+    save_data_to_file,
+)
 
+DEFAULT_INPUT_PATTERN = "patient_data_*.json"
+# Default scrape-all output; per-account files carry the account name
+RUN_OUTPUT_RE = re.compile(r"patient_data_\d{8}_\d{6}\.json")
+
+
+def _resolve_inputs(paths):
+    """Expand the input arguments into a sorted list of JSON files."""
+    patterns = paths or [DEFAULT_INPUT_PATTERN]
+    files = []
+    for pattern in patterns:
+        files.extend(sorted(glob.glob(pattern)))
+    return files
+
+
+def _latest_output():
+    """Most recent single-account run output in the working directory, if any."""
+    files = [
+        name
+        for name in glob.glob(DEFAULT_INPUT_PATTERN)
+        if RUN_OUTPUT_RE.fullmatch(os.path.basename(name))
+    ]
+    return max(files, key=os.path.getmtime) if files else None
 
-def main():
-    # Setup logger
-    logger = setup_logger()
+
+def _load_credentials():
+    """Read the clinic URL and credentials from the environment / .env."""
+    # Only the scrape commands need dotenv
+    from dotenv import load_dotenv
 
     load_dotenv()
+    return os.getenv("URL"), os.getenv("USERNAME_"), os.getenv("PASSWORD_")
 
-    url = os.getenv("URL")
-    username = os.getenv("USERNAME_")
-    password = os.getenv("PASSWORD_")
 
-    with Scraper(
-        url=url, username=username, password=password, headless=True
-    ) as scraper:
-        logger.info("Scraper initialized...")
+def run_scrape(args, logger) -> int:
+    """Log in and extract the first patient (scrape) or every patient (scrape-all)."""
+    # Selenium is imported here so offline commands never pay for it
+    from contextlib import nullcontext
+    from budget import RunBudget, load_priorities
+    from driver_factory import DriverFactory
+    from metrics import RunMetrics
+    from pacing import RateGovernor
+    from resource_watchdog import ResourceWatchdog
+    from retry_policy import SessionResetError
+    from scraper import Scraper
+    from webdriver_trace import TraceRecorder
 
-        # Step 1: Login
-        if scraper.login():
-            patient_data = scraper.extract_patient_data()
-            save_data_to_file(patient_data)
+    # Started first so login and browser startup count against the budget
+    budget = RunBudget(args.budget, reserve=args.reserve)
+    if args.command == "scrape-all" and args.budget:
+        # Only a budgeted crawl turns SIGTERM into a graceful stop; any
+        # other run keeps the default of terminating right away
+        budget.install_signal_handlers()
+
+    url, username, password = _load_credentials()
+    metrics = RunMetrics()
+    governor = RateGovernor(
+        min_delay=args.min_delay,
+        max_delay=args.max_delay,
+        initial_delay=args.min_delay,
+        max_tabs=args.max_tabs,
+        metrics=metrics,
+    )
+    factory = None
+    if args.pool_size:
+        factory = DriverFactory(
+            headless=args.headless, pool_size=args.pool_size, metrics=metrics
+        )
+    watchdog = None
+    if args.memory_check_interval > 0:
+        watchdog = ResourceWatchdog(
+            interval=args.memory_check_interval,
+            max_browser_mb=args.max_browser_mb,
+            max_js_heap_mb=args.max_js_heap_mb,
+            metrics=metrics,
+        )
+    recorder = None
+    if args.record_trace:
+        recorder = TraceRecorder(
+            secrets=(username, password), keep_content=args.trace_content
+        )
+
+    try:
+        with (
+            factory or nullcontext(),
+            Scraper(
+                url=url,
+                username=username,
+                password=password,
+                headless=args.headless,
+                driver_factory=factory,
+                metrics=metrics,
+                governor=governor,
+                trace_recorder=recorder,
+                watchdog=watchdog,
+            ) as scraper,
+        ):
+            logger.info("Scraper initialized...")
+
+            if not scraper.login():
+                logger.error("Login failed. Please check your credentials and URL.")
+                return 1
 
+            if args.command == "scrape-all":
+                priorities = None
+                previous = args.priority_from or _latest_output()
+                if previous and args.budget:
+                    priorities = load_priorities(load_data_from_file(previous))
+                    logger.info(f"Prioritizing patients using {previous}")
+
+                # Records are written as they arrive, so a stopped or killed
+                # run still leaves everything extracted so far
+                with IncrementalJsonWriter(args.output) as writer:
+                    for record in scraper.iter_patients(budget, priorities):
+                        writer.write(record)
+            else:
+                patient_data = scraper.extract_patient_data()
+                save_data_to_file(patient_data, args.output)
+    except SessionResetError:
+        # Logged by the scraper; the records so far are already written
+        return 1
+    finally:
+        metrics.save(args.metrics)
+        if recorder:
+            recorder.save(args.record_trace)
+
+    return 0
+
+
+def run_replay(args, logger) -> int:
+    """Run the extraction against a recorded WebDriver trace, without a browser."""
+    from adaptive_timeouts import AdaptiveTimeouts
+    from metrics import RunMetrics
+    from scraper import Scraper
+    from webdriver_trace import load_trace, recorded_url, replay_driver
+
+    try:
+        trace = load_trace(args.trace)
+    except (OSError, ValueError) as e:
+        logger.error(f"Could not load trace {args.trace}: {e}")
+        return 1
+
+    metrics = RunMetrics()
+    driver = replay_driver(trace, realtime=args.realtime)
+    # Replays must not teach the live timeouts anything
+    scraper = Scraper(
+        url=recorded_url(trace) or "",
+        username="",
+        password="",
+        metrics=metrics,
+        timeouts=AdaptiveTimeouts(state_file=None),
+    )
+    scraper.attach_driver(driver)
+
+    start = time.perf_counter()
+    with scraper:
+        if not scraper.login():
+            logger.error("Replayed login failed")
+            return 1
+        if args.all:
+            patient_data = scraper.extract_all_patients_data()
         else:
-            logger.error("Login failed. Please check your credentials and URL.")
-            scraper.take_screenshot("images/login_failed.png")
+            patient_data = scraper.extract_patient_data()
+    elapsed = time.perf_counter() - start
+
+    stats = driver.command_executor.stats
+    metrics.set_value("replay", stats)
+    logger.info(
+        f"Replayed {len(patient_data)} records in {elapsed:.3f}s "
+        f"({stats['replayed']} recorded, {stats['repeated']} repeated, "
+        f"{stats['missing']} missing commands, "
+        f"{stats['stalled_waits']} recorded timeouts skipped)"
+    )
+    if args.output:
+        save_data_to_file(patient_data, args.output)
+    if args.metrics:
+        metrics.save(args.metrics)
+    return 0
+
+
+def run_scrape_accounts(args, logger) -> int:
+    """Scrape every account listed in a config file concurrently."""
+    from multi_account import load_accounts, run_accounts
+
+    try:
+        accounts = load_accounts(args.config)
+    except (OSError, ValueError) as e:
+        logger.error(f"Could not load accounts from {args.config}: {e}")
+        return 1
+    if not accounts:
+        logger.error("No accounts configured")
+        return 1
+
+    options = {
+        "headless": args.headless,
+        "all_patients": args.all_patients,
+        "pool_size": args.pool_size,
+        "min_delay": args.min_delay,
+        "max_delay": args.max_delay,
+        "max_tabs": args.max_tabs,
+        "memory_check_interval": args.memory_check_interval,
+        "max_browser_mb": args.max_browser_mb,
+        "max_js_heap_mb": args.max_js_heap_mb,
+        "output_dir": args.output_dir,
+    }
+    try:
+        summary = run_accounts(accounts, options, args.max_browsers, args.summary)
+    except ValueError as e:
+        logger.error(str(e))
+        return 1
+
+    logger.info(
+        f"{summary['succeeded']}/{summary['accounts']} accounts succeeded, "
+        f"{summary['records']} records in {summary['duration']}s"
+    )
+    return 0 if summary["succeeded"] == summary["accounts"] else 1
+
+
+def run_clean(args, logger) -> int:
+    """Re-run the cleaning rules over existing patient_data_*.json files."""
+    files = _resolve_inputs(args.inputs)
+    if not files:
+        logger.error("No input files found")
+        return 1
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    for filename in files:
+        records = load_data_from_file(filename)
+        target = filename
+        if args.output_dir:
+            target = os.path.join(args.output_dir, os.path.basename(filename))
+        if not save_data_to_file(records, target):
+            return 1
+
+    logger.info(f"Cleaned {len(files)} file(s)")
+    return 0
+
+
+def run_export(args, logger) -> int:
+    """Convert patient_data_*.json files to CSV or NDJSON."""
+    files = _resolve_inputs(args.inputs)
+    if not files:
+        logger.error("No input files found")
+        return 1
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    for filename in files:
+        records = clean_patient_data(load_data_from_file(filename))
+        base = os.path.splitext(os.path.basename(filename))[0]
+        target = os.path.join(args.output_dir or os.path.dirname(filename), base)
+        count = export_data(records, f"{target}.{args.format}", args.format)
+        logger.info(f"Exported {count} records to {target}.{args.format}")
+
+    return 0
+
+
+def run_compact(args, logger) -> int:
+    """Merge run files into the deduplicated history store."""
+    from history_store import HistoryStore
+
+    files = _resolve_inputs(args.inputs)
+    if not files:
+        logger.error("No input files found")
+        return 1
+
+    with HistoryStore(args.db) as store:
+        added = store.add_runs(files)
+        stats = store.stats()
+
+    logger.info(
+        f"Added {len(added)} run(s). Store holds {stats['runs']} runs: "
+        f"{stats['records_in_runs']} records stored as "
+        f"{stats['distinct_records']} distinct records and "
+        f"{stats['changes']} changes ({stats['db_bytes']} bytes)"
+    )
+    return 0
+
+
+def run_snapshot(args, logger) -> int:
+    """Rebuild the patient data of a past run from the history store."""
+    from history_store import HistoryStore
+
+    if not os.path.exists(args.db):
+        logger.error(f"History store {args.db} not found")
+        return 1
+
+    # Not a patient_data_* name, or later commands would take it for a run
+    at = re.sub(r"\W", "", args.at or "latest")
+    output = args.output or f"snapshot_{at}.json"
+    with HistoryStore(args.db) as store, IncrementalJsonWriter(output) as writer:
+        for record in store.snapshot(args.at, args.account):
+            writer.write(record)
+    return 0
+
+
+def run_diff(args, logger) -> int:
+    """Write the changes between two runs as NDJSON plus a summary."""
+    import json
+    from history_store import parse_run_file
+    from run_diff import changes_filename, diff_runs
+
+    if args.runs:
+        files = args.runs
+    else:
+        # The two latest runs of the most recent run's account
+        runs = sorted((parse_run_file(name)[1], name) for name in _resolve_inputs(None))
+        account = parse_run_file(runs[-1][1])[0] if runs else None
+        files = [name for _, name in runs if parse_run_file(name)[0] == account][-2:]
+    if len(files) != 2:
+        logger.error("Need a previous and a current run file to compare")
+        return 1
+
+    previous, current = files
+    output = args.output or changes_filename(current)
+    summary = diff_runs(previous, current, output, args.buckets)
+
+    summary_file = args.summary or f"{os.path.splitext(output)[0]}_summary.json"
+    with open(summary_file, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    logger.info(f"Changes saved to {output}, summary to {summary_file}")
+    return 0
+
+
+def run_index(args, logger) -> int:
+    """Add run files to the medical_care search index."""
+    from search_index import MedicalCareIndex
+
+    files = _resolve_inputs(args.inputs)
+    if not files:
+        logger.error("No input files found")
+        return 1
+
+    with MedicalCareIndex(args.db) as index:
+        added = [index.add_file(filename) for filename in files]
+        stats = index.stats()
+
+    new_files = [count for count in added if count is not None]
+    logger.info(
+        f"Indexed {len(new_files)} new file(s), {sum(new_files)} new consultations. "
+        f"Index holds {stats['documents']} consultations, {stats['tokens']} tokens"
+    )
+    return 0
+
+
+def run_search(args, logger) -> int:
+    """Find consultations whose medical_care mentions every query term."""
+    from search_index import MedicalCareIndex
+
+    if not os.path.exists(args.db):
+        logger.error(f"Search index {args.db} not found, run the index command first")
+        return 1
+
+    with MedicalCareIndex(args.db) as index:
+        start = time.perf_counter()
+        results = index.search(" ".join(args.query), args.limit, args.account)
+        elapsed = time.perf_counter() - start
+
+    for result in results:
+        text = " ".join(result["medical_care"].split())
+        print(f"{result['date_hour']}\t{result['patient']}\t{text[:120]}")
+    logger.info(f"{len(results)} result(s) in {elapsed * 1000:.1f} ms")
+    return 0
+
+
+def run_bench(args, logger) -> int:
+    """Measure cleaning throughput over existing output files."""
+    from normalizer import default_normalizer
+
+    files = _resolve_inputs(args.inputs)
+    if not files:
+        logger.error("No input files found")
+        return 1
+
+    records = []
+    for filename in files:
+        records.extend(load_data_from_file(filename))
+    records = records * args.repeat
+
+    normalizer = default_normalizer()
+    start = time.perf_counter()
+    if args.workers:
+        cleaned = sum(1 for _ in normalizer.normalize_parallel(records, args.workers))
+    else:
+        cleaned = len(normalizer.normalize_batch(records))
+    elapsed = time.perf_counter() - start
+
+    rate = cleaned / elapsed if elapsed else float("inf")
+    logger.info(
+        f"Normalized {cleaned} records from {len(files)} file(s) "
+        f"in {elapsed:.3f}s ({rate:.0f} records/s)"
+    )
+    return 0
+
+
+def _add_scrape_options(parser) -> None:
+    """Browser and pacing options shared by the scrape commands."""
+    parser.add_argument(
+        "--no-headless",
+        dest="headless",
+        action="store_false",
+        help="Show the browser window",
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=0,
+        help="Prestart N Chrome sessions on a shared chromedriver",
+    )
+    parser.add_argument(
+        "--min-delay",
+        type=float,
+        default=0.0,
+        help="Minimum pause between patients in seconds",
+    )
+    parser.add_argument(
+        "--max-delay",
+        type=float,
+        default=10.0,
+        help="Maximum pause between patients when the server slows down",
+    )
+    parser.add_argument(
+        "--max-tabs",
+        type=int,
+        default=1,
+        help="Upper limit for browser tabs; above 1, upcoming patients load "
+        "in spare tabs while one is read",
+    )
+    parser.add_argument(
+        "--memory-check-interval",
+        type=float,
+        default=0.0,
+        help="Seconds between memory samples (default 0: watchdog off)",
+    )
+    parser.add_argument(
+        "--max-browser-mb",
+        type=float,
+        default=2048,
+        help="Recycle the browser when Chrome uses more memory than this",
+    )
+    parser.add_argument(
+        "--max-js-heap-mb",
+        type=float,
+        default=512,
+        help="Recycle the browser when the page's JS heap grows past this",
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="clinic-pipeline", description="Clinic patient data pipeline"
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    for name, help_text in (
+        ("scrape", "Log in and extract the first patient's data"),
+        ("scrape-all", "Log in and extract data for every patient"),
+    ):
+        scrape = subparsers.add_parser(name, help=help_text)
+        _add_scrape_options(scrape)
+        scrape.add_argument(
+            "-o", "--output", help="Output file (default: timestamped JSON)"
+        )
+        scrape.add_argument(
+            "--metrics", help="Run metrics file (default: timestamped JSON)"
+        )
+        scrape.add_argument(
+            "--record-trace",
+            help="Record the WebDriver commands to this (redacted) trace file",
+        )
+        scrape.add_argument(
+            "--trace-content",
+            action="store_true",
+            help="Keep element texts, screenshots and page sources (patient data) "
+            "in the trace",
+        )
+        scrape.add_argument(
+            "--budget",
+            type=float,
+            help="Total run time in seconds; stop starting patients before it ends",
+        )
+        scrape.add_argument(
+            "--reserve",
+            type=float,
+            default=30.0,
+            help="Seconds of the budget kept for saving output and shutdown",
+        )
+        scrape.add_argument(
+            "--priority-from",
+            help="Previous output used to order patients when a budget is set "
+            "(default: latest patient_data_*.json)",
+        )
+        scrape.set_defaults(handler=run_scrape)
+
+    accounts = subparsers.add_parser(
+        "scrape-accounts", help="Scrape several accounts from a config file"
+    )
+    accounts.add_argument("config", help="JSON file listing the accounts")
+    _add_scrape_options(accounts)
+    accounts.add_argument(
+        "--all-patients",
+        action="store_true",
+        help="Extract every patient instead of only the first one",
+    )
+    accounts.add_argument(
+        "--max-browsers",
+        type=int,
+        default=2,
+        help="Maximum number of browsers running at once",
+    )
+    accounts.add_argument("--output-dir", help="Directory for per-account files")
+    accounts.add_argument(
+        "--summary", help="Combined summary file (default: timestamped JSON)"
+    )
+    accounts.set_defaults(handler=run_scrape_accounts)
+
+    replay = subparsers.add_parser(
+        "replay", help="Run the extraction against a recorded trace"
+    )
+    replay.add_argument("trace", help="Trace written by scrape --record-trace")
+    replay.add_argument(
+        "--all", action="store_true", help="Replay scrape-all instead of scrape"
+    )
+    replay.add_argument(
+        "--realtime",
+        action="store_true",
+        help="Keep the recorded command durations (default: as fast as possible)",
+    )
+    replay.add_argument("-o", "--output", help="Save the replayed records here")
+    replay.add_argument("--metrics", help="Save run metrics here")
+    replay.set_defaults(handler=run_replay)
+
+    clean = subparsers.add_parser(
+        "clean", help="Re-clean existing patient_data_*.json files"
+    )
+    clean.add_argument("inputs", nargs="*", help="Files or glob patterns")
+    clean.add_argument(
+        "--output-dir", help="Write cleaned files here instead of in place"
+    )
+    clean.set_defaults(handler=run_clean)
+
+    export = subparsers.add_parser("export", help="Convert output files")
+    export.add_argument("inputs", nargs="*", help="Files or glob patterns")
+    export.add_argument("-f", "--format", choices=("csv", "ndjson"), default="csv")
+    export.add_argument("--output-dir", help="Directory for exported files")
+    export.set_defaults(handler=run_export)
+
+    compact = subparsers.add_parser(
+        "compact", help="Merge run files into the history store"
+    )
+    compact.add_argument("inputs", nargs="*", help="Files or glob patterns")
+    compact.add_argument("--db", default="patient_history.sqlite")
+    compact.set_defaults(handler=run_compact)
+
+    snapshot = subparsers.add_parser(
+        "snapshot", help="Rebuild a past run's data from the history store"
+    )
+    snapshot.add_argument("--at", help="ISO date or datetime (default: latest run)")
+    snapshot.add_argument("--account", default="", help="Account name")
+    snapshot.add_argument("--db", default="patient_history.sqlite")
+    snapshot.add_argument(
+        "-o", "--output", help="Output file (default: snapshot_<at>.json)"
+    )
+    snapshot.set_defaults(handler=run_snapshot)
+
+    diff = subparsers.add_parser(
+        "diff", help="Report what changed between two runs (NDJSON)"
+    )
+    diff.add_argument(
+        "runs",
+        nargs="*",
+        metavar="RUN",
+        help="Previous and current run files (default: the two latest)",
+    )
+    diff.add_argument("-o", "--output", help="Changes file (NDJSON)")
+    diff.add_argument("--summary", help="Summary file (JSON)")
+    diff.add_argument(
+        "--buckets", type=int, default=64, help="Hash buckets for large runs"
+    )
+    diff.set_defaults(handler=run_diff)
+
+    index = subparsers.add_parser(
+        "index", help="Add run files to the medical_care search index"
+    )
+    index.add_argument("inputs", nargs="*", help="Files or glob patterns")
+    index.add_argument("--db", default="medical_care_index.sqlite")
+    index.set_defaults(handler=run_index)
+
+    search = subparsers.add_parser(
+        "search", help="Search medical_care text (accent/case-insensitive)"
+    )
+    search.add_argument("query", nargs="+", help="Terms; end a term with * for prefix")
+    search.add_argument("--limit", type=int, default=50)
+    search.add_argument("--account", help="Only this account's consultations")
+    search.add_argument("--db", default="medical_care_index.sqlite")
+    search.set_defaults(handler=run_search)
+
+    bench = subparsers.add_parser("bench", help="Benchmark data cleaning")
+    bench.add_argument("inputs", nargs="*", help="Files or glob patterns")
+    bench.add_argument(
+        "--repeat", type=int, default=1, help="Repeat the input records N times"
+    )
+    bench.add_argument(
+        "--workers", type=int, default=0, help="Use a process pool of N workers"
+    )
+    bench.set_defaults(handler=run_bench)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    # Setup logger
+    logger = setup_logger()
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    # Running without a subcommand keeps the original behaviour
+    if args.command is None:
+        args = parser.parse_args(["scrape"])
+
+    return args.handler(args, logger)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
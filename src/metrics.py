@@ -0,0 +1,100 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+from logger_config import get_logger
+
+
+class RunMetrics:
+    """
+    Collect timings, counters and values for a single pipeline run.
+
+    Safe to share between the threads of one process (e.g. a driver pool
+    starting sessions in the background).
+    """
+
+    def __init__(self):
+        self.started_at = datetime.now()
+        self.timings: Dict[str, List[float]] = {}
+        self.counters: Dict[str, int] = {}
+        self.values: Dict[str, object] = {}
+        self.samples: Dict[str, List[dict]] = {}
+        self._lock = threading.Lock()
+
+    def record_timing(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.timings.setdefault(name, []).append(seconds)
+
+    @contextmanager
+    def timer(self, name: str):
+        """Time the enclosed block and record it under name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_timing(name, time.perf_counter() - start)
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set_value(self, name: str, value) -> None:
+        with self._lock:
+            self.values[name] = value
+
+    def add_sample(self, name: str, sample: dict) -> None:
+        """Append a time-series sample (e.g. resource usage)."""
+        with self._lock:
+            self.samples.setdefault(name, []).append(sample)
+
+    def summary(self) -> dict:
+        """Aggregate the collected data into a JSON-serializable dict."""
+        with self._lock:
+            timings = {
+                name: {
+                    "count": len(values),
+                    "total": round(sum(values), 4),
+                    "mean": round(sum(values) / len(values), 4),
+                    "max": round(max(values), 4),
+                }
+                for name, values in self.timings.items()
+                if values
+            }
+            return {
+                "started_at": self.started_at.strftime("%Y-%m-%d %H:%M:%S"),
+                "duration": round(
+                    (datetime.now() - self.started_at).total_seconds(), 3
+                ),
+                "timings": timings,
+                "counters": dict(self.counters),
+                "values": dict(self.values),
+                "samples": {
+                    name: list(values) for name, values in self.samples.items()
+                },
+            }
+
+    def save(self, filename: Optional[str] = None) -> Optional[str]:
+        """
+        Write the summary to a JSON file.
+
+        Args:
+            filename: Output path (default: timestamped run_metrics_*.json)
+
+        Returns:
+            str: Path of the written file, or None if saving failed
+        """
+        logger = get_logger()
+
+        if filename is None:
+            filename = f"run_metrics_{self.started_at.strftime('%Y%m%d_%H%M%S')}.json"
+
+        try:
+            with open(filename, "w", encoding="utf-8") as f:
+                json.dump(self.summary(), f, indent=2, ensure_ascii=False)
+            logger.info(f"Run metrics saved to {filename}")
+            return filename
+        except Exception as e:
+            logger.error(f"Error saving run metrics: {e}")
+            return None
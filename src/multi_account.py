@@ -0,0 +1,319 @@
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional
+from logger_config import get_logger, log_file_handler, setup_logger
+
+REQUIRED_FIELDS = ("name", "url", "username", "password")
+ENV_REFERENCE_RE = re.compile(r"^\$\{?(\w+)\}?$")
+
+
+def _safe_name(name: str) -> str:
+    """Account name usable inside file names."""
+    return re.sub(r"[^\w.-]+", "_", name).strip("_") or "account"
+
+
+def _resolve_value(value):
+    """Replace "$VAR" / "${VAR}" values with the environment variable."""
+    if isinstance(value, str):
+        match = ENV_REFERENCE_RE.match(value)
+        if match:
+            return os.getenv(match.group(1))
+    return value
+
+
+def load_accounts(filename: str) -> List[Dict]:
+    """
+    Load the accounts to scrape from a JSON config file.
+
+    The file holds a list of accounts, or an object with an "accounts" list:
+
+        {"accounts": [
+            {"name": "unit-a", "url": "$URL_A",
+             "username": "$USERNAME_A", "password": "$PASSWORD_A"}
+        ]}
+
+    Values written as "$VAR" or "${VAR}" are read from the environment (and
+    .env), so the file itself never has to contain credentials.
+
+    Args:
+        filename: Path of the config file
+
+    Returns:
+        list: Accounts with every required field resolved
+
+    Raises:
+        ValueError: If the file is malformed or an account is incomplete
+    """
+    # Only the scrape commands need dotenv
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    with open(filename, encoding="utf-8") as f:
+        config = json.load(f)
+
+    entries = config.get("accounts") if isinstance(config, dict) else config
+    if not isinstance(entries, list):
+        raise ValueError(f"{filename}: expected a list of accounts")
+
+    accounts = []
+    seen = set()
+    for index, entry in enumerate(entries):
+        account = {key: _resolve_value(value) for key, value in entry.items()}
+        missing = [field for field in REQUIRED_FIELDS if not account.get(field)]
+        if missing:
+            label = account.get("name") or f"#{index + 1}"
+            raise ValueError(f"Account {label} is missing {', '.join(missing)}")
+        if account["name"] in seen:
+            raise ValueError(f"Duplicate account name {account['name']}")
+        seen.add(account["name"])
+        accounts.append(account)
+
+    return accounts
+
+
+def scrape_account(account: Dict, options: Dict) -> Dict:
+    """
+    Scrape one account with its own browser. Runs inside a worker process.
+
+    Args:
+        account: Entry returned by `load_accounts`
+        options: Scrape settings shared by all accounts (headless,
+            all_patients, pool_size, min_delay, max_delay, max_tabs,
+            output_dir)
+
+    Returns:
+        dict: Result for the combined summary (status, records, files, error)
+    """
+    # Selenium is imported here so the parent process never pays for it
+    from contextlib import nullcontext
+    from adaptive_timeouts import AdaptiveTimeouts
+    from driver_factory import DriverFactory
+    from metrics import RunMetrics
+    from pacing import RateGovernor
+    from resource_watchdog import ResourceWatchdog
+    from retry_policy import SessionResetError
+    from scraper import Scraper
+    from utils import save_data_to_file
+
+    logger = get_logger()
+    name = _safe_name(account["name"])
+    account_log = log_file_handler(name)
+    logger.addHandler(account_log)
+    output_dir = options.get("output_dir") or "."
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    start = time.perf_counter()
+
+    result = {
+        "name": account["name"],
+        "status": "failed",
+        "records": 0,
+        "output": None,
+        "metrics": None,
+        "error": None,
+    }
+
+    metrics = RunMetrics()
+    metrics.set_value("account", account["name"])
+    governor = RateGovernor(
+        min_delay=options.get("min_delay", 0.0),
+        max_delay=options.get("max_delay", 10.0),
+        initial_delay=options.get("min_delay", 0.0),
+        max_tabs=options.get("max_tabs", 1),
+        metrics=metrics,
+    )
+    # Each clinic unit learns its own step latencies
+    timeouts = AdaptiveTimeouts(
+        state_file=os.path.join(".cache", f"timeout_stats_{name}.json")
+    )
+    watchdog = None
+    if options.get("memory_check_interval", 0.0) > 0:
+        watchdog = ResourceWatchdog(
+            interval=options["memory_check_interval"],
+            max_browser_mb=options.get("max_browser_mb", 2048),
+            max_js_heap_mb=options.get("max_js_heap_mb", 512),
+            metrics=metrics,
+        )
+    factory = None
+    if options.get("pool_size"):
+        factory = DriverFactory(
+            headless=options.get("headless", True),
+            pool_size=options["pool_size"],
+            metrics=metrics,
+        )
+
+    logger.info(f"[{account['name']}] Starting scrape")
+    try:
+        with (
+            factory or nullcontext(),
+            Scraper(
+                url=account["url"],
+                username=account["username"],
+                password=account["password"],
+                headless=options.get("headless", True),
+                driver_factory=factory,
+                metrics=metrics,
+                timeouts=timeouts,
+                governor=governor,
+                watchdog=watchdog,
+            ) as scraper,
+        ):
+            if not scraper.login():
+                result["error"] = "login failed"
+            else:
+                if options.get("all_patients"):
+                    patient_data = []
+                    try:
+                        for record in scraper.iter_patients():
+                            patient_data.append(record)
+                    except SessionResetError as e:
+                        # Saved below, but the account still counts as failed
+                        result["error"] = str(e)
+                else:
+                    patient_data = scraper.extract_patient_data()
+
+                output = save_data_to_file(
+                    patient_data,
+                    os.path.join(output_dir, f"patient_data_{name}_{timestamp}.json"),
+                )
+                result["records"] = len(patient_data)
+                result["output"] = output
+                if not output:
+                    result["error"] = "could not save output"
+                elif not result["error"]:
+                    result["status"] = "ok"
+    except Exception as e:
+        logger.error(f"[{account['name']}] Scrape failed: {e}")
+        result["error"] = str(e)
+    finally:
+        result["metrics"] = metrics.save(
+            os.path.join(output_dir, f"run_metrics_{name}_{timestamp}.json")
+        )
+
+    result["duration"] = round(time.perf_counter() - start, 3)
+    logger.info(
+        f"[{account['name']}] Finished ({result['status']}, "
+        f"{result['records']} records, {result['duration']}s)"
+    )
+    logger.removeHandler(account_log)
+    account_log.close()
+    return result
+
+
+def _init_worker() -> None:
+    """
+    Set up logging in a worker process.
+
+    A forked worker inherits the parent's handler for the shared rotating
+    log file; several processes rotating one file corrupt it, so workers
+    drop it and log to the console plus one file per account.
+    """
+    logger = get_logger()
+    for handler in list(logger.handlers):
+        if isinstance(handler, logging.FileHandler):
+            logger.removeHandler(handler)
+            handler.close()
+    setup_logger(log_file=False)
+
+
+def browsers_per_account(options: Dict) -> int:
+    """Chrome instances one account keeps alive (its session pool, or one)."""
+    return max(options.get("pool_size") or 1, 1)
+
+
+def run_accounts(
+    accounts: List[Dict],
+    options: Dict,
+    max_browsers: int = 2,
+    summary_file: Optional[str] = None,
+) -> Dict:
+    """
+    Scrape several accounts concurrently in a process pool.
+
+    Each account runs in its own process with its own browser(s), so the
+    run takes about as long as the slowest account instead of the sum of
+    all of them. max_browsers caps the number of Chrome instances alive at
+    once; with a session pool every account counts as pool_size browsers.
+    Each account logs to logs/clinic_pipeline_<name>_<date>.log.
+
+    Args:
+        accounts: Entries returned by `load_accounts`
+        options: Scrape settings passed to `scrape_account`
+        max_browsers: Global limit on concurrent browsers
+        summary_file: Combined summary path (default: timestamped JSON)
+
+    Returns:
+        dict: Combined summary of every account
+
+    Raises:
+        ValueError: If max_browsers is too small for even one account
+    """
+    logger = get_logger()
+    per_account = browsers_per_account(options)
+    if max_browsers < per_account:
+        raise ValueError(
+            f"max_browsers={max_browsers} cannot fit one account: each account "
+            f"runs {per_account} browsers (pool size)"
+        )
+    workers = min(max_browsers // per_account, len(accounts))
+    started_at = datetime.now()
+    start = time.perf_counter()
+
+    output_dir = options.get("output_dir")
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    logger.info(
+        f"Scraping {len(accounts)} accounts with {workers} worker(s) "
+        f"(max {max_browsers} browsers)"
+    )
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        futures = {
+            executor.submit(scrape_account, account, options): account
+            for account in accounts
+        }
+        for future in as_completed(futures):
+            account = futures[future]
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # The worker process itself died (e.g. killed by the OOM killer)
+                logger.error(f"[{account['name']}] Worker crashed: {e}")
+                results.append(
+                    {"name": account["name"], "status": "failed", "error": str(e)}
+                )
+
+    # Keep the config file order in the summary
+    order = {account["name"]: index for index, account in enumerate(accounts)}
+    results.sort(key=lambda result: order[result["name"]])
+
+    summary = {
+        "started_at": started_at.strftime("%Y-%m-%d %H:%M:%S"),
+        "duration": round(time.perf_counter() - start, 3),
+        "workers": workers,
+        "accounts": len(accounts),
+        "succeeded": sum(1 for result in results if result["status"] == "ok"),
+        "records": sum(result.get("records", 0) for result in results),
+        "results": results,
+    }
+
+    if summary_file is None:
+        summary_file = os.path.join(
+            output_dir or ".",
+            f"run_summary_{started_at.strftime('%Y%m%d_%H%M%S')}.json",
+        )
+    try:
+        with open(summary_file, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        logger.info(f"Combined summary saved to {summary_file}")
+    except Exception as e:
+        logger.error(f"Error saving combined summary: {e}")
+
+    return summary
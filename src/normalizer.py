@@ -0,0 +1,205 @@
+import os
+import re
+import unicodedata
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from logger_config import get_logger
+
+NOT_FOUND = "Not found"
+
+DATE_HOUR_PREFIX_RE = re.compile(r"^Data/hora\s*\n\s*", re.IGNORECASE)
+MEDICAL_CARE_PREFIX_RE = re.compile(r"^Dados do atendimento\s*\n\s*", re.IGNORECASE)
+DATE_HOUR_RE = re.compile(
+    r"(?P<day>\d{1,2})/(?P<month>\d{1,2})/(?P<year>\d{4})"
+    r"(?:\D{1,6}?(?P<hour>\d{1,2})[:h](?P<minute>\d{2})(?::(?P<second>\d{2}))?)?"
+)
+HORIZONTAL_SPACE_RE = re.compile(r"[^\S\n]+")
+BLANK_LINES_RE = re.compile(r"\n{3,}")
+MOJIBAKE_RE = re.compile("[ÂÃ][\u0080-¿]")
+
+Rule = Callable[[str], object]
+
+
+def strip_date_hour_prefix(text: str) -> str:
+    """Remove the 'Data/hora' label the timeline renders above the date."""
+    return DATE_HOUR_PREFIX_RE.sub("", text).strip()
+
+
+def strip_medical_care_prefix(text: str) -> str:
+    """Remove the 'Dados do atendimento' label above the medical care text."""
+    return MEDICAL_CARE_PREFIX_RE.sub("", text).strip()
+
+
+@lru_cache(maxsize=4096)
+def parse_date_hour(text: str) -> Optional[datetime]:
+    """
+    Parse a "dd/mm/yyyy" date with an optional "HH:MM[:SS]" time.
+
+    Results are memoized because the same consultation dates repeat across
+    patients and across daily runs.
+
+    Args:
+        text (str): Date text, with or without the 'Data/hora' prefix
+
+    Returns:
+        datetime: Parsed value, or None if the text holds no valid date
+    """
+    match = DATE_HOUR_RE.search(text)
+    if not match:
+        return None
+
+    parts = match.groupdict()
+    try:
+        return datetime(
+            int(parts["year"]),
+            int(parts["month"]),
+            int(parts["day"]),
+            int(parts["hour"] or 0),
+            int(parts["minute"] or 0),
+            int(parts["second"] or 0),
+        )
+    except ValueError:
+        return None
+
+
+def normalize_date_hour(text: str) -> str:
+    """
+    Normalize the date_hour field to an ISO-8601 datetime string.
+
+    Text that does not contain a valid date is returned without its prefix.
+    """
+    parsed = parse_date_hour(text)
+    if parsed is None:
+        return strip_date_hour_prefix(text)
+    return parsed.isoformat()
+
+
+def repair_encoding(text: str) -> str:
+    """Undo UTF-8 text that was decoded as Latin-1 (e.g. 'avaliaÃ§Ã£o')."""
+    if not MOJIBAKE_RE.search(text):
+        return text
+    try:
+        return text.encode("latin-1").decode("utf-8")
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return text
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse runs of spaces, trim every line and drop extra blank lines."""
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    lines = [HORIZONTAL_SPACE_RE.sub(" ", line).strip() for line in text.split("\n")]
+    return BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip()
+
+
+def normalize_medical_care(text: str) -> str:
+    """Normalize prefix, encoding and whitespace of the medical_care field."""
+    text = unicodedata.normalize("NFC", repair_encoding(text))
+    return normalize_whitespace(strip_medical_care_prefix(text))
+
+
+def fold_accents(text: str) -> str:
+    """Lowercase text and drop diacritics ('Avaliação' -> 'avaliacao')."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+class Normalizer:
+    """
+    Apply registered per-field rules to patient records.
+
+    Rules are plain callables taking the raw field text. They run in
+    registration order and are skipped for empty or "Not found" values.
+    Rules must be module-level functions for `normalize_parallel` to be able
+    to ship them to worker processes.
+    """
+
+    def __init__(self):
+        self._rules: Dict[str, List[Rule]] = {}
+
+    def register(self, field: str, rule: Rule) -> "Normalizer":
+        """Append a rule for the given field. Returns self for chaining."""
+        self._rules.setdefault(field, []).append(rule)
+        return self
+
+    def fields(self) -> List[str]:
+        """Fields that have at least one registered rule."""
+        return list(self._rules)
+
+    def normalize_record(self, record: dict) -> dict:
+        """Return a normalized copy of a single record."""
+        normalized = record.copy()
+
+        for field, rules in self._rules.items():
+            value = normalized.get(field)
+            if not value or value == NOT_FOUND:
+                continue
+            for rule in rules:
+                value = rule(value)
+            normalized[field] = value
+
+        return normalized
+
+    def normalize_batch(self, records: Iterable[dict]) -> List[dict]:
+        """Normalize a batch of records in the current process."""
+        return [self.normalize_record(record) for record in records]
+
+    def iter_normalized(self, records: Iterable[dict]) -> Iterator[dict]:
+        """Lazily normalize records, e.g. while streaming them from a file."""
+        for record in records:
+            yield self.normalize_record(record)
+
+    def normalize_parallel(
+        self,
+        records: Iterable[dict],
+        workers: Optional[int] = None,
+        chunk_size: int = 1000,
+    ) -> Iterator[dict]:
+        """
+        Normalize records on a process pool, preserving input order.
+
+        Meant for historical backfills with many run files; a single daily
+        run is faster with `normalize_batch`.
+
+        Args:
+            records: Records to normalize
+            workers: Number of worker processes (default: CPU count)
+            chunk_size: Records sent to a worker at a time
+
+        Yields:
+            dict: Normalized records
+        """
+        # Imported here so the CLI does not load multiprocessing for a daily run
+        from concurrent.futures import ProcessPoolExecutor
+
+        logger = get_logger()
+        workers = workers or os.cpu_count() or 1
+        iterator = iter(records)
+        chunks = iter(lambda: list(islice(iterator, chunk_size)), [])
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Bound the chunks in flight so a large backfill is never fully
+            # materialized in memory
+            max_pending = 2 * workers
+            pending = deque()
+
+            for chunk in chunks:
+                pending.append(executor.submit(self.normalize_batch, chunk))
+                if len(pending) >= max_pending:
+                    batch = pending.popleft().result()
+                    logger.debug(f"Normalized chunk of {len(batch)} records")
+                    yield from batch
+
+            while pending:
+                yield from pending.popleft().result()
+
+
+def default_normalizer() -> Normalizer:
+    """Build the normalizer used for patient data files."""
+    return (
+        Normalizer()
+        .register("date_hour", normalize_date_hour)
+        .register("medical_care", normalize_medical_care)
+    )
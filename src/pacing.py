@@ -0,0 +1,168 @@
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+from logger_config import get_logger
+from metrics import RunMetrics
+
+
+class RateGovernor:
+    """
+    AIMD pacing of requests against the clinic server.
+
+    Every wait the scraper performs reports its latency here, relative to
+    that step's baseline, along with timeouts. The baseline is the median
+    of the step's recent latencies while the server was healthy (floored
+    at min_baseline, so steps that are usually near-instant do not turn
+    jitter into huge ratios). Waits that look congested themselves, or are
+    observed while backing off, never enter it, so sustained slowness
+    keeps reading as congestion instead of becoming the new normal. After each window of observations the
+    governor decides whether the server is congested (median latency ratio
+    or error rate too high):
+
+    - congested: the delay between patients is multiplied and the number of
+      browser tabs is halved (multiplicative decrease of the request rate)
+    - healthy: the delay shrinks by a fixed step, and once it is back at
+      its minimum one more tab is allowed (additive increase)
+
+    The delay stays within [min_delay, max_delay] and the tab count within
+    [min_tabs, max_tabs]; the tab count caps how many patients are loaded
+    at once (see `tab_prefetch.TabPrefetcher`).
+    """
+
+    def __init__(
+        self,
+        min_delay: float = 0.0,
+        max_delay: float = 10.0,
+        initial_delay: float = 0.0,
+        latency_factor: float = 2.5,
+        error_threshold: float = 0.2,
+        window: int = 10,
+        additive_step: float = 0.25,
+        backoff_factor: float = 2.0,
+        backoff_floor: float = 0.5,
+        min_tabs: int = 1,
+        max_tabs: int = 1,
+        min_baseline: float = 0.25,
+        baseline_window: int = 50,
+        metrics: Optional[RunMetrics] = None,
+    ):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.delay = min(max(initial_delay, min_delay), max_delay)
+        self.latency_factor = latency_factor
+        self.error_threshold = error_threshold
+        self.window = window
+        self.additive_step = additive_step
+        self.backoff_factor = backoff_factor
+        self.backoff_floor = backoff_floor
+        self.min_tabs = max(min_tabs, 1)
+        self.max_tabs = max(max_tabs, self.min_tabs)
+        self.tabs = self.min_tabs
+        self.min_baseline = min_baseline
+        self.baseline_window = baseline_window
+        self.metrics = metrics
+        self._history: Dict[str, Deque[float]] = {}
+        self._ratios: Deque[float] = deque(maxlen=window)
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._pending = 0
+        self._last_pace: Optional[float] = None
+        self._lock = threading.Lock()
+        self.logger = get_logger()
+
+    def observe_latency(self, step: str, seconds: float) -> None:
+        """Record a successful wait of step that took seconds."""
+        with self._lock:
+            history = self._history.get(step)
+            if history is None:
+                history = self._history[step] = deque(maxlen=self.baseline_window)
+            ratio = seconds / self.baseline(step) if history else 1.0
+            if history:
+                self._ratios.append(ratio)
+            # Only healthy latencies define what "normal" is; the first
+            # window is taken as is, so one odd first sample cannot pin it
+            healthy = len(history) < self.window or ratio <= self.latency_factor
+            if healthy and not self.backing_off:
+                history.append(seconds)
+            self._outcomes.append(True)
+            self._tick()
+
+    def baseline(self, step: str) -> float:
+        """Typical latency of step: median of its recent healthy waits."""
+        history = self._history.get(step)
+        if not history:
+            return self.min_baseline
+        return max(statistics.median(history), self.min_baseline)
+
+    @property
+    def backing_off(self) -> bool:
+        """Whether the delay is above its minimum (the server was congested)."""
+        return self.delay > self.min_delay
+
+    def observe_error(self) -> None:
+        """Record a timed-out wait of a required step."""
+        with self._lock:
+            self._outcomes.append(False)
+            self._tick()
+
+    def pace(self) -> float:
+        """
+        Sleep so consecutive calls are at least `delay` seconds apart.
+
+        Returns:
+            float: Seconds slept
+        """
+        now = time.monotonic()
+        wait = 0.0
+        if self._last_pace is not None:
+            wait = max(self._last_pace + self.delay - now, 0.0)
+        if wait:
+            time.sleep(wait)
+        self._last_pace = time.monotonic()
+        return wait
+
+    def congested(self) -> bool:
+        """Whether the current window shows server distress."""
+        if not self._outcomes:
+            return False
+        error_rate = self._outcomes.count(False) / len(self._outcomes)
+        if error_rate > self.error_threshold:
+            return True
+        return bool(self._ratios) and (
+            statistics.median(self._ratios) > self.latency_factor
+        )
+
+    def _tick(self) -> None:
+        self._pending += 1
+        if self._pending < self.window:
+            return
+        self._pending = 0
+
+        previous = (self.delay, self.tabs)
+        if self.congested():
+            self.delay = min(
+                max(self.delay * self.backoff_factor, self.backoff_floor),
+                self.max_delay,
+            )
+            self.tabs = max(self.tabs // 2, self.min_tabs)
+        elif self.delay > self.min_delay:
+            self.delay = max(self.delay - self.additive_step, self.min_delay)
+        elif self.tabs < self.max_tabs:
+            self.tabs += 1
+
+        if (self.delay, self.tabs) != previous:
+            self.logger.info(
+                f"Pacing adjusted: delay {previous[0]:.2f}s -> {self.delay:.2f}s, "
+                f"tabs {previous[1]} -> {self.tabs}"
+            )
+            if self.metrics:
+                self.metrics.increment("pacing_adjustments")
+                self.metrics.add_sample(
+                    "pacing",
+                    {
+                        "time": round(time.time(), 3),
+                        "delay": self.delay,
+                        "tabs": self.tabs,
+                    },
+                )
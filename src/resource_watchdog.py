@@ -0,0 +1,106 @@
+import time
+import tracemalloc
+from typing import Iterable, Optional
+from chrome_lifecycle import process_memory
+from driver_factory import execute_cdp
+from logger_config import get_logger
+from metrics import RunMetrics
+
+MB = 1024 * 1024
+
+
+def _mb(value: Optional[int]) -> Optional[float]:
+    return None if value is None else round(value / MB, 1)
+
+
+class ResourceWatchdog:
+    """
+    Sample memory use during long crawls and decide when to recycle the driver.
+
+    Every interval seconds (checked between patients, so no sample ever
+    races a WebDriver command) it records the memory of Chrome's processes,
+    of chromedriver, the page's JS heap (via CDP) and the Python heap (via
+    tracemalloc) as a "resources" sample in the run metrics. When Chrome or
+    the JS heap grows past its limit, `check()` returns the reason and the
+    scraper replaces the session before the next patient. Python memory is
+    only reported: a new browser would not reduce it.
+    """
+
+    def __init__(
+        self,
+        interval: float = 60.0,
+        max_browser_mb: float = 2048,
+        max_js_heap_mb: float = 512,
+        metrics: Optional[RunMetrics] = None,
+    ):
+        self.interval = interval
+        self.max_browser_mb = max_browser_mb
+        self.max_js_heap_mb = max_js_heap_mb
+        self.metrics = metrics
+        self.last_sample: Optional[float] = None
+        self.logger = get_logger()
+
+    def start(self) -> None:
+        """Start tracing Python allocations (one frame, to keep overhead low)."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(1)
+        self.last_sample = time.monotonic()
+
+    def due(self) -> bool:
+        # Allocation tracing slows Python down, so it only starts with a
+        # watchdog that actually samples
+        if self.interval <= 0:
+            return False
+        if self.last_sample is None:
+            self.start()
+        return time.monotonic() - self.last_sample >= self.interval
+
+    def sample(
+        self, driver, browser_pids: Iterable[int], driver_pid: Optional[int] = None
+    ) -> dict:
+        """Measure memory use now and record it in the run metrics."""
+        self.last_sample = time.monotonic()
+
+        browser = [process_memory(pid) for pid in browser_pids]
+        browser = [size for size in browser if size is not None]
+        js_heap = None
+        try:
+            js_heap = execute_cdp(driver, "Runtime.getHeapUsage")["usedSize"]
+        except Exception as e:
+            self.logger.debug(f"Could not read JS heap usage: {e}")
+        python_heap = python_peak = None
+        if tracemalloc.is_tracing():
+            python_heap, python_peak = tracemalloc.get_traced_memory()
+
+        sample = {
+            "time": round(time.time(), 3),
+            "browser_mb": _mb(sum(browser)) if browser else None,
+            "browser_processes": len(browser),
+            "chromedriver_mb": _mb(process_memory(driver_pid)) if driver_pid else None,
+            "js_heap_mb": _mb(js_heap),
+            "python_heap_mb": _mb(python_heap),
+            "python_peak_mb": _mb(python_peak),
+        }
+        if self.metrics:
+            self.metrics.add_sample("resources", sample)
+        self.logger.debug(f"Resource sample: {sample}")
+        return sample
+
+    def check(
+        self, driver, browser_pids: Iterable[int], driver_pid: Optional[int] = None
+    ) -> Optional[str]:
+        """
+        Sample if the interval has passed and compare against the limits.
+
+        Returns:
+            str: Why the driver should be recycled, or None
+        """
+        if not self.due():
+            return None
+
+        sample = self.sample(driver, browser_pids, driver_pid)
+        if sample["browser_mb"] and sample["browser_mb"] > self.max_browser_mb:
+            return f"Chrome uses {sample['browser_mb']} MB"
+        if sample["js_heap_mb"] and sample["js_heap_mb"] > self.max_js_heap_mb:
+            return f"JS heap is {sample['js_heap_mb']} MB"
+        return None
@@ -0,0 +1,220 @@
+import random
+import time
+from typing import Callable, Optional, Sequence, Tuple, Type
+from selenium.common.exceptions import (
+    ElementClickInterceptedException,
+    ElementNotInteractableException,
+    InvalidSessionIdException,
+    NoSuchElementException,
+    NoSuchWindowException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
+from logger_config import get_logger
+
+# Transient page states: the element is not there / not ready *yet*.
+# Timeouts are not retried: the wait already spent its whole budget.
+RETRYABLE_EXCEPTIONS: Tuple[Type[BaseException], ...] = (
+    StaleElementReferenceException,
+    ElementClickInterceptedException,
+    ElementNotInteractableException,
+    NoSuchElementException,
+)
+
+# The browser session itself is gone; only a full session reset helps
+SESSION_EXCEPTIONS: Tuple[Type[BaseException], ...] = (
+    InvalidSessionIdException,
+    NoSuchWindowException,
+)
+
+SESSION_ERROR_MARKERS = (
+    "invalid session id",
+    "disconnected",
+    "chrome not reachable",
+    "session deleted",
+    "target window already closed",
+)
+
+
+class DeadlineExceeded(TimeoutException):
+    """Raised when the time budget of an operation has been used up."""
+
+
+class SessionResetError(RuntimeError):
+    """Raised when a broken browser session could not be replaced."""
+
+
+def is_session_error(exc: BaseException) -> bool:
+    """True when exc means the browser session is dead."""
+    if isinstance(exc, SESSION_EXCEPTIONS):
+        return True
+    if isinstance(exc, WebDriverException):
+        message = (exc.msg or "").lower()
+        return any(marker in message for marker in SESSION_ERROR_MARKERS)
+    return False
+
+
+class Deadline:
+    """A point in time after which an operation should give up."""
+
+    def __init__(self, seconds: Optional[float]):
+        self.seconds = seconds
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        if self.expires_at is None:
+            return float("inf")
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def cap(self, timeout: float) -> float:
+        """Shorten timeout so it never runs past the deadline."""
+        return min(timeout, self.remaining())
+
+    def within(self, reserve: float) -> "Deadline":
+        """A deadline that expires reserve seconds before this one."""
+        inner = Deadline(None)
+        if self.expires_at is not None:
+            inner.seconds = max(self.seconds - reserve, 0.0)
+            inner.expires_at = self.expires_at - reserve
+        return inner
+
+    def check(self, operation: str = "operation") -> None:
+        if self.expired():
+            raise DeadlineExceeded(f"{operation} exceeded its {self.seconds}s budget")
+
+
+class RetryPolicy:
+    """
+    Retry callables with exponential backoff and full jitter.
+
+    Only exceptions classified as retryable are retried; anything else,
+    including dead-session errors, is raised immediately.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.25,
+        max_delay: float = 4.0,
+        retryable: Tuple[Type[BaseException], ...] = RETRYABLE_EXCEPTIONS,
+    ):
+        self.max_attempts = max(max_attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retryable = retryable
+        self.logger = get_logger()
+
+    def is_retryable(self, exc: BaseException) -> bool:
+        if isinstance(exc, DeadlineExceeded) or is_session_error(exc):
+            return False
+        return isinstance(exc, self.retryable)
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number attempt (1-based)."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+    def call(
+        self,
+        func: Callable,
+        *args,
+        deadline: Optional[Deadline] = None,
+        description: str = "operation",
+        **kwargs,
+    ):
+        """
+        Call func until it succeeds, attempts run out or the deadline passes.
+
+        Raises:
+            The last exception raised by func, or DeadlineExceeded
+        """
+        deadline = deadline or Deadline(None)
+
+        for attempt in range(1, self.max_attempts + 1):
+            deadline.check(description)
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if attempt == self.max_attempts or not self.is_retryable(e):
+                    raise
+                delay = deadline.cap(self.backoff(attempt))
+                self.logger.debug(
+                    f"{description} failed ({type(e).__name__}), "
+                    f"retry {attempt}/{self.max_attempts - 1} in {delay:.2f}s"
+                )
+                time.sleep(delay)
+
+    def first_success(
+        self,
+        strategies: Sequence[Tuple[str, Callable[[], bool]]],
+        deadline: Optional[Deadline] = None,
+        retry_each: bool = True,
+    ) -> Optional[str]:
+        """
+        Try fallback strategies in order, each with this policy's retries.
+
+        Args:
+            strategies: (name, callable) pairs; a callable succeeds by
+                returning a truthy value without raising
+            deadline: Shared budget for all strategies
+            retry_each: False for strategies that are not idempotent (e.g.
+                browser back), which then get a single attempt each
+
+        Returns:
+            str: Name of the strategy that succeeded, or None
+        """
+        deadline = deadline or Deadline(None)
+
+        for name, strategy in strategies:
+            if deadline.expired():
+                self.logger.warning(f"Deadline reached before trying '{name}'")
+                return None
+            try:
+                if retry_each:
+                    succeeded = self.call(strategy, deadline=deadline, description=name)
+                else:
+                    succeeded = strategy()
+                if succeeded:
+                    return name
+            except Exception as e:
+                if is_session_error(e):
+                    raise
+                self.logger.warning(f"Strategy '{name}' failed: {e}")
+
+        return None
+
+
+class CircuitBreaker:
+    """
+    Count consecutive failures and trip after a threshold.
+
+    The scraper treats a tripped breaker as a sign that the browser session
+    is wedged and rebuilds it, instead of failing patient after patient.
+    """
+
+    def __init__(self, failure_threshold: int = 3):
+        self.failure_threshold = failure_threshold
+        self.consecutive_failures = 0
+        self.trips = 0
+
+    @property
+    def tripped(self) -> bool:
+        return self.consecutive_failures >= self.failure_threshold
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+
+    def record_failure(self) -> bool:
+        """Record a failure. Returns True when this failure trips the breaker."""
+        self.consecutive_failures += 1
+        if self.consecutive_failures == self.failure_threshold:
+            self.trips += 1
+            return True
+        return False
+
+    def reset(self) -> None:
+        self.consecutive_failures = 0
@@ -0,0 +1,166 @@
+import json
+import os
+import tempfile
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+from history_store import VOLATILE_FIELDS, record_hash, record_key
+from logger_config import get_logger
+from normalizer import default_normalizer
+from utils import iter_json_array
+
+DEFAULT_BUCKETS = 64
+
+Entry = Tuple[str, str, dict]
+
+
+def changes_filename(current: str) -> str:
+    """changes_<run>.ndjson next to the current run file."""
+    base = os.path.basename(current)
+    if base.startswith("patient_data_"):
+        base = base[len("patient_data_") :]
+    name = f"changes_{os.path.splitext(base)[0]}.ndjson"
+    return os.path.join(os.path.dirname(current), name)
+
+
+def changed_fields(previous: dict, current: dict) -> List[str]:
+    """Names of the fields whose value differs (volatile fields ignored)."""
+    return sorted(
+        field
+        for field in set(previous) | set(current)
+        if field not in VOLATILE_FIELDS and previous.get(field) != current.get(field)
+    )
+
+
+def _partition(filename: str, directory: str, tag: str, buckets: int) -> int:
+    """
+    Spread the records of a run file over bucket files by key hash.
+
+    Records of the same patient land in the same bucket in both runs, so
+    the runs can be compared one bucket at a time.
+
+    Returns:
+        int: Number of records
+    """
+    normalizer = default_normalizer()
+    files = [
+        open(os.path.join(directory, f"{tag}_{i:03d}.ndjson"), "w", encoding="utf-8")
+        for i in range(buckets)
+    ]
+    count = 0
+    try:
+        for record in iter_json_array(filename):
+            record = normalizer.normalize_record(record)
+            content_hash = record_hash(record)
+            key = record_key(record, content_hash)
+            bucket = zlib.crc32(key.encode("utf-8")) % buckets
+            files[bucket].write(
+                json.dumps([key, content_hash, record], ensure_ascii=False) + "\n"
+            )
+            count += 1
+    finally:
+        for f in files:
+            f.close()
+    return count
+
+
+def _read_bucket(directory: str, tag: str, bucket: int) -> Iterator[Entry]:
+    with open(
+        os.path.join(directory, f"{tag}_{bucket:03d}.ndjson"), encoding="utf-8"
+    ) as f:
+        for line in f:
+            key, content_hash, record = json.loads(line)
+            yield key, content_hash, record
+
+
+def diff_runs(
+    previous: str,
+    current: str,
+    output: Optional[str] = None,
+    buckets: int = DEFAULT_BUCKETS,
+) -> Dict:
+    """
+    Compare two run files and write what changed as NDJSON.
+
+    Both files are streamed into hash buckets on disk and compared bucket by
+    bucket, so memory holds one bucket of the previous run rather than
+    either file. Each output line is one patient, keyed by patient_id (see
+    `history_store.record_key`):
+
+        {"change": "added", "key": "9f2c...", "record": {...}}
+        {"change": "changed", "key": "41ab...", "fields": ["date_hour", ...], "record": {...}}
+        {"change": "removed", "key": "07de..."}
+
+    Lines are grouped by bucket, not sorted. Unchanged patients are not
+    written; records are cleaned first, so formatting fixes between runs
+    do not show up as changes, and run-level and list position fields
+    (VOLATILE_FIELDS) are left out, so neither does a patient who moved in
+    the list.
+
+    Args:
+        previous: Previous patient_data_*.json file
+        current: Current patient_data_*.json file
+        output: NDJSON path (default: changes_<run>.ndjson next to current)
+        buckets: Number of hash buckets; raise it for very large runs
+
+    Returns:
+        dict: Summary with the change counts and file names
+    """
+    output = output or changes_filename(current)
+    summary = {
+        "previous": previous,
+        "current": current,
+        "changes_file": output,
+        "previous_records": 0,
+        "current_records": 0,
+        "added": 0,
+        "changed": 0,
+        "removed": 0,
+        "unchanged": 0,
+        "new_consultations": 0,
+    }
+
+    with tempfile.TemporaryDirectory(prefix="run_diff_") as directory:
+        summary["previous_records"] = _partition(previous, directory, "old", buckets)
+        summary["current_records"] = _partition(current, directory, "new", buckets)
+
+        with open(output, "w", encoding="utf-8") as out:
+
+            def emit(change: dict) -> None:
+                summary[change["change"]] += 1
+                out.write(json.dumps(change, ensure_ascii=False) + "\n")
+
+            for bucket in range(buckets):
+                old = {
+                    key: (content_hash, record)
+                    for key, content_hash, record in _read_bucket(
+                        directory, "old", bucket
+                    )
+                }
+                for key, content_hash, record in _read_bucket(directory, "new", bucket):
+                    before = old.pop(key, None)
+                    if before is None:
+                        emit({"change": "added", "key": key, "record": record})
+                    elif before[0] != content_hash:
+                        fields = changed_fields(before[1], record)
+                        if "date_hour" in fields:
+                            summary["new_consultations"] += 1
+                        emit(
+                            {
+                                "change": "changed",
+                                "key": key,
+                                "fields": fields,
+                                "record": record,
+                            }
+                        )
+                    else:
+                        summary["unchanged"] += 1
+                for key in old:
+                    emit({"change": "removed", "key": key})
+
+    get_logger().info(
+        f"Diff {previous} -> {current}: {summary['added']} added, "
+        f"{summary['changed']} changed ({summary['new_consultations']} with a new "
+        f"consultation), {summary['removed']} removed, "
+        f"{summary['unchanged']} unchanged"
+    )
+    return summary
@@ -4,8 +4,36 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from selenium.webdriver.chrome.options import Options
-from typing import Optional
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import queue
+import threading
+import time
+from adaptive_timeouts import AdaptiveTimeouts
+from budget import PatientKey, RunBudget, order_patients, patient_id
+from chrome_lifecycle import ChromeLifecycle, ensure_profile_template
+from diagnostics import Diagnostics
+from driver_factory import DriverFactory, PooledSession, build_chrome_options
 from logger_config import get_logger
+from metrics import RunMetrics
+from pacing import RateGovernor
+from resource_watchdog import ResourceWatchdog
+from session_clone import (
+    AuthState,
+    apply_auth_state,
+    capture_auth_state,
+    same_site,
+)
+from tab_prefetch import TabPrefetcher
+from webdriver_trace import TraceRecorder
+from retry_policy import (
+    CircuitBreaker,
+    Deadline,
+    DeadlineExceeded,
+    RetryPolicy,
+    SessionResetError,
+    is_session_error,
+)
 
 
 class Scraper:
@@ -17,10 +45,17 @@ class Scraper:
     TOTAL_PATIENTS_XPATH = (
         '//*[@id="app-patient-search"]/div/div[2]/div/div[3]/div[2]/div/div[1]/div/span'
     )
+    # Rows of the patient list, and the button in a row that opens the
+    # patient; BUTTON_XPATH is that button in the first row
+    PATIENT_ROW_XPATH = '//*[@id="app-patient-search"]/div/div[2]/div/div[4]/div'
+    PATIENT_OPEN_XPATH = "./div/div[4]/div/div/button"
     BUTTON_XPATH = (
         '//*[@id="app-patient-search"]/div/div[2]/div/div[4]/'
         "div[1]/div/div[4]/div/div/button"
     )
+    LOGIN_FIELD_CSS = 'input[placeholder="Login"]'
+    # Sidebar menu only rendered for authenticated users
+    AUTHENTICATED_CSS = "#menu-collapse"
     FILTER_INPUT_XPATH = '//*[@id="filterMode-1"]'
     DATE_HOUR_XPATH = '//*[@id="timeline"]/article/div[2]/div[2]/span/span[1]'
     MEDICAL_CARE_XPATH = (
@@ -29,39 +64,107 @@ class Scraper:
         "inv-cli-timeline/div/section/article/div[2]/div[2]/"
         "span/span[3]"
     )
-
-    def __init__(self, url: str, username: str, password: str, headless: bool = False):
+    # Part of each patient's budget kept for getting back to the patient list
+    RECOVERY_RESERVE = 10
+
+    def __init__(
+        self,
+        url: str,
+        username: str,
+        password: str,
+        headless: bool = False,
+        driver_factory: Optional[DriverFactory] = None,
+        metrics: Optional[RunMetrics] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        patient_timeout: float = 45.0,
+        max_consecutive_failures: int = 3,
+        timeouts: Optional[AdaptiveTimeouts] = None,
+        governor: Optional[RateGovernor] = None,
+        diagnostics: Optional[Diagnostics] = None,
+        trace_recorder: Optional[TraceRecorder] = None,
+        watchdog: Optional[ResourceWatchdog] = None,
+    ):
         self.url = url
         self.username = username
         self.password = password
         self.driver: Optional[webdriver.Chrome] = None
         self.wait: Optional[WebDriverWait] = None
         self.headless = headless
+        self.lifecycle: Optional[ChromeLifecycle] = None
+        self.driver_factory = driver_factory
+        self.session: Optional[PooledSession] = None
+        self.metrics = metrics or RunMetrics()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.patient_timeout = patient_timeout
+        self.breaker = CircuitBreaker(max_consecutive_failures)
+        self.timeouts = timeouts or AdaptiveTimeouts()
+        self.governor = governor or RateGovernor()
+        if self.governor.metrics is None:
+            self.governor.metrics = self.metrics
+        self.diagnostics = diagnostics or Diagnostics(metrics=self.metrics)
+        self.trace_recorder = trace_recorder
+        self.watchdog = watchdog
+        if self.watchdog and self.watchdog.metrics is None:
+            self.watchdog.metrics = self.metrics
         self.logger = get_logger()
+        self.prefetcher = TabPrefetcher(self)
+
+    def _chrome_options(self) -> Options:
+        """Build the Chrome options shared by every driver this scraper starts."""
+        return build_chrome_options(self.headless)
 
     def _setup_driver(self) -> None:
-        """Initialize the Chrome WebDriver with options."""
-        chrome_options = Options()
+        """
+        Initialize the Chrome WebDriver.
+
+        Takes a prestarted session from the driver factory when one was
+        given, otherwise launches chromedriver and Chrome directly.
+        """
+        start = time.perf_counter()
 
-        if self.headless:
-            chrome_options.add_argument("--headless")
+        if self.driver_factory:
+            self.session = self.driver_factory.acquire()
+            self.driver = self.session.driver
+            self.wait = WebDriverWait(self.driver, self.timeouts.timeout("default"))
+        else:
+            self._launch_driver()
 
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--disable-extensions")
-        chrome_options.add_argument("--disable-plugins")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--remote-debugging-port=0")
+        if self.trace_recorder:
+            self.trace_recorder.attach(self.driver)
+        self.metrics.record_timing("driver_startup", time.perf_counter() - start)
+
+    def attach_driver(self, driver) -> None:
+        """
+        Use an existing driver instead of starting Chrome.
+
+        Used to run the scraper against a replayed trace (see
+        webdriver_trace.replay_driver).
+        """
+        self.driver = driver
+        self.wait = WebDriverWait(self.driver, self.timeouts.timeout("default"))
+
+    def _launch_driver(self) -> None:
+        """Start a dedicated chromedriver and Chrome for this scraper."""
+        ChromeLifecycle.reap_orphans()
+
+        chrome_options = self._chrome_options()
+        # A single browser is not worth an extra Chrome launch to build the
+        # template; reuse one only if an earlier run (or a pool) left it
+        template_dir = ensure_profile_template()
+        self.lifecycle = ChromeLifecycle(template_dir=template_dir)
+        profile_dir = self.lifecycle.prepare_profile()
+        chrome_options.add_argument(f"--user-data-dir={profile_dir}")
 
         try:
             self.driver = webdriver.Chrome(options=chrome_options)
-            self.wait = WebDriverWait(self.driver, 10)
+            self.wait = WebDriverWait(self.driver, self.timeouts.timeout("default"))
+            self.lifecycle.register(self.driver)
         except Exception as e:
             self.logger.error(f"Failed to create Chrome driver: {e}")
             self.logger.error(
                 "Make sure Chrome and chromedriver are properly installed"
             )
+            self.lifecycle.terminate()
             raise
 
     def login(self) -> bool:
@@ -78,9 +181,7 @@ class Scraper:
             self.wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
 
             username_field = self.wait.until(
-                EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, 'input[placeholder="Login"]')
-                )
+                EC.presence_of_element_located((By.CSS_SELECTOR, self.LOGIN_FIELD_CSS))
             )
             username_field.clear()
             username_field.send_keys(self.username)
@@ -105,16 +206,124 @@ class Scraper:
 
         except TimeoutException:
             self.logger.error("Timeout waiting for login elements")
+            self.capture_failure("login_timeout")
             return False
         except NoSuchElementException as e:
             self.logger.error(f"Could not find login element: {e}")
+            self.capture_failure("login_element_missing")
             return False
         except Exception as e:
             self.logger.error(f"Login error: {e}")
+            self.capture_failure("login_error")
             return False
 
         return True
 
+    def export_auth_state(self) -> Optional[AuthState]:
+        """
+        Capture cookies and web storage of the logged-in session.
+
+        Returns:
+            AuthState: State to hand to `login_with_auth_state`, or None
+        """
+        try:
+            return capture_auth_state(self.driver)
+        except Exception as e:
+            self.logger.error(f"Could not capture session state: {e}")
+            return None
+
+    def login_with_auth_state(self, state: AuthState) -> bool:
+        """
+        Reuse another scraper's login instead of submitting the login form.
+
+        The cloned session is checked with `probe_authenticated` before it is
+        used, so a rejected clone is reported here rather than failing later
+        in the middle of extraction.
+
+        Returns:
+            bool: True if this scraper is now authenticated
+        """
+        if not same_site(state.url, self.url):
+            self.logger.error(f"Session state for {state.origin} does not match URL")
+            return False
+
+        start = time.perf_counter()
+        try:
+            if not self.driver:
+                self._setup_driver()
+            apply_auth_state(self.driver, state)
+            authenticated = self.probe_authenticated()
+        except Exception as e:
+            self.logger.error(f"Error applying session state: {e}")
+            authenticated = False
+
+        self.metrics.record_timing("auth_clone", time.perf_counter() - start)
+        if authenticated:
+            self.metrics.increment("auth_clones")
+            self.logger.info("Reused existing login session")
+        else:
+            self.metrics.increment("auth_clone_failures")
+            self.logger.warning("Cloned session is not authenticated")
+        return authenticated
+
+    def probe_authenticated(self, timeout: Optional[float] = None) -> bool:
+        """
+        Cheap check that the current page belongs to a logged-in session.
+
+        Waits until either the authenticated menu or the login form renders
+        (whichever comes first) without navigating anywhere.
+        """
+        timeout = timeout or self.timeouts.timeout("page_ready")
+        try:
+            element = WebDriverWait(
+                self.driver, timeout, poll_frequency=self.poll_interval
+            ).until(
+                EC.any_of(
+                    EC.presence_of_element_located(
+                        (By.CSS_SELECTOR, self.AUTHENTICATED_CSS)
+                    ),
+                    EC.presence_of_element_located(
+                        (By.CSS_SELECTOR, self.LOGIN_FIELD_CSS)
+                    ),
+                )
+            )
+        except TimeoutException:
+            return False
+        return element.get_attribute("placeholder") != "Login"
+
+    def clone(self) -> Optional["Scraper"]:
+        """
+        Start another scraper that shares this scraper's login.
+
+        The clone gets its own browser (from the driver factory when there is
+        one) but no login of its own, so N parallel crawls cost one login.
+
+        Returns:
+            Scraper: Authenticated clone, or None if cloning failed
+        """
+        state = self.export_auth_state()
+        if state is None:
+            return None
+
+        clone = Scraper(
+            url=self.url,
+            username=self.username,
+            password=self.password,
+            headless=self.headless,
+            driver_factory=self.driver_factory,
+            metrics=self.metrics,
+            retry_policy=self.retry_policy,
+            patient_timeout=self.patient_timeout,
+            max_consecutive_failures=self.breaker.failure_threshold,
+            timeouts=self.timeouts,
+            governor=self.governor,
+        )
+        if clone.login_with_auth_state(state):
+            return clone
+
+        clone.close()
+        return None
+
     def scrape_data(self, css_selector: str = None, xpath: str = None) -> list:
         """
         Scrape data from the current page using CSS selector or XPath.
@@ -157,41 +366,54 @@ class Scraper:
             self.logger.error(f"Error navigating to {url}: {e}")
             return False
 
-    def click_element(self, css_selector: str = None, xpath: str = None) -> bool:
-        """Click an element by CSS selector or XPath."""
-        try:
-            if css_selector:
-                element = self.wait.until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, css_selector))
-                )
-            elif xpath:
-                element = self.wait.until(EC.element_to_be_clickable((By.XPATH, xpath)))
-            else:
-                self.logger.error("Please provide either css_selector or xpath")
-                return False
+    def click_element(
+        self,
+        css_selector: str = None,
+        xpath: str = None,
+        deadline: Optional[Deadline] = None,
+        step: str = "default",
+    ) -> bool:
+        """
+        Click an element by CSS selector or XPath.
+
+        The native click is retried with backoff before falling back to a
+        JavaScript click; both share the optional deadline. step names the
+        adaptive timeout used while waiting for the element.
+        """
+        if css_selector:
+            locator = (By.CSS_SELECTOR, css_selector)
+        elif xpath:
+            locator = (By.XPATH, xpath)
+        else:
+            self.logger.error("Please provide either css_selector or xpath")
+            return False
 
+        def native_click():
+            element = self._until(step, EC.element_to_be_clickable(locator), deadline)
             element.click()
-            self.wait.until(
-                lambda driver: driver.execute_script("return document.readyState")
-                == "complete"
-            )
+            self._wait_for_page_ready(deadline)
             return True
 
+        def javascript_click():
+            element = self.driver.find_element(*locator)
+            self.driver.execute_script("arguments[0].click();", element)
+            return True
+
+        try:
+            strategy = self.retry_policy.first_success(
+                [("click", native_click), ("javascript click", javascript_click)],
+                deadline,
+            )
         except Exception as e:
-            self.logger.warning(f"Error clicking element: {e}, trying with javascript")
-            try:
-                if css_selector:
-                    element = self.driver.find_element(By.CSS_SELECTOR, css_selector)
-                elif xpath:
-                    element = self.driver.find_element(By.XPATH, xpath)
-                else:
-                    self.logger.error("Please provide either css_selector or xpath")
-                    return False
-                self.driver.execute_script("arguments[0].click();", element)
-                return True
-            except Exception as e2:
-                self.logger.error(f"Error clicking element with javascript: {e2}")
-                return False
+            if is_session_error(e):
+                raise
+            self.logger.error(f"Error clicking element: {e}")
+            return False
+
+        if strategy is None:
+            self.logger.error(f"Could not click element {locator[1]}")
+            return False
+        return True
 
     def fill_form_field(
         self, value: str, css_selector: str = None, xpath: str = None
@@ -259,45 +481,62 @@ class Scraper:
             self.logger.error(f"Error taking screenshot: {e}")
             return False
 
+    def capture_failure(self, reason: str) -> Optional[str]:
+        """Save a screenshot, DOM fragment and recent step events in the background."""
+        return self.diagnostics.capture(self.driver, reason)
+
     def close(self) -> None:
         """Close the browser and clean up resources."""
+        if self.session:
+            # Pooled sessions are reset and handed back instead of quit
+            self.driver_factory.release(self.session)
+            self.session = None
+            self.driver = None
+
         if self.driver:
-            self.driver.quit()
-            self.logger.info("Browser closed successfully")
+            try:
+                self.driver.quit()
+                self.logger.info("Browser closed successfully")
+            except Exception as e:
+                self.logger.warning(f"Error closing browser: {e}")
+            self.driver = None
+
+        if self.lifecycle:
+            # Only this scraper's own Chrome/chromedriver processes are touched
+            self.lifecycle.terminate()
+            self.lifecycle = None
+
+        self.metrics.set_value("step_timeouts", self.timeouts.snapshot())
+        self.metrics.set_value("pacing_delay", self.governor.delay)
+        self.metrics.set_value("pacing_tabs", self.governor.tabs)
+        self.timeouts.save()
+        self.diagnostics.close()
 
     @staticmethod
     def cleanup_chrome_processes():
-        """Kill any lingering Chrome processes that might be causing conflicts."""
-        import subprocess
+        """
+        Kill Chrome processes left behind by scrapers whose process died.
 
+        Browsers owned by running scrapers (or anything else on the host)
+        are never touched.
+        """
         logger = get_logger()
 
         try:
-            # Kill Chrome processes
-            subprocess.run(["pkill", "-f", "chrome"], check=False)
-            subprocess.run(["pkill", "-f", "chromium"], check=False)
-            logger.info("Chrome processes cleaned up")
+            reaped = ChromeLifecycle.reap_orphans()
+            logger.info(f"Chrome processes cleaned up ({reaped} orphaned profiles)")
         except Exception as e:
             logger.error(f"Error cleaning up Chrome processes: {e}")
 
     @staticmethod
     def cleanup_temp_dirs():
-        """Clean up temporary Chrome directories."""
-        import tempfile
-        import os
-        import shutil
-        import glob
-
-        logger = get_logger()
-        temp_dir = tempfile.gettempdir()
-        chrome_dirs = glob.glob(os.path.join(temp_dir, "chrome_selenium_*"))
+        """
+        Clean up temporary Chrome profile directories of dead scrapers.
 
-        for dir_path in chrome_dirs:
-            try:
-                shutil.rmtree(dir_path)
-                logger.info(f"Cleaned up: {dir_path}")
-            except Exception as e:
-                logger.warning(f"Could not clean up {dir_path}: {e}")
+        Profiles are reaped together with their processes, see
+        `cleanup_chrome_processes`.
+        """
+        Scraper.cleanup_chrome_processes()
 
     def __enter__(self):
         """Context manager entry."""
@@ -329,15 +568,15 @@ class Scraper:
                 return []
 
             try:
-                wait = WebDriverWait(self.driver, 15)
-                total_patients_element = wait.until(
+                total_patients_element = self._until(
+                    "total_patients",
                     EC.presence_of_element_located(
                         (
                             By.XPATH,
                             '//*[@id="app-patient-search"]/div/div[2]/div/div[3]'
                             "/div[2]/div/div[1]/div/span",
                         )
-                    )
+                    ),
                 )
                 total_patients_text = total_patients_element.text
                 self.logger.info(f"Total patients found: {total_patients_text}")
@@ -358,6 +597,11 @@ class Scraper:
                 == "complete"
             )
 
+            # BUTTON_XPATH opens the first row; its text identifies the
+            # patient across runs, like in iter_patients
+            rows = self.get_patient_elements_on_page()
+            key = patient_id(rows[0].text) if rows else None
+
             button = self.wait.until(
                 EC.element_to_be_clickable(
                     (
@@ -374,42 +618,9 @@ class Scraper:
             )
             filter_input.click()
 
-            self.wait.until(
-                lambda driver: driver.execute_script("return document.readyState")
-                == "complete"
-            )
-
-            try:
-                date_hour_element = self.wait.until(
-                    EC.presence_of_element_located(
-                        (
-                            By.XPATH,
-                            '//*[@id="timeline"]/article/div[2]/div[2]/span/span[1]',
-                        )
-                    )
-                )
-                date_hour = date_hour_element.text
-            except TimeoutException:
-                date_hour = "Not found"
-                self.logger.warning("Date/Hour element not found")
+            self._wait_for_page_ready()
 
-            try:
-                medical_care_element = self.wait.until(
-                    EC.presence_of_element_located(
-                        (
-                            By.XPATH,
-                            "/html/body/app-root/app-layout/div/section/app-ehra/div/"
-                            "div[4]/as-split/as-split-area/div/app-summary/div/div/"
-                            "inv-cli-timeline/div/section/article/div[2]/div[2]/"
-                            "span/span[3]",
-                        )
-                    )
-                )
-                medical_care = medical_care_element.text
-                self.logger.debug(f"Medical Care: {medical_care}")
-            except TimeoutException:
-                medical_care = "Not found"
-                self.logger.warning("Medical care element not found")
+            date_hour, medical_care = self._extract_timeline_fields()
 
             # Store the extracted data
             patient_record = {
@@ -418,29 +629,63 @@ class Scraper:
                 "medical_care": medical_care,
                 "extraction_timestamp": self._get_current_timestamp(),
             }
+            if key:
+                patient_record["patient_id"] = key
 
             patient_data.append(patient_record)
 
         except TimeoutException as e:
             self.logger.error(f"Timeout while extracting patient data: {e}")
+            self.capture_failure("extract_patient_timeout")
         except Exception as e:
             self.logger.error(f"Error extracting patient data: {e}")
+            self.capture_failure("extract_patient_error")
 
         return patient_data
 
-    def extract_all_patients_data(self) -> list:
+    def extract_all_patients_data(
+        self,
+        budget: Optional[RunBudget] = None,
+        priorities: Optional[Dict[PatientKey, str]] = None,
+    ) -> list:
         """
         Extract data for all patients by iterating through pages and patients.
         Implements pagination to get all available patient data.
 
-        FIXME not yet useful
+        Collects everything `iter_patients` yields; use that directly to
+        process records while the crawl is still running.
+        """
+        return list(self.iter_patients(budget, priorities))
 
+    def iter_patients(
+        self,
+        budget: Optional[RunBudget] = None,
+        priorities: Optional[Dict[PatientKey, str]] = None,
+    ) -> Iterator[dict]:
+        """
+        Yield each patient's record as soon as it has been extracted.
+
+        Pagination state lives in the generator, so the caller can store or
+        forward records while the browser keeps going, and memory does not
+        grow with the size of the clinic. Closing the generator early stops
+        the crawl at the current patient.
+
+        Args:
+            budget: Stop starting new patients when it runs out or a stop is
+                requested
+            priorities: Previous run's dates per patient (see
+                `budget.load_priorities`); all pages are then listed first
+                and the patients visited new first, then most recently
+                active first, wherever they are in the list
+
+        Yields:
+            dict: Patient record
         """
         if not self.driver:
             self.logger.error("Driver not initialized. Please login first.")
-            return []
+            return
 
-        all_patient_data = []
+        extracted = 0
         current_page = 1
         max_pages = 100  # Safety limit to prevent infinite loops
 
@@ -454,71 +699,157 @@ class Scraper:
 
             if not self.navigate_to_patient_search():
                 self.logger.error("Failed to navigate to patient search page")
-                return []
+                return
 
             total_patients = self.get_total_patients_count()
             self.logger.info(f"Total patients available: {total_patients}")
 
+            plan = None
+            if priorities:
+                plan, current_page = self._plan_visits(priorities, max_pages)
+                self.logger.info(f"Visiting {len(plan)} patients by priority")
+
             while current_page <= max_pages:
-                self.logger.info(f"--- Processing page {current_page} ---")
+                if budget and not budget.can_start_patient():
+                    break
 
-                patient_elements = self.get_patient_elements_on_page()
+                if plan is None:
+                    self.logger.info(f"--- Processing page {current_page} ---")
 
-                if not patient_elements:
-                    self.logger.warning(
-                        "No patient elements found on current page, stopping..."
+                    patient_elements = self.get_patient_elements_on_page()
+
+                    if not patient_elements:
+                        self.logger.warning(
+                            "No patient elements found on current page, stopping..."
+                        )
+                        break
+
+                    self.logger.info(
+                        f"Found {len(patient_elements)} patient elements on "
+                        f"page {current_page}"
                     )
-                    break
+                    targets = [
+                        (current_page, i, patient_id(element.text))
+                        for i, element in enumerate(patient_elements)
+                    ]
+                else:
+                    targets = plan
 
-                self.logger.info(
-                    f"Found {len(patient_elements)} patient elements on "
-                    f"page {current_page}"
-                )
+                for position, (page, i, key) in enumerate(targets):
+                    if budget and not budget.can_start_patient():
+                        break
+                    self._recycle_if_bloated(current_page)
 
-                for i in range(len(patient_elements)):
+                    failed = session_lost = False
+                    patient_start = time.perf_counter()
+                    patient_seconds = None
+                    # Hard cap for the patient, including getting back to the list
+                    deadline = Deadline(self.patient_timeout)
                     try:
-                        self.logger.info(
-                            f"Processing patient {i + 1} on page {current_page}"
-                        )
+                        self.logger.info(f"Processing patient {i + 1} on page {page}")
 
-                        current_patient_elements = self.get_patient_elements_on_page()
+                        # Already open in the spare tab when it was prefetched
+                        opened = self.prefetcher.take_patient(page, i, current_page)
+                        patient_element = None
+                        if opened:
+                            current_page = page
+                        else:
+                            current_page = self._go_to_page(
+                                current_page, page, deadline
+                            )
+                            if current_page != page:
+                                raise TimeoutException(f"Could not get to page {page}")
 
-                        if i >= len(current_patient_elements):
-                            self.logger.warning(
-                                f"Patient {i + 1} no longer available, skipping..."
+                            current_patient_elements = (
+                                self.get_patient_elements_on_page()
                             )
-                            continue
+                            row = self._find_patient_row(
+                                current_patient_elements, i, key
+                            )
+                            if row is None:
+                                self.logger.warning(
+                                    f"Patient {i + 1} no longer available, skipping..."
+                                )
+                                continue
+
+                            i = row
+                            patient_element = current_patient_elements[i]
+
+                        self.governor.pace()
+                        if self.prefetcher.enabled():
+                            if not opened:
+                                self._open_patient(
+                                    patient_element, page, i + 1, deadline
+                                )
+                                opened = True
+                            # The next views render while this one is read
+                            upcoming = [(p, j) for p, j, _ in targets[position + 1 :]]
+                            if plan is None:
+                                upcoming.append((current_page + 1, None))
+                            self.prefetcher.prefetch(upcoming)
 
-                        patient_element = current_patient_elements[i]
                         patient_data = self.extract_single_patient_data(
-                            patient_element, current_page, i + 1
+                            patient_element,
+                            page,
+                            i + 1,
+                            deadline=deadline,
+                            opened=opened,
                         )
 
                         if patient_data:
                             patient_data["total_patients"] = total_patients
-                            patient_data["page_number"] = current_page
+                            patient_data["page_number"] = page
                             patient_data["patient_index_on_page"] = i + 1
-                            all_patient_data.append(patient_data)
+                            patient_data["patient_id"] = key
+                            extracted += 1
+                            self.breaker.record_success()
                             self.logger.info(
                                 f"Successfully extracted data for patient {i + 1}"
                             )
+                            # Timed before the hand-over: the consumer's time
+                            # is not part of the patient's cost
+                            patient_seconds = time.perf_counter() - patient_start
+                            yield patient_data
                         else:
+                            # Captured by extract_single_patient_data while
+                            # the failing view was still on screen
                             self.logger.error(
                                 f"Failed to extract data for patient {i + 1}"
                             )
+                            failed = True
 
                     except Exception as e:
                         self.logger.error(
-                            f"Error processing patient {i + 1} on "
-                            f"page {current_page}: {e}"
+                            f"Error processing patient {i + 1} on page {page}: {e}"
                         )
-                        try:
-                            self.navigate_back_to_patient_list()
-                        except Exception:
-                            pass
-                        continue
+                        failed = True
+                        session_lost = is_session_error(e)
+                        if not session_lost:
+                            self.capture_failure(f"patient_p{page}_{i + 1}")
+                            try:
+                                self.navigate_back_to_patient_list(deadline=deadline)
+                            except Exception:
+                                pass
+
+                    if budget:
+                        if patient_seconds is None:
+                            patient_seconds = time.perf_counter() - patient_start
+                        budget.observe_patient(patient_seconds)
+                    # Timeouts already reached the governor from _until
+                    if failed and (session_lost or self.breaker.record_failure()):
+                        if not self.reset_session(current_page):
+                            raise SessionResetError(
+                                "Could not reset the browser session"
+                            )
+
+                # The plan already covers every page
+                if plan is not None or (budget and budget.stopped):
+                    break
 
-                if not self.navigate_to_next_page():
+                if (
+                    not self.prefetcher.take_page(current_page + 1)
+                    and not self.navigate_to_next_page()
+                ):
                     self.logger.info(
                         "No more pages available or failed to navigate to next page"
                     )
@@ -528,21 +859,147 @@ class Scraper:
 
             self.logger.info(
                 f"Extraction completed! Total patient records extracted: "
-                f"{len(all_patient_data)}"
+                f"{extracted}"
             )
             self.logger.info(f"Processed {current_page} pages")
+            if budget and budget.stopped:
+                self.metrics.set_value("stop_reason", budget.stop_reason)
+                self.logger.info(f"Extraction stopped early: {budget.stop_reason}")
 
+        except SessionResetError as e:
+            # Nothing more can be extracted without a working browser
+            self.logger.critical(f"Stopping the extraction: {e}")
+            raise
         except Exception as e:
-            self.logger.error(f"Error in extract_all_patients_data: {e}")
+            self.logger.error(f"Error in iter_patients: {e}")
+
+    def _plan_visits(
+        self, priorities: Dict[PatientKey, str], max_pages: int
+    ) -> Tuple[List[Tuple[int, int, PatientKey]], int]:
+        """
+        Order every patient of the list by priority, across pages.
+
+        Only reads the rows of each list page (no patient is opened), so a
+        new patient on the last page is still visited before the known ones
+        on the first page.
 
-        return all_patient_data
+        Returns:
+            tuple: ((page, index, patient_id) in visiting order, list page
+                the browser was left on)
+        """
+        rows = []
+        page = 1
+        while True:
+            elements = self.get_patient_elements_on_page()
+            rows.extend(
+                (page, i, patient_id(element.text))
+                for i, element in enumerate(elements)
+            )
+            if not elements or page >= max_pages or not self.navigate_to_next_page():
+                break
+            page += 1
+
+        order = order_patients([key for _, _, key in rows], priorities)
+        return [rows[k] for k in order], page
+
+    def _go_to_page(
+        self, current: int, page: int, deadline: Optional[Deadline] = None
+    ) -> int:
+        """Move from list page current to page. Returns the page reached."""
+        if page < current:
+            # The list only pages forward
+            if not self.navigate_to_patient_search(deadline):
+                return current
+            current = 1
+        while current < page and self.navigate_to_next_page():
+            current += 1
+        return current
+
+    def _find_patient_row(
+        self, elements: list, index: int, key: PatientKey
+    ) -> Optional[int]:
+        """Index of the row of patient key, expected at index (None if gone)."""
+        if index < len(elements) and patient_id(elements[index].text) == key:
+            return index
+        # The list changed since it was read
+        for i, element in enumerate(elements):
+            if patient_id(element.text) == key:
+                return i
+        return None
+
+    async def aiter_patients(
+        self,
+        budget: Optional[RunBudget] = None,
+        priorities: Optional[Dict[PatientKey, str]] = None,
+        buffer: int = 10,
+    ) -> AsyncIterator[dict]:
+        """
+        Async version of `iter_patients`.
+
+        The crawl runs on a background thread and may run up to buffer
+        records ahead of the consumer, so awaiting downstream work (uploads,
+        database writes) overlaps with the browser instead of pausing it.
+        Closing the generator early (e.g. `async with aclosing(...)` around a
+        loop that breaks) stops the crawl after the current patient.
+        """
+        records: queue.Queue = queue.Queue(maxsize=max(buffer, 1))
+        stop = threading.Event()
+        done = object()
+        errors = []
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    records.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def get():
+            # Wakes up regularly, so a cancelled consumer never leaves an
+            # executor thread blocked on an empty queue
+            while not stop.is_set():
+                try:
+                    return records.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+            return done
+
+        def crawl():
+            patients = self.iter_patients(budget, priorities)
+            try:
+                for record in patients:
+                    if not put(record):
+                        break
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                patients.close()
+                put(done)
+
+        crawler = threading.Thread(target=crawl, name="patient-crawler", daemon=True)
+        crawler.start()
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                record = await loop.run_in_executor(None, get)
+                if record is done:
+                    break
+                yield record
+        finally:
+            stop.set()
+            await loop.run_in_executor(None, crawler.join)
+
+        if errors:
+            raise errors[0]
 
     def get_total_patients_count(self) -> str:
         """Get the total number of patients from the page."""
         try:
-            wait = WebDriverWait(self.driver, 15)
-            total_patients_element = wait.until(
-                EC.presence_of_element_located((By.XPATH, self.TOTAL_PATIENTS_XPATH))
+            total_patients_element = self._until(
+                "total_patients",
+                EC.presence_of_element_located((By.XPATH, self.TOTAL_PATIENTS_XPATH)),
             )
             total_patients_text = total_patients_element.text
             self.logger.info(f"Total patients found: {total_patients_text}")
@@ -552,74 +1009,60 @@ class Scraper:
             return "Unknown"
 
     def get_patient_elements_on_page(self) -> list:
-        pass  # FIXME not yet implemented
+        """Patient rows of the current list page, in list order."""
+        return self.driver.find_elements(By.XPATH, self.PATIENT_ROW_XPATH)
 
     def get_patient_clickable_elements(self) -> list:
         """
         Get clickable patient elements (not the navigation menu item).
-        These are the actual patient records that can be clicked to view details.
-
-        FIXME
+        These are the buttons of the list rows that open each patient.
         """
-        pass
+        return [
+            row.find_element(By.XPATH, self.PATIENT_OPEN_XPATH)
+            for row in self.get_patient_elements_on_page()
+        ]
 
     def extract_single_patient_data(
-        self, patient_element, page_num: int, patient_num: int
+        self,
+        patient_element,
+        page_num: int,
+        patient_num: int,
+        deadline: Optional[Deadline] = None,
+        opened: bool = False,
     ) -> dict:
         """
         Extract data for a single patient.
         Returns a dictionary with the patient's data or None if extraction fails.
-        """
-        try:
-            self.logger.info(f"Clicking on patient {patient_num} on page {page_num}")
-
-            wait = WebDriverWait(self.driver, 10)
-            wait.until(EC.element_to_be_clickable(patient_element))
-            patient_element.click()
-
-            self._wait_for_page_ready()
 
-            try:
-                # Check if we need to click on patient menu
-                patient_menu = wait.until(
-                    EC.element_to_be_clickable((By.XPATH, self.PATIENT_MENU_XPATH))
-                )
-                patient_menu.click()
-                self._wait_for_page_ready()
-            except TimeoutException:
-                self.logger.debug("Patient menu already active or not found")
+        Every wait is capped by the deadline, so a pathological patient is
+        abandoned once its time budget is used up. The extraction steps stop
+        RECOVERY_RESERVE seconds early, leaving that time to get back to the
+        patient list. A failure is captured (see `capture_failure`) before
+        navigating back. Dead-session errors are re-raised for the caller to
+        reset the session.
 
-            button = wait.until(
-                EC.element_to_be_clickable((By.XPATH, self.BUTTON_XPATH))
-            )
-            button.click()
+        With opened=True the patient was already clicked (e.g. prefetched
+        in another tab) and patient_element is not used.
+        """
+        deadline = deadline or Deadline(None)
+        steps = deadline.within(self.RECOVERY_RESERVE)
 
-            filter_input = wait.until(
-                EC.element_to_be_clickable((By.XPATH, self.FILTER_INPUT_XPATH))
-            )
-            filter_input.click()
+        try:
+            if not opened:
+                self._open_patient(patient_element, page_num, patient_num, steps)
 
-            self._wait_for_page_ready()
+            self._wait_for_page_ready(steps)
 
-            try:
-                date_hour_element = wait.until(
-                    EC.presence_of_element_located((By.XPATH, self.DATE_HOUR_XPATH))
-                )
-                date_hour = date_hour_element.text
-                self.logger.debug(f"Date/Hour: {date_hour}")
-            except TimeoutException:
-                date_hour = "Not found"
-                self.logger.warning("Date/Hour element not found")
+            # Same steps as the single-patient flow once the patient is open
+            # (the patient menu would lead back to the list)
+            steps.check(f"Patient {patient_num}")
+            if not self.click_element(
+                xpath=self.FILTER_INPUT_XPATH, deadline=steps, step="timeline_filter"
+            ):
+                raise TimeoutException("Timeline filter not clickable")
 
-            try:
-                medical_care_element = wait.until(
-                    EC.presence_of_element_located((By.XPATH, self.MEDICAL_CARE_XPATH))
-                )
-                medical_care = medical_care_element.text
-                self.logger.debug(f"Medical Care: {medical_care}")
-            except TimeoutException:
-                medical_care = "Not found"
-                self.logger.warning("Medical care element not found")
+            steps.check(f"Patient {patient_num}")
+            date_hour, medical_care = self._extract_timeline_fields(steps)
 
             patient_record = {
                 "date_hour": date_hour,
@@ -627,27 +1070,43 @@ class Scraper:
                 "extraction_timestamp": self._get_current_timestamp(),
             }
 
-            if not self.navigate_back_to_patient_list():
+            if not self.navigate_back_to_patient_list(deadline=deadline):
                 self.logger.warning("Could not navigate back to patient list")
 
             return patient_record
 
         except Exception as e:
+            if is_session_error(e):
+                raise
             self.logger.error(f"Error extracting data for patient {patient_num}: {e}")
+            # Capture before leaving the page that failed
+            self.capture_failure(f"patient_p{page_num}_{patient_num}")
             try:
-                self.navigate_back_to_patient_list()
-            except Exception:
-                pass
+                self.navigate_back_to_patient_list(deadline=deadline)
+            except Exception as nav_error:
+                if is_session_error(nav_error):
+                    raise
             return None
 
+    def _open_patient(
+        self,
+        patient_element,
+        page_num: int,
+        patient_num: int,
+        deadline: Optional[Deadline] = None,
+    ) -> None:
+        """Click a patient in the list without waiting for the details to load."""
+        self.logger.info(f"Clicking on patient {patient_num} on page {page_num}")
+        button = patient_element.find_element(By.XPATH, self.PATIENT_OPEN_XPATH)
+        self._until("patient_click", EC.element_to_be_clickable(button), deadline)
+        button.click()
+
     def navigate_to_next_page(self) -> bool:
         """
         Navigate to the next page using the pagination button.
         Returns True if successful, False if no next page or navigation failed.
         """
         try:
-            wait = WebDriverWait(self.driver, 10)
-
             # Scroll to make sure pagination is visible
             try:
                 pagination_xpath = (
@@ -657,12 +1116,11 @@ class Scraper:
                 pagination_container = self.driver.find_element(
                     By.XPATH, pagination_xpath
                 )
+                # Instant scroll, so the button is in place before it is clicked
                 self.driver.execute_script(
-                    "arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});",
+                    "arguments[0].scrollIntoView({block: 'center'});",
                     pagination_container,
                 )
-                # Wait a moment for scroll to complete
-                wait.until(lambda driver: True)  # Short wait
             except Exception:
                 self.logger.warning("Could not scroll to pagination, trying anyway...")
 
@@ -678,18 +1136,24 @@ class Scraper:
             ]
 
             next_page_button = None
-            for selector in next_button_selectors:
+            for index, selector in enumerate(next_button_selectors):
                 try:
-                    button = wait.until(
-                        EC.presence_of_element_located((By.XPATH, selector))
-                    )
+                    if index == 0:
+                        button = self._until(
+                            "next_page",
+                            EC.presence_of_element_located((By.XPATH, selector)),
+                        )
+                    else:
+                        # The pagination has rendered by now, so the fallback
+                        # selectors are checked without waiting again
+                        button = self.driver.find_element(By.XPATH, selector)
                     if button.is_displayed() and button.is_enabled():
                         next_page_button = button
                         self.logger.debug(
                             f"Found next page button using selector: {selector}"
                         )
                         break
-                except TimeoutException:
+                except (TimeoutException, NoSuchElementException):
                     continue
                 except Exception as e:
                     self.logger.debug(f"Error with selector {selector}: {e}")
@@ -729,7 +1193,10 @@ class Scraper:
             self._wait_for_page_ready()
 
             # Wait for patient elements to be present on new page
-            wait.until(EC.presence_of_element_located((By.ID, "app-patient-search")))
+            self._until(
+                "patient_list",
+                EC.presence_of_element_located((By.ID, "app-patient-search")),
+            )
 
             self.logger.info("Successfully navigated to next page")
             return True
@@ -743,11 +1210,90 @@ class Scraper:
             self.logger.error(f"Error navigating to next page: {e}")
             return False
 
-    def _wait_for_page_ready(self):
+    def _wait(self, timeout: float, deadline: Optional[Deadline] = None):
+        """WebDriverWait for timeout seconds, shortened to fit the deadline."""
+        if deadline:
+            deadline.check()
+            timeout = deadline.cap(timeout)
+        # Poll finely so observed latencies are not rounded up to 0.5 s
+        return WebDriverWait(self.driver, timeout, poll_frequency=self.poll_interval)
+
+    @property
+    def poll_interval(self) -> float:
+        """Seconds between wait polls; a replayed trace can be polled faster."""
+        return getattr(self.driver.command_executor, "poll_interval", None) or 0.1
+
+    def _until(self, step: str, condition, deadline: Optional[Deadline] = None):
+        """
+        Wait for condition using the adaptive timeout of step.
+
+        The latency of successful waits feeds back into the step's timeout
+        and into the rate governor.
+        """
+        timeout = self.timeouts.timeout(step)
+        wait = self._wait(timeout, deadline)
+        start = time.perf_counter()
+        try:
+            result = wait.until(condition)
+        except TimeoutException:
+            cut_short = deadline is not None and deadline.expired()
+            self.timeouts.observe_timeout(step, None if cut_short else timeout)
+            self.diagnostics.record("timeout", step=step)
+            if step not in self.timeouts.optional_steps:
+                self.governor.observe_error()
+            raise
+        elapsed = time.perf_counter() - start
+        self.diagnostics.record("step", step=step, seconds=round(elapsed, 3))
+        self.timeouts.observe(step, elapsed)
+        self.governor.observe_latency(step, elapsed)
+        return result
+
+    def _optional_text(
+        self, step: str, xpath: str, deadline: Optional[Deadline] = None
+    ) -> Optional[str]:
+        """Text of an optional element, or None once its short timeout expires."""
+        try:
+            element = self._until(
+                step, EC.presence_of_element_located((By.XPATH, xpath)), deadline
+            )
+        except DeadlineExceeded:
+            raise
+        except TimeoutException:
+            return None
+        return element.text
+
+    def _extract_timeline_fields(self, deadline: Optional[Deadline] = None) -> tuple:
+        """
+        Read date_hour and medical_care from the patient timeline.
+
+        Each field gets its own wait, so a missing date does not cut the
+        wait for the medical care text short.
+        """
+        date_hour = self._optional_text("date_hour", self.DATE_HOUR_XPATH, deadline)
+        if date_hour is None:
+            date_hour = "Not found"
+            self.logger.warning("Date/Hour element not found")
+        else:
+            self.logger.debug(f"Date/Hour: {date_hour}")
+        medical_care = self._optional_text(
+            "medical_care", self.MEDICAL_CARE_XPATH, deadline
+        )
+
+        if medical_care is None:
+            medical_care = "Not found"
+            self.logger.warning("Medical care element not found")
+        else:
+            self.logger.debug(f"Medical Care: {medical_care}")
+
+        return date_hour, medical_care
+
+    def _wait_for_page_ready(self, deadline: Optional[Deadline] = None):
         """Helper method to wait for page to be completely loaded."""
-        return self.wait.until(
+        return self._until(
+            "page_ready",
             lambda driver: driver.execute_script("return document.readyState")
-            == "complete"
+            == "complete",
+            deadline,
         )
 
     def _get_current_timestamp(self) -> str:
@@ -756,19 +1302,26 @@ class Scraper:
 
         return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    def wait_for_spa_load(self, timeout=15):
-        """Wait for Single Page Application to fully load after login."""
+    def wait_for_spa_load(self, timeout=None):
+        """
+        Wait for Single Page Application to fully load after login.
+
+        timeout defaults to the adaptive "spa_load" timeout.
+        """
         self.logger.info("Waiting for SPA to load...")
 
         try:
-            wait = WebDriverWait(self.driver, timeout)
+            timeout = timeout or self.timeouts.timeout("spa_load")
+            wait = self._wait(timeout)
+            start = time.perf_counter()
 
             wait.until(EC.presence_of_element_located((By.TAG_NAME, "app-root")))
             self.logger.debug("App root found!")
 
             wait.until(EC.visibility_of_element_located((By.TAG_NAME, "app-root")))
-
-            self.take_screenshot("spa_loading_debug.png")
+            elapsed = time.perf_counter() - start
+            self.timeouts.observe("spa_load", elapsed)
+            self.diagnostics.record("step", step="spa_load", seconds=round(elapsed, 3))
 
             try:
                 wait.until_not(
@@ -788,18 +1341,21 @@ class Scraper:
             return True
 
         except TimeoutException:
+            self.timeouts.observe_timeout("spa_load", timeout)
             self.logger.error("App root not found within timeout")
-            self.take_screenshot("spa_loading_debug.png")
+            self.diagnostics.record("timeout", step="spa_load")
+            self.capture_failure("spa_load")
             return False
 
-    def navigate_to_patient_search(self):
+    def navigate_to_patient_search(self, deadline: Optional[Deadline] = None):
         """Navigate to the patient search page if not already there."""
         self.logger.info("Attempting to navigate to patient search...")
 
         try:
-            wait = WebDriverWait(self.driver, 10)
-            menu_collapse = wait.until(
-                EC.presence_of_element_located((By.ID, "menu-collapse"))
+            menu_collapse = self._until(
+                "patient_search",
+                EC.presence_of_element_located((By.ID, "menu-collapse")),
+                deadline,
             )
             self.logger.debug("Found navigation menu")
 
@@ -812,9 +1368,10 @@ class Scraper:
                 patient_menu_link.click()
 
                 try:
-                    wait = WebDriverWait(self.driver, 10)
-                    wait.until(
-                        EC.presence_of_element_located((By.ID, "app-patient-search"))
+                    self._until(
+                        "patient_search",
+                        EC.presence_of_element_located((By.ID, "app-patient-search")),
+                        deadline,
                     )
                     self.logger.info("Successfully navigated to patient search!")
                     return True
@@ -834,55 +1391,114 @@ class Scraper:
             self.logger.error(f"Error navigating to patient search: {e}")
             return False
 
-    def navigate_back_to_patient_list(self) -> bool:
+    def navigate_back_to_patient_list(
+        self, deadline: Optional[Deadline] = None
+    ) -> bool:
         """
         Navigate back to the patient search/list page after extracting patient data.
         Returns True if successful, False otherwise.
+
+        Tries the browser back button, then the patient menu, then a reload,
+        all within the optional deadline.
         """
-        try:
-            wait = WebDriverWait(self.driver, 10)
 
-            try:
-                self.driver.back()
-                self._wait_for_page_ready()
+        def patient_search_present():
+            self._until(
+                "patient_list",
+                EC.presence_of_element_located((By.ID, "app-patient-search")),
+                deadline,
+            )
+            return True
 
-                wait.until(
-                    EC.presence_of_element_located((By.ID, "app-patient-search"))
-                )
-                self.logger.info(
-                    "Successfully navigated back using browser back button"
-                )
-                return True
-            except TimeoutException:
-                self.logger.warning(
-                    "Browser back button didn't work, trying other approaches..."
-                )
+        def browser_back():
+            self.driver.back()
+            self._wait_for_page_ready(deadline)
+            return patient_search_present()
 
-            try:
-                if not self.navigate_to_patient_search():
-                    self.logger.error("Could not navigate to patient search via menu")
-                    return False
-                self.logger.info("Successfully navigated back via patient search menu")
-                return True
-            except Exception as e:
-                self.logger.error(f"Error navigating via menu: {e}")
+        def reload_page():
+            self.driver.get(self.driver.current_url)
+            self._wait_for_page_ready(deadline)
+            return patient_search_present()
 
-            try:
-                current_url = self.driver.current_url
-                self.driver.get(current_url)
-                self._wait_for_page_ready()
+        try:
+            strategy = self.retry_policy.first_success(
+                [
+                    ("browser back button", browser_back),
+                    (
+                        "patient search menu",
+                        lambda: self.navigate_to_patient_search(deadline),
+                    ),
+                    ("page reload", reload_page),
+                ],
+                deadline,
+                retry_each=False,
+            )
+        except Exception as e:
+            if is_session_error(e):
+                raise
+            self.logger.error(f"Error in navigate_back_to_patient_list: {e}")
+            return False
 
-                # Wait for patient search to be available
-                wait.until(
-                    EC.presence_of_element_located((By.ID, "app-patient-search"))
-                )
-                self.logger.info("Successfully navigated back by reloading page")
-                return True
-            except Exception as e:
-                self.logger.error(f"Error reloading page: {e}")
+        if strategy is None:
+            self.logger.error("Could not navigate back to patient list")
+            return False
+
+        self.logger.info(f"Successfully navigated back using {strategy}")
+        return True
+
+    def _recycle_if_bloated(self, page_number: int) -> None:
+        """Replace the session between patients when it grew past the limits."""
+        if not self.watchdog or not self.driver or not self.watchdog.due():
+            return
+
+        lifecycle = self.session.lifecycle if self.session else self.lifecycle
+        browser_pids, driver_pid = [], None
+        if lifecycle:
+            # Renderers come and go, pick up the current ones
+            lifecycle.refresh()
+            driver_pid = lifecycle.service_pid
+            browser_pids = [pid for pid in lifecycle.pids() if pid != driver_pid]
+        if self.session and self.driver_factory.service_lifecycle:
+            driver_pid = self.driver_factory.service_lifecycle.service_pid
+
+        reason = self.watchdog.check(self.driver, browser_pids, driver_pid)
+        if reason:
+            self.logger.warning(f"Recycling browser session: {reason}")
+            self.metrics.increment("driver_recycles")
+            if not self.reset_session(page_number):
+                raise SessionResetError("Could not reset the browser session")
+
+    def reset_session(self, page_number: int = 1) -> bool:
+        """
+        Replace the browser session after repeated failures.
+
+        Quits the current driver, logs in again and returns to page_number
+        of the patient list.
+        Returns True if the new session is ready, False otherwise.
+        """
+        self.logger.warning("Resetting browser session...")
+        self.metrics.increment("session_resets")
+
+        if self.session:
+            # A wedged session must not go back into the pool
+            self.driver_factory.release(self.session, reuse=False)
+            self.session = None
+            self.driver = None
+        self.close()
 
+        if not self.login():
+            self.logger.error("Login failed while resetting session")
             return False
 
-        except Exception as e:
-            self.logger.error(f"Error in navigate_back_to_patient_list: {e}")
+        self.wait_for_spa_load()
+        if not self.navigate_to_patient_search():
             return False
+
+        for _ in range(page_number - 1):
+            if not self.navigate_to_next_page():
+                self.logger.error(f"Could not return to page {page_number}")
+                return False
+
+        self.breaker.reset()
+        self.logger.info("Session reset successfully")
+        return True
@@ -0,0 +1,239 @@
+import hashlib
+import os
+import re
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple
+from history_store import parse_run_file, record_hash, record_key
+from logger_config import get_logger
+from normalizer import NOT_FOUND, default_normalizer, fold_accents
+from utils import iter_json_array
+
+DEFAULT_DB = "medical_care_index.sqlite"
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+MIN_TOKEN_LENGTH = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    documents INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    doc_hash TEXT NOT NULL UNIQUE,
+    account TEXT NOT NULL,
+    patient TEXT NOT NULL,
+    page_number INTEGER,
+    patient_index_on_page INTEGER,
+    date_hour TEXT,
+    medical_care TEXT NOT NULL,
+    first_seen TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tokens (
+    id INTEGER PRIMARY KEY,
+    token TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS postings (
+    token_id INTEGER NOT NULL,
+    doc_id INTEGER NOT NULL,
+    PRIMARY KEY (token_id, doc_id)
+) WITHOUT ROWID;
+"""
+
+
+def tokenize(text: str) -> List[str]:
+    """Accent- and case-folded word tokens of text."""
+    return [
+        token
+        for token in TOKEN_RE.findall(fold_accents(text))
+        if len(token) >= MIN_TOKEN_LENGTH
+    ]
+
+
+class MedicalCareIndex:
+    """
+    Persistent inverted index over the medical_care text of every run.
+
+    Each distinct consultation (patient, date and text) is one document, no
+    matter how many daily runs repeated it. Tokens are folded for case and
+    Portuguese accents, so "avaliacao" finds "Avaliação". Postings are
+    clustered by token, so a query reads only the postings of its own
+    tokens. Files that were already indexed are skipped, which makes
+    indexing after each run incremental.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+        self._token_ids: Dict[str, int] = {}
+        self.logger = get_logger()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add_file(self, filename: str) -> Optional[int]:
+        """
+        Index a patient_data_*.json file.
+
+        Returns:
+            int: Number of new documents, or None if the file was indexed before
+        """
+        path = os.path.abspath(filename)
+        if self.conn.execute(
+            "SELECT 1 FROM sources WHERE path = ?", (path,)
+        ).fetchone():
+            return None
+
+        account, run_at = parse_run_file(filename)
+        with self.conn:
+            added = self.add_records(iter_json_array(filename), account, run_at)
+            self.conn.execute(
+                "INSERT INTO sources (path, documents) VALUES (?, ?)", (path, added)
+            )
+        self.logger.info(f"Indexed {filename}: {added} new consultations")
+        return added
+
+    def add_records(self, records: Iterable[dict], account: str, run_at: str) -> int:
+        """Index records (cleaned on the way). Returns the number of new documents."""
+        normalizer = default_normalizer()
+        added = 0
+
+        for record in records:
+            record = normalizer.normalize_record(record)
+            medical_care = record.get("medical_care")
+            if not medical_care or medical_care == NOT_FOUND:
+                continue
+
+            # patient_id (see history_store.record_key): a patient who moves
+            # in the list keeps the same documents
+            patient = record_key(record, record_hash(record))
+            doc_hash = hashlib.sha1(
+                "\x1f".join(
+                    (account, patient, str(record.get("date_hour")), medical_care)
+                ).encode("utf-8")
+            ).hexdigest()
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO docs (doc_hash, account, patient, page_number, "
+                "patient_index_on_page, date_hour, medical_care, first_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    doc_hash,
+                    account,
+                    patient,
+                    record.get("page_number"),
+                    record.get("patient_index_on_page"),
+                    record.get("date_hour"),
+                    medical_care,
+                    run_at,
+                ),
+            )
+            if not cursor.rowcount:
+                continue
+
+            doc_id = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO postings (token_id, doc_id) VALUES (?, ?)",
+                (
+                    (self._token_id(token), doc_id)
+                    for token in set(tokenize(medical_care))
+                ),
+            )
+            added += 1
+
+        return added
+
+    def _token_id(self, token: str) -> int:
+        token_id = self._token_ids.get(token)
+        if token_id is None:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO tokens (token) VALUES (?)", (token,)
+            )
+            token_id = self.conn.execute(
+                "SELECT id FROM tokens WHERE token = ?", (token,)
+            ).fetchone()[0]
+            self._token_ids[token] = token_id
+        return token_id
+
+    @staticmethod
+    def _term_query(term: str) -> Tuple[str, list]:
+        """SELECT of the document ids containing term (a trailing * matches a prefix)."""
+        if term.endswith("*"):
+            prefix = term[:-1]
+            return (
+                "SELECT p.doc_id FROM tokens t JOIN postings p ON p.token_id = t.id "
+                "WHERE t.token >= ? AND t.token < ?",
+                [prefix, prefix + "\uffff"],
+            )
+        return (
+            "SELECT p.doc_id FROM tokens t JOIN postings p ON p.token_id = t.id "
+            "WHERE t.token = ?",
+            [term],
+        )
+
+    def search(
+        self, query: str, limit: int = 50, account: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Consultations whose medical_care contains every term of query.
+
+        Terms are folded like the indexed text; "cardio*" matches any token
+        starting with "cardio".
+
+        Returns:
+            list: Matching consultations, most recent first
+        """
+        terms = []
+        for word in query.split():
+            tokens = tokenize(word)
+            if tokens and word.endswith("*"):
+                tokens[-1] += "*"
+            terms.extend(tokens)
+        if not terms:
+            return []
+
+        # The intersection runs inside SQLite: the number of bound
+        # parameters grows with the terms, not with the matching documents
+        queries = [self._term_query(term) for term in dict.fromkeys(terms)]
+        matching = " INTERSECT ".join(sql for sql, _ in queries)
+        params: list = [param for _, term_params in queries for param in term_params]
+        account_filter = ""
+        if account is not None:
+            account_filter = " AND account = ?"
+            params.append(account)
+        params.append(limit)
+
+        rows = self.conn.execute(
+            "SELECT account, patient, page_number, patient_index_on_page, "
+            "date_hour, medical_care FROM docs "
+            f"WHERE id IN ({matching}){account_filter} "
+            "ORDER BY date_hour DESC LIMIT ?",
+            params,
+        )
+        columns = (
+            "account",
+            "patient",
+            "page_number",
+            "patient_index_on_page",
+            "date_hour",
+            "medical_care",
+        )
+        return [dict(zip(columns, row)) for row in rows]
+
+    def stats(self) -> Dict:
+        tables = {
+            "sources": "sources",
+            "documents": "docs",
+            "tokens": "tokens",
+            "postings": "postings",
+        }
+        return {
+            name: self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for name, table in tables.items()
+        }
@@ -0,0 +1,172 @@
+import json
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+from driver_factory import execute_cdp
+
+# Fields accepted by Network.setCookies (getAllCookies returns more)
+COOKIE_PARAM_FIELDS = (
+    "name",
+    "value",
+    "domain",
+    "path",
+    "secure",
+    "httpOnly",
+    "sameSite",
+    "priority",
+    "sourceScheme",
+    "sourcePort",
+)
+
+READ_STORAGE_SCRIPT = """
+function dump(storage) {
+    const items = {};
+    for (let i = 0; i < storage.length; i++) {
+        const key = storage.key(i);
+        items[key] = storage.getItem(key);
+    }
+    return items;
+}
+return {
+    origin: location.origin,
+    local: dump(window.localStorage),
+    session: dump(window.sessionStorage),
+};
+"""
+
+# Runs before any page script, so the app boots already authenticated
+SEED_STORAGE_SCRIPT = """
+(function (state) {
+    if (location.origin !== state.origin) return;
+    for (const [key, value] of Object.entries(state.local)) {
+        window.localStorage.setItem(key, value);
+    }
+    for (const [key, value] of Object.entries(state.session)) {
+        window.sessionStorage.setItem(key, value);
+    }
+})(%s);
+"""
+
+
+class AuthState:
+    """Cookies and web storage of a logged-in browser session."""
+
+    def __init__(
+        self,
+        url: str,
+        origin: str,
+        cookies: List[Dict],
+        local_storage: Dict[str, str],
+        session_storage: Dict[str, str],
+    ):
+        self.url = url
+        self.origin = origin
+        self.cookies = cookies
+        self.local_storage = local_storage
+        self.session_storage = session_storage
+
+    def to_dict(self) -> dict:
+        return {
+            "url": self.url,
+            "origin": self.origin,
+            "cookies": self.cookies,
+            "local_storage": self.local_storage,
+            "session_storage": self.session_storage,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "AuthState":
+        return cls(
+            url=data["url"],
+            origin=data["origin"],
+            cookies=data.get("cookies", []),
+            local_storage=data.get("local_storage", {}),
+            session_storage=data.get("session_storage", {}),
+        )
+
+
+def capture_auth_state(driver) -> AuthState:
+    """
+    Snapshot the authentication of driver's current tab.
+
+    Cookies are read through CDP, so HttpOnly cookies (invisible to
+    `driver.get_cookies()` on some setups and to page scripts) are included.
+    """
+    cookies = execute_cdp(driver, "Network.getAllCookies").get("cookies", [])
+    storage = driver.execute_script(READ_STORAGE_SCRIPT)
+    return AuthState(
+        url=driver.current_url,
+        origin=storage["origin"],
+        cookies=cookies,
+        local_storage=storage["local"],
+        session_storage=storage["session"],
+    )
+
+
+def _cookie_params(cookie: Dict) -> Dict:
+    params = {key: cookie[key] for key in COOKIE_PARAM_FIELDS if key in cookie}
+    # Session cookies are reported with expires -1 and must not send it back
+    if not cookie.get("session") and cookie.get("expires", -1) > 0:
+        params["expires"] = cookie["expires"]
+    return params
+
+
+def apply_auth_state(driver, state: AuthState, url: Optional[str] = None) -> None:
+    """
+    Make driver's current tab share the session captured in state.
+
+    Cookies are set through CDP before any navigation and web storage is
+    seeded by a script that runs ahead of the app's own code, so the target
+    page loads exactly once and already authenticated.
+
+    Args:
+        driver: Driver (or driver switched to a new tab) to authenticate
+        state: State returned by `capture_auth_state`
+        url: Page to open afterwards (default: the page the state was captured on)
+    """
+    if state.cookies:
+        execute_cdp(
+            driver,
+            "Network.setCookies",
+            {"cookies": [_cookie_params(cookie) for cookie in state.cookies]},
+        )
+
+    seed = {
+        "origin": state.origin,
+        "local": state.local_storage,
+        "session": state.session_storage,
+    }
+    script = execute_cdp(
+        driver,
+        "Page.addScriptToEvaluateOnNewDocument",
+        {"source": SEED_STORAGE_SCRIPT % json.dumps(seed)},
+    )
+    try:
+        driver.get(url or state.url)
+    finally:
+        # Seed only the first load; later navigations keep the app's own state
+        execute_cdp(
+            driver,
+            "Page.removeScriptToEvaluateOnNewDocument",
+            {"identifier": script["identifier"]},
+        )
+
+
+def open_authenticated_tab(driver, state: AuthState, url: Optional[str] = None) -> str:
+    """
+    Open a new tab in driver sharing the session in state.
+
+    Tabs of one browser already share cookies and localStorage, but
+    sessionStorage is per tab, so it is seeded explicitly.
+
+    Returns:
+        str: Window handle of the new tab (the driver is switched to it)
+    """
+    driver.switch_to.new_window("tab")
+    apply_auth_state(driver, state, url)
+    return driver.current_window_handle
+
+
+def same_site(url: str, other: str) -> bool:
+    """Whether two URLs share scheme and host (so a captured state applies)."""
+    first, second = urlsplit(url), urlsplit(other)
+    return (first.scheme, first.netloc) == (second.scheme, second.netloc)
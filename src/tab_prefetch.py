@@ -0,0 +1,234 @@
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+from logger_config import get_logger
+from session_clone import apply_auth_state
+
+# A patient (page, index) or, with index None, a list page
+Target = Tuple[int, Optional[int]]
+
+
+class TabPrefetcher:
+    """
+    Load the upcoming patients or list page in spare tabs of the same browser.
+
+    While the scraper reads patient N in the main tab, each spare tab clicks
+    one of the next patients (or, near the end of a page, moves to the next
+    page), so the app renders them in the background. When the crawl gets
+    to one, that tab becomes the main one instead of clicking and waiting
+    again. All tabs share the browser's login; a spare tab's sessionStorage
+    is seeded from the main tab (see `session_clone.apply_auth_state`).
+
+    Only one WebDriver command runs at a time, the overlap comes from the
+    browser rendering several tabs while commands go to another. The rate
+    governor's tab count bounds it: at most `governor.tabs - 1` spare tabs
+    are kept, so a congested server gets fewer concurrent page loads (none
+    at one tab) and spare tabs beyond the count are closed.
+    """
+
+    def __init__(self, scraper):
+        self.scraper = scraper
+        self.driver = None
+        self.main: Optional[str] = None
+        self.spares: List[str] = []
+        # List page each tab was last left on (None: unknown)
+        self.pages: Dict[str, Optional[int]] = {}
+        # Patient (page, index) open in a spare tab
+        self.opened: Dict[str, Tuple[int, int]] = {}
+        # Last list page, once a spare tab found no next page
+        self.last_page: Optional[int] = None
+        self.logger = get_logger()
+
+    def depth(self) -> int:
+        """Spare tabs the rate governor currently allows."""
+        if self.scraper.driver is None:
+            return 0
+        return max(self.scraper.governor.tabs - 1, 0)
+
+    def enabled(self) -> bool:
+        return self.depth() > 0
+
+    def prefetch(self, targets: Sequence[Target]) -> int:
+        """
+        Have the first targets open in spare tabs, as many as depth() allows.
+
+        Tabs already showing one of them are kept; the others are reused
+        for the missing targets or closed.
+
+        Args:
+            targets: Upcoming patients (page, index) and list pages
+                (page, None), in visiting order
+
+        Returns:
+            int: Number of targets ready in a spare tab
+        """
+        self._sync()
+        wanted = [
+            target
+            for target in targets
+            if self.last_page is None or target[0] <= self.last_page
+        ][: self.depth()]
+        held = {self._held(handle): handle for handle in self.spares}
+        free = [handle for handle in self.spares if self._held(handle) not in wanted]
+
+        ready = 0
+        for target in wanted:
+            if target in held:
+                ready += 1
+                continue
+            handle = free.pop(0) if free else None
+            if self._in_spare_tab(handle, lambda: self._load(target)):
+                ready += 1
+
+        # The governor allows fewer tabs than are open
+        for handle in free:
+            self._close(handle)
+        return ready
+
+    def take_patient(self, page: int, index: int, main_page: int) -> bool:
+        """
+        Switch to the spare tab that has this patient open, if any.
+
+        main_page is the list page the main tab is on, where it stays as
+        a spare tab.
+        """
+        self._sync()
+        for handle, opened in self.opened.items():
+            if opened == (page, index):
+                self._swap(handle, main_page)
+                return True
+        return False
+
+    def take_page(self, page: int) -> bool:
+        """Switch to a spare tab showing list page, if any."""
+        self._sync()
+        for handle in self.spares:
+            if handle not in self.opened and self.pages.get(handle) == page:
+                self._swap(handle, page - 1)
+                return True
+        return False
+
+    def _held(self, handle: str) -> Optional[Target]:
+        """What a spare tab is ready to be switched to."""
+        if handle in self.opened:
+            return self.opened[handle]
+        return (self.pages[handle], None) if self.pages.get(handle) else None
+
+    def _load(self, target: Target) -> bool:
+        """Bring the current (spare) tab to target."""
+        page, index = target
+        handle = self.scraper.driver.current_window_handle
+        self.opened.pop(handle, None)
+        if not self._show_page(handle, page):
+            return False
+        if index is None:
+            return True
+        elements = self.scraper.get_patient_elements_on_page()
+        if not elements or index >= len(elements):
+            return False
+        self.scraper._open_patient(elements[index], page, index + 1)
+        self.pages[handle] = None
+        self.opened[handle] = (page, index)
+        return True
+
+    def _swap(self, handle: str, main_page: int) -> None:
+        """Make a spare tab the main one; the old main tab shows main_page."""
+        self.scraper.driver.switch_to.window(handle)
+        self.opened.pop(handle, None)
+        self.spares.remove(handle)
+        self.spares.append(self.main)
+        self.pages[self.main] = main_page
+        self.main = handle
+        self.scraper.metrics.increment("prefetch_hits")
+        if len(self.spares) > self.depth():
+            # Fewer tabs allowed since this one was loaded
+            self._close(self.spares[-1])
+
+    def _sync(self) -> None:
+        """Forget the tabs of a driver that was replaced (session reset)."""
+        if self.driver is not self.scraper.driver:
+            self.driver = self.scraper.driver
+            self.main = None
+            self.spares = []
+            self.pages = {}
+            self.opened = {}
+            self.last_page = None
+
+    def _in_spare_tab(self, handle: Optional[str], work) -> bool:
+        """Run work in a spare tab (a new one if handle is None), then switch back."""
+        driver = self.scraper.driver
+        main = driver.current_window_handle
+        start = time.perf_counter()
+        try:
+            if handle is None or handle not in driver.window_handles:
+                if handle is not None:
+                    self._forget(handle)
+                state = self.scraper.export_auth_state()
+                if state is None:
+                    raise RuntimeError("no session state to share with a spare tab")
+                # Registered before authenticating, so a failure closes it
+                handle = self._open_spare_tab(main)
+                apply_auth_state(driver, state)
+            else:
+                driver.switch_to.window(handle)
+            done = work()
+        except Exception as e:
+            self.logger.debug(f"Prefetch failed: {e}")
+            done = False
+        finally:
+            try:
+                driver.switch_to.window(main)
+            except Exception as e:
+                self.logger.debug(f"Could not switch back to the main tab: {e}")
+
+        self.scraper.metrics.record_timing("prefetch", time.perf_counter() - start)
+        if not done:
+            self.scraper.metrics.increment("prefetch_failures")
+            if handle is not None:
+                self._close(handle)
+        return done
+
+    def _open_spare_tab(self, main: str) -> str:
+        self.main = main
+        self.driver.switch_to.new_window("tab")
+        handle = self.driver.current_window_handle
+        self.spares.append(handle)
+        self.pages[handle] = None
+        self.logger.info(f"Opened spare tab {len(self.spares)} for prefetching")
+        return handle
+
+    def _close(self, handle: str) -> None:
+        """Close a spare tab; a later prefetch opens a new one if needed."""
+        driver = self.scraper.driver
+        try:
+            main = driver.current_window_handle
+            if handle in driver.window_handles and handle != main:
+                driver.switch_to.window(handle)
+                driver.close()
+                driver.switch_to.window(main)
+        except Exception as e:
+            self.logger.debug(f"Could not close a spare tab: {e}")
+        self._forget(handle)
+
+    def _forget(self, handle: str) -> None:
+        if handle in self.spares:
+            self.spares.remove(handle)
+        self.pages.pop(handle, None)
+        self.opened.pop(handle, None)
+
+    def _show_page(self, handle: str, page: int) -> bool:
+        """Bring the current (spare) tab to list page."""
+        shown = self.pages.get(handle)
+        if shown is None or shown > page:
+            # Unknown state or the wrong side: start again from page 1
+            self.scraper.wait_for_spa_load()
+            if not self.scraper.navigate_to_patient_search():
+                return False
+            shown = 1
+        while shown < page:
+            if not self.scraper.navigate_to_next_page():
+                self.pages[handle] = None
+                self.last_page = shown
+                return False
+            shown += 1
+        self.pages[handle] = shown
+        return True
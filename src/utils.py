@@ -1,5 +1,10 @@
-import re
 from logger_config import get_logger
+from normalizer import (
+    NOT_FOUND,
+    default_normalizer,
+    strip_date_hour_prefix,
+    strip_medical_care_prefix,
+)
 
 
 def clean_date_hour(date_hour_text):
@@ -12,16 +17,10 @@ def clean_date_hour(date_hour_text):
     Returns:
         str: Cleaned date string (e.g., "25/05/2025")
     """
-    if not date_hour_text or date_hour_text == "Not found":
+    if not date_hour_text or date_hour_text == NOT_FOUND:
         return date_hour_text
 
-    cleaned_date = re.sub(
-        r"^Data/hora\s*\n\s*", "", date_hour_text, flags=re.IGNORECASE
-    )
-
-    cleaned_date = cleaned_date.strip()
-
-    return cleaned_date
+    return strip_date_hour_prefix(date_hour_text)
 
 
 def clean_medical_care(medical_care_text):
@@ -34,60 +33,235 @@ def clean_medical_care(medical_care_text):
     Returns:
         str: Cleaned medical care text
     """
-    if not medical_care_text or medical_care_text == "Not found":
+    if not medical_care_text or medical_care_text == NOT_FOUND:
         return medical_care_text
 
-    cleaned_text = re.sub(
-        r"^Dados do atendimento\s*\n\s*", "", medical_care_text, flags=re.IGNORECASE
-    )
-
-    cleaned_text = cleaned_text.strip()
-
-    return cleaned_text
+    return strip_medical_care_prefix(medical_care_text)
 
 
 def clean_patient_data(patient_data):
     """
     Clean all patient data before saving to file.
 
+    date_hour is converted to an ISO-8601 datetime string and medical_care
+    has its whitespace and encoding normalized (see normalizer.py).
+
     Args:
         patient_data (list): List of patient records
 
     Returns:
         list: Cleaned patient data
     """
-    cleaned_data = []
+    return default_normalizer().normalize_batch(patient_data)
 
-    for record in patient_data:
-        cleaned_record = record.copy()
 
-        if "date_hour" in cleaned_record:
-            cleaned_record["date_hour"] = clean_date_hour(cleaned_record["date_hour"])
+def default_output_filename():
+    """Timestamped patient_data_YYYYMMDD_HHMMSS.json name for a new run."""
+    from datetime import datetime
 
-        if "medical_care" in cleaned_record:
-            cleaned_record["medical_care"] = clean_medical_care(
-                cleaned_record["medical_care"]
-            )
+    return f"patient_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
 
-        cleaned_data.append(cleaned_record)
 
-    return cleaned_data
+def save_data_to_file(patient_data, filename=None):
+    """
+    Save extracted patient data to a JSON file after cleaning.
 
+    Args:
+        patient_data (list): List of patient records
+        filename (str): Output path (default: timestamped patient_data_*.json)
 
-def save_data_to_file(patient_data):
-    """Save extracted patient data to a JSON file after cleaning."""
+    Returns:
+        str: Path of the written file, or None if saving failed
+    """
     import json
-    from datetime import datetime
 
     logger = get_logger()
 
     cleaned_data = clean_patient_data(patient_data)
 
-    filename = f"patient_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    if filename is None:
+        filename = default_output_filename()
 
     try:
         with open(filename, "w", encoding="utf-8") as f:
             json.dump(cleaned_data, f, indent=2, ensure_ascii=False)
         logger.info(f"Patient data saved to {filename}")
+        return filename
     except Exception as e:
         logger.error(f"Error saving data to file: {e}")
+        return None
+
+
+class IncrementalJsonWriter:
+    """
+    Write cleaned patient records to a JSON array file one at a time.
+
+    The file is a valid JSON array after every `write()`: each record is
+    written over the closing bracket, which is then written again. A run
+    that is killed part way through still leaves every extracted record on
+    disk, in the same layout `save_data_to_file` produces.
+    """
+
+    def __init__(self, filename=None):
+        self.filename = filename or default_output_filename()
+        self.count = 0
+        self._normalizer = default_normalizer()
+        self._file = open(self.filename, "wb")
+        self._file.write(b"[]")
+        self._file.flush()
+        # Offset of the closing bracket
+        self._end = 1
+
+    def write(self, record):
+        """Clean record and append it to the file."""
+        import json
+
+        text = json.dumps(
+            self._normalizer.normalize_record(record), indent=2, ensure_ascii=False
+        )
+        separator = ",\n" if self.count else "\n"
+        data = (separator + "  " + text.replace("\n", "\n  ")).encode("utf-8")
+
+        self._file.seek(self._end)
+        self._file.write(data + b"\n]")
+        self._file.truncate()
+        self._file.flush()
+        self._end += len(data)
+        self.count += 1
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+            get_logger().info(f"Saved {self.count} patient records to {self.filename}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def load_data_from_file(filename):
+    """Load patient records from a patient_data_*.json file."""
+    import json
+
+    with open(filename, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def iter_json_array(filename, chunk_size=64 * 1024):
+    """
+    Yield the elements of a JSON array file one at a time.
+
+    Only the element being decoded is held in memory, so run files of any
+    size can be streamed.
+
+    Args:
+        filename (str): Path of a file holding a JSON array
+        chunk_size (int): Characters read per step
+
+    Yields:
+        Each element of the array
+    """
+    import json
+
+    decoder = json.JSONDecoder()
+    number_chars = set("0123456789+-.eE")
+    with open(filename, encoding="utf-8") as f:
+        # Leading whitespace may fill whole chunks
+        chunk = f.read(chunk_size)
+        buffer = chunk.lstrip()
+        while chunk and not buffer:
+            chunk = f.read(chunk_size)
+            buffer = chunk.lstrip()
+        if not buffer.startswith("["):
+            raise ValueError(f"{filename} does not contain a JSON array")
+        buffer = buffer[1:]
+        eof = False
+        # "first": an element or "]", "value": an element, "separator": "," or "]"
+        expect = "first"
+
+        while True:
+            buffer = buffer.lstrip()
+            if not buffer:
+                if eof:
+                    raise ValueError(f"{filename}: unterminated JSON array")
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+
+            if expect == "separator":
+                if buffer[0] == "]":
+                    return
+                if buffer[0] != ",":
+                    raise ValueError(
+                        f"{filename}: expected ',' or ']' after an element"
+                    )
+                buffer = buffer[1:]
+                expect = "value"
+                continue
+            if expect == "first" and buffer[0] == "]":
+                return
+            if buffer[0] in ",]":
+                raise ValueError(f"{filename}: expected an element after ','")
+
+            try:
+                element, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                end = None
+            # A number running into the end of the buffer (e.g. "1." of
+            # "1.5") may continue in the next chunk
+            if (
+                end is not None
+                and not eof
+                and buffer[0] in number_chars
+                and all(c in number_chars for c in buffer[end:])
+            ):
+                end = None
+            if end is None:
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+
+            yield element
+            buffer = buffer[end:]
+            expect = "separator"
+
+
+def export_data(patient_data, filename, fmt="csv"):
+    """
+    Export patient records to CSV or NDJSON.
+
+    Args:
+        patient_data (list): List of patient records
+        filename (str): Output path
+        fmt (str): "csv" or "ndjson"
+
+    Returns:
+        int: Number of records written
+    """
+    import csv
+    import json
+
+    if fmt == "ndjson":
+        with open(filename, "w", encoding="utf-8") as f:
+            for record in patient_data:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return len(patient_data)
+
+    if fmt != "csv":
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    fieldnames = []
+    for record in patient_data:
+        fieldnames.extend(key for key in record if key not in fieldnames)
+
+    with open(filename, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(patient_data)
+    return len(patient_data)
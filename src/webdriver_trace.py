@@ -0,0 +1,322 @@
+import json
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, Iterable, List, Optional
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.chrome.options import Options
+from logger_config import get_logger
+
+TRACE_VERSION = 1
+REDACTED = "<redacted>"
+
+# Commands whose parameters and results are always dropped from traces
+SECRET_COMMANDS = {"sendKeysToElement", "addCookie", "getCookies", "getCookie"}
+SECRET_CDP_PREFIXES = (
+    "Network.getAllCookies",
+    "Network.getCookies",
+    "Network.setCookie",
+    "Page.addScriptToEvaluateOnNewDocument",
+)
+SCRIPT_COMMANDS = {"executeScript", "executeAsyncScript"}
+# Commands whose results carry page content (patient data); dropped unless
+# the trace is recorded with keep_content=True. Screenshots include those of
+# Diagnostics.capture, which runs on the recorded driver.
+CONTENT_COMMANDS = {
+    "getElementText",
+    "getPageSource",
+    "getElementProperty",
+    "getElementAttribute",
+    "screenshot",
+    "elementScreenshot",
+}
+# WebElement.get_attribute runs Selenium's getAttribute atom as a script
+CONTENT_SCRIPT_MARKERS = (
+    "outerHTML",
+    "innerHTML",
+    "innerText",
+    "textContent",
+    "/* getAttribute */",
+)
+
+
+def _scrub(value, secrets: List[str]):
+    """Replace every occurrence of a secret inside value (recursively)."""
+    if isinstance(value, str):
+        for secret in secrets:
+            value = value.replace(secret, REDACTED)
+        return value
+    if isinstance(value, list):
+        return [_scrub(item, secrets) for item in value]
+    if isinstance(value, dict):
+        return {key: _scrub(item, secrets) for key, item in value.items()}
+    return value
+
+
+def _redact_value(response):
+    """Blank out the value of a response, keeping status and shape."""
+    if isinstance(response, dict) and "value" in response:
+        return {**response, "value": REDACTED}
+    return response
+
+
+def redact(
+    command: str,
+    params: dict,
+    response,
+    secrets: List[str],
+    keep_content: bool = False,
+):
+    """
+    Remove credentials, session secrets and page content from one command.
+
+    Typed text, cookies, web storage and the configured secrets (e.g.
+    username and password) never reach the trace file. Unless keep_content
+    is set, neither do element texts and attributes, screenshots, page
+    sources and scripts reading the DOM, which hold the patients' medical
+    data. The same rules are applied
+    to commands during replay, so redacted commands still match.
+
+    Returns:
+        tuple: (params, response) safe to store
+    """
+    params = _scrub(params or {}, secrets)
+    response = _scrub(response, secrets)
+
+    secret = command in SECRET_COMMANDS
+    if command == "executeCdpCommand":
+        secret = str(params.get("cmd", "")).startswith(SECRET_CDP_PREFIXES)
+    elif command in SCRIPT_COMMANDS:
+        script = str(params.get("script", ""))
+        if "Storage" in script:
+            response = _redact_value(response)
+        elif not keep_content and any(m in script for m in CONTENT_SCRIPT_MARKERS):
+            response = _redact_value(response)
+    elif command in CONTENT_COMMANDS and not keep_content:
+        response = _redact_value(response)
+
+    if secret:
+        params = {
+            key: (value if key in ("id", "cmd", "sessionId") else REDACTED)
+            for key, value in params.items()
+        }
+        response = _redact_value(response)
+
+    return params, response
+
+
+def command_key(command: str, params: dict) -> str:
+    """Identity of a command for replay matching (session id excluded)."""
+    params = {key: value for key, value in (params or {}).items() if key != "sessionId"}
+    return f"{command} {json.dumps(params, sort_keys=True, ensure_ascii=False)}"
+
+
+class RecordingExecutor:
+    """Command executor wrapper that records everything sent through it."""
+
+    def __init__(self, inner, recorder: "TraceRecorder"):
+        self.inner = inner
+        self.recorder = recorder
+
+    def execute(self, command: str, params: dict):
+        start = time.perf_counter()
+        try:
+            response = self.inner.execute(command, params)
+        except Exception as e:
+            self.recorder.add(command, params, None, time.perf_counter() - start, e)
+            raise
+        self.recorder.add(command, params, response, time.perf_counter() - start)
+        return response
+
+    def __getattr__(self, name):
+        # client_config, close() etc. still come from the real connection
+        return getattr(self.inner, name)
+
+
+class TraceRecorder:
+    """
+    Record the WebDriver commands of a real run into a redacted trace.
+
+    `attach()` swaps the driver's command executor for a recording wrapper,
+    so every command the scraper (or Selenium helpers such as WebDriverWait)
+    sends is captured with its response and server-side duration.
+    """
+
+    def __init__(self, secrets: Iterable[str] = (), keep_content: bool = False):
+        # Longest first so a secret containing another is replaced whole
+        self.secrets = sorted((s for s in secrets if s), key=len, reverse=True)
+        self.keep_content = keep_content
+        self.capabilities: dict = {}
+        self.commands: List[dict] = []
+        self.started = time.perf_counter()
+
+    def attach(self, driver):
+        """Start recording driver's commands. Returns driver."""
+        if not isinstance(driver.command_executor, RecordingExecutor):
+            driver.command_executor = RecordingExecutor(driver.command_executor, self)
+        self.capabilities = _scrub(driver.caps or {}, self.secrets)
+        return driver
+
+    def add(self, command, params, response, elapsed, error=None) -> None:
+        params, response = redact(
+            command, params, response, self.secrets, self.keep_content
+        )
+        entry = {
+            "offset": round(time.perf_counter() - self.started, 4),
+            "command": command,
+            "params": params,
+            "response": response,
+            "elapsed": round(elapsed, 4),
+        }
+        if error is not None:
+            entry["error"] = _scrub(str(error), self.secrets)
+        self.commands.append(entry)
+
+    def save(self, filename: str) -> Optional[str]:
+        """Write the trace to filename. Returns the path, or None on failure."""
+        trace = {
+            "version": TRACE_VERSION,
+            "recorded_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "capabilities": self.capabilities,
+            "commands": self.commands,
+        }
+        try:
+            with open(filename, "w", encoding="utf-8") as f:
+                json.dump(trace, f, ensure_ascii=False)
+            get_logger().info(
+                f"Recorded {len(self.commands)} WebDriver commands to {filename}"
+            )
+            return filename
+        except Exception as e:
+            get_logger().error(f"Error saving WebDriver trace: {e}")
+            return None
+
+
+class ReplayExecutor:
+    """
+    Command executor that answers from a recorded trace instead of a browser.
+
+    Responses are looked up by command and parameters. Identical commands
+    (e.g. the polls of a WebDriverWait) get their recorded responses in
+    order, then the last one again if the code under test asks more often
+    than the recorded run did. Elements the recorded run never looked up
+    are reported as absent; other commands missing from the trace fail with
+    an "unknown command" error.
+
+    Waits are fast-forwarded: the scraper polls a replay every poll_interval
+    seconds instead of every 0.1 s, and once STALLED_POLLS commands in a row
+    are past the end of the trace (the answers can no longer change, e.g.
+    the recorded wait timed out) the command raises TimeoutException instead
+    of letting the wait spin for its full timeout.
+    """
+
+    STALLED_POLLS = 50
+
+    def __init__(self, trace: dict, realtime: bool = False):
+        self.trace = trace
+        self.realtime = realtime
+        # Recorded polls already carry their timing in realtime mode
+        self.poll_interval = None if realtime else 0.001
+        self.session_id = "replay"
+        self.responses: Dict[str, Deque[dict]] = {}
+        self.last: Dict[str, dict] = {}
+        self.stalled = 0
+        self.stats = {"replayed": 0, "repeated": 0, "missing": 0, "stalled_waits": 0}
+        self.logger = get_logger()
+
+        for entry in trace.get("commands", []):
+            key = command_key(entry["command"], entry["params"])
+            self.responses.setdefault(key, deque()).append(entry)
+
+    def execute(self, command: str, params: dict):
+        if command == "newSession":
+            return {
+                "value": {
+                    "sessionId": self.session_id,
+                    "capabilities": self.trace.get("capabilities", {}),
+                }
+            }
+
+        params, _ = redact(command, params, None, [])
+        key = command_key(command, params)
+        queue = self.responses.get(key)
+        if queue:
+            entry = self.last[key] = queue.popleft()
+            self.stalled = 0
+            self.stats["replayed"] += 1
+        elif command in ("quit", "deleteSession"):
+            return {"value": None}
+        elif key in self.last:
+            self._stall()
+            entry = self.last[key]
+            self.stats["repeated"] += 1
+        else:
+            self._stall()
+            self.stats["missing"] += 1
+            self.logger.debug(f"No recorded response for {key}")
+            return self._missing_response(command)
+
+        if self.realtime:
+            time.sleep(entry["elapsed"])
+        if "error" in entry:
+            raise WebDriverException(entry["error"])
+        return entry["response"]
+
+    def _stall(self) -> None:
+        """Count a command past the end of the trace; end a wait stuck on them."""
+        self.stalled += 1
+        if self.stalled >= self.STALLED_POLLS:
+            self.stalled = 0
+            self.stats["stalled_waits"] += 1
+            raise TimeoutException(
+                "Replay trace exhausted (the recorded wait timed out)"
+            )
+
+    @staticmethod
+    def _missing_response(command: str) -> dict:
+        # Elements the recorded run never looked for are simply not there
+        if command in ("findElements", "findChildElements"):
+            return {"value": []}
+        if command in ("findElement", "findChildElement"):
+            error = {"error": "no such element", "message": "not in the replay trace"}
+        else:
+            error = {
+                "error": "unknown command",
+                "message": f"{command} is not in the replay trace",
+            }
+        # Same shape as an HTTP error from chromedriver
+        return {"status": 404, "value": json.dumps({"value": error})}
+
+    def close(self) -> None:
+        """Nothing to close; called by WebDriver.quit()."""
+
+
+def load_trace(filename: str) -> dict:
+    with open(filename, encoding="utf-8") as f:
+        trace = json.load(f)
+    if trace.get("version") != TRACE_VERSION:
+        raise ValueError(f"Unsupported trace version: {trace.get('version')}")
+    return trace
+
+
+def recorded_url(trace: dict) -> Optional[str]:
+    """First URL the recorded run navigated to (the login page)."""
+    for entry in trace.get("commands", []):
+        if entry["command"] == "get":
+            return entry["params"].get("url")
+    return None
+
+
+def replay_driver(trace: dict, realtime: bool = False) -> webdriver.Remote:
+    """
+    Create a WebDriver that replays trace without starting a browser.
+
+    Args:
+        trace: Trace loaded with `load_trace`
+        realtime: Sleep for each command's recorded duration (otherwise
+            responses return as fast as possible)
+    """
+    return webdriver.Remote(
+        command_executor=ReplayExecutor(trace, realtime), options=Options()
+    )
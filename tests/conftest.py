@@ -0,0 +1,34 @@
+import json
+import pytest
+
+
+@pytest.fixture
+def write_run(tmp_path):
+    """Write records to a patient_data_[<account>_]<timestamp>.json file."""
+
+    def write(timestamp, records, account=None):
+        prefix = f"patient_data_{account}_" if account else "patient_data_"
+        path = tmp_path / f"{prefix}{timestamp}.json"
+        path.write_text(json.dumps(records, ensure_ascii=False), encoding="utf-8")
+        return str(path)
+
+    return write
+
+
+@pytest.fixture
+def patient():
+    """Build a raw record as the scraper extracts it."""
+
+    def build(page, index, date_hour, medical_care="Consulta de rotina", key=None):
+        record = {
+            "page_number": page,
+            "patient_index_on_page": index,
+            "date_hour": date_hour,
+            "medical_care": medical_care,
+            "extraction_timestamp": "2025-01-01 00:00:00",
+        }
+        if key:
+            record["patient_id"] = key
+        return record
+
+    return build
@@ -0,0 +1,86 @@
+import pytest
+from adaptive_timeouts import AdaptiveTimeouts, percentile
+
+
+def make_timeouts(**kwargs):
+    kwargs.setdefault("state_file", None)
+    return AdaptiveTimeouts(**kwargs)
+
+
+def learn(timeouts, step, seconds, count=10):
+    for _ in range(count):
+        timeouts.observe(step, seconds)
+
+
+def test_percentile_nearest_rank():
+    values = [5, 1, 4, 2, 3]
+    assert percentile(values, 0.5) == 3
+    assert percentile(values, 0.95) == 5
+    assert percentile([], 0.5) == 0.0
+
+
+def test_defaults_until_enough_samples():
+    timeouts = make_timeouts()
+    learn(timeouts, "page_ready", 0.2, count=9)
+    assert timeouts.timeout("page_ready") == 10.0
+    assert timeouts.timeout("unknown_step") == 10.0
+
+
+def test_learned_timeout_is_clamped():
+    timeouts = make_timeouts()
+    learn(timeouts, "page_ready", 2.0)
+    # 2.0 * 1.5 + 0.5
+    assert timeouts.timeout("page_ready") == pytest.approx(3.5)
+
+    learn(timeouts, "patient_click", 0.01)
+    assert timeouts.timeout("patient_click") == 1.0
+
+    learn(timeouts, "next_page", 30.0)
+    assert timeouts.timeout("next_page") == 10.0
+
+
+def test_required_step_widens_on_every_timeout():
+    timeouts = make_timeouts()
+    learn(timeouts, "page_ready", 2.0)
+    timeouts.observe_timeout("page_ready", timeouts.timeout("page_ready"))
+    assert timeouts.timeout("page_ready") > 3.5 * 2 - 0.01
+    timeouts.observe("page_ready", 2.0)
+    assert timeouts.timeout("page_ready") < 7.0
+
+
+def test_optional_step_tolerates_some_misses():
+    timeouts = make_timeouts(miss_tolerance=3)
+    learn(timeouts, "date_hour", 0.5)
+    learned = timeouts.timeout("date_hour")
+
+    for _ in range(2):
+        timeouts.observe_timeout("date_hour", learned)
+    assert timeouts.timeout("date_hour") == learned
+
+    timeouts.observe_timeout("date_hour", learned)
+    assert timeouts.timeout("date_hour") > learned
+
+
+def test_cut_short_timeouts_add_no_sample():
+    timeouts = make_timeouts()
+    learn(timeouts, "page_ready", 2.0)
+    timeouts.observe_timeout("page_ready", None)
+    assert len(timeouts.latencies["page_ready"]) == 10
+    timeouts.observe_timeout("page_ready", 3.5)
+    assert len(timeouts.latencies["page_ready"]) == 11
+
+
+def test_state_round_trip(tmp_path):
+    state_file = str(tmp_path / "stats" / "timeouts.json")
+    timeouts = make_timeouts(state_file=state_file)
+    learn(timeouts, "page_ready", 2.0)
+    timeouts.save()
+
+    restored = make_timeouts(state_file=state_file)
+    assert restored.timeout("page_ready") == pytest.approx(3.5)
+
+
+def test_unreadable_state_is_ignored(tmp_path):
+    state_file = tmp_path / "timeouts.json"
+    state_file.write_text("{not json")
+    assert make_timeouts(state_file=str(state_file)).latencies == {}
@@ -0,0 +1,63 @@
+import signal
+from budget import RunBudget, load_priorities, order_patients, patient_id
+
+
+def test_unlimited_budget_always_starts_patients():
+    budget = RunBudget(None)
+    budget.observe_patient(1000.0)
+    assert budget.can_start_patient()
+
+
+def test_stops_when_the_next_patient_would_not_fit():
+    budget = RunBudget(100, reserve=30, default_patient_seconds=45)
+    assert budget.can_start_patient()
+
+    for _ in range(10):
+        budget.observe_patient(80.0)
+    assert not budget.can_start_patient()
+    assert budget.stopped
+    assert "time budget" in budget.stop_reason
+
+
+def test_estimate_is_the_90th_percentile():
+    budget = RunBudget(None)
+    for seconds in range(1, 11):
+        budget.observe_patient(float(seconds))
+    assert budget.patient_estimate() == 9.0
+
+
+def test_first_signal_requests_a_stop(monkeypatch):
+    handlers = {}
+    monkeypatch.setattr(
+        "budget.signal.signal",
+        lambda signum, handler: handlers.update({signum: handler}),
+    )
+    budget = RunBudget(None)
+    budget.install_signal_handlers()
+
+    handlers[signal.SIGTERM](signal.SIGTERM, None)
+    assert budget.stopped
+    assert budget.stop_reason == "received SIGTERM"
+    assert not budget.can_start_patient()
+
+
+def test_patient_id_ignores_case_and_spacing():
+    assert patient_id("Maria  da Silva\n123") == patient_id("maria da silva 123")
+    assert patient_id("Maria da Silva") != patient_id("Mario da Silva")
+
+
+def test_load_priorities_keeps_latest_iso_date():
+    records = [
+        {"patient_id": "a", "date_hour": "2025-01-01T10:00:00"},
+        {"patient_id": "a", "date_hour": "2025-03-01T10:00:00"},
+        {"patient_id": "b", "date_hour": "Not found"},
+        {"page_number": 1, "patient_index_on_page": 1, "date_hour": "2025-01-01"},
+    ]
+    assert load_priorities(records) == {"a": "2025-03-01T10:00:00"}
+
+
+def test_order_patients_new_first_then_most_recent():
+    ids = ["old", "new", "recent"]
+    priorities = {"old": "2024-01-01T00:00:00", "recent": "2025-01-01T00:00:00"}
+    assert order_patients(ids, priorities) == [1, 2, 0]
+    assert order_patients(ids, None) == [0, 1, 2]
@@ -0,0 +1,144 @@
+import json
+import os
+import subprocess
+import sys
+import time
+import pytest
+import chrome_lifecycle
+from chrome_lifecycle import (
+    OWNER_FILE,
+    TEMPLATE_DIRNAME,
+    ChromeLifecycle,
+    ensure_profile_template,
+    find_profile_processes,
+    process_start_time,
+)
+
+
+@pytest.fixture(autouse=True)
+def root(tmp_path, monkeypatch):
+    monkeypatch.setattr(chrome_lifecycle, "profile_root", lambda: str(tmp_path))
+    return tmp_path
+
+
+def read_owner(profile_dir):
+    with open(os.path.join(profile_dir, OWNER_FILE)) as f:
+        return json.load(f)
+
+
+def orphan_profile(root, name, tracked=None):
+    """A profile whose owner is gone: this PID, but with another start time."""
+    profile_dir = root / f"chrome_selenium_{name}"
+    profile_dir.mkdir()
+    owner = {"owner_pid": os.getpid(), "owner_start": -1, "tracked": tracked or {}}
+    (profile_dir / OWNER_FILE).write_text(json.dumps(owner))
+    return profile_dir
+
+
+def test_no_template_is_built_without_a_warm_up(root):
+    assert ensure_profile_template() == ""
+    assert os.listdir(root) == []
+
+
+def test_template_is_built_once_and_cleaned(root):
+    launches = []
+
+    def warm(profile_dir):
+        launches.append(profile_dir)
+        open(os.path.join(profile_dir, "SingletonLock"), "w").close()
+        open(os.path.join(profile_dir, "Local State"), "w").close()
+
+    template = ensure_profile_template(warm=warm)
+    assert template == str(root / TEMPLATE_DIRNAME)
+    assert sorted(os.listdir(template)) == [".warmed", "First Run", "Local State"]
+    # Later callers reuse it, with or without a warm-up of their own
+    assert ensure_profile_template(warm=warm) == template
+    assert ensure_profile_template() == template
+    assert len(launches) == 1
+
+
+def test_failed_warm_up_leaves_nothing_behind(root):
+    def warm(profile_dir):
+        raise RuntimeError("Chrome failed to start")
+
+    assert ensure_profile_template(warm=warm) == ""
+    assert os.listdir(root) == []
+
+
+def test_profile_is_cloned_and_owned(root):
+    template = root / "template"
+    template.mkdir()
+    for name in ("Local State", "SingletonLock", OWNER_FILE, ".warmed"):
+        (template / name).write_text("x")
+
+    lifecycle = ChromeLifecycle(template_dir=str(template))
+    profile_dir = lifecycle.prepare_profile()
+    try:
+        assert os.path.dirname(profile_dir) == str(root)
+        assert sorted(os.listdir(profile_dir)) == [OWNER_FILE, "Local State"]
+        owner = read_owner(profile_dir)
+        assert owner["owner_pid"] == os.getpid()
+        assert owner["owner_start"] == process_start_time(os.getpid())
+        assert owner["tracked"] == {}
+    finally:
+        lifecycle.terminate()
+    assert not os.path.exists(profile_dir)
+
+
+def test_terminate_can_keep_the_profile(root):
+    lifecycle = ChromeLifecycle()
+    profile_dir = lifecycle.prepare_profile(str(root))
+    lifecycle.terminate(remove_profile=False)
+    assert os.path.isdir(profile_dir)
+    assert lifecycle not in ChromeLifecycle._live
+
+
+def test_reap_orphans_kills_processes_of_dead_owners(root):
+    profile_dir = orphan_profile(root, "1234_dead")
+    # Stands in for a Chrome process left running on the orphaned profile
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-c",
+            "import time; time.sleep(60)",
+            f"--user-data-dir={profile_dir}",
+        ]
+    )
+    try:
+        deadline = time.monotonic() + 5
+        while not find_profile_processes(str(profile_dir)):
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert ChromeLifecycle.reap_orphans() == 1
+        assert process.wait(timeout=5) != 0
+    finally:
+        process.kill()
+    assert not profile_dir.exists()
+
+
+def test_reap_orphans_leaves_live_owners_alone(root):
+    live = ChromeLifecycle()
+    live_dir = live.prepare_profile()
+    (root / TEMPLATE_DIRNAME).mkdir()
+    (root / "chrome_selenium_no_owner").mkdir()
+    unrelated = root / "other"
+    unrelated.mkdir()
+    (unrelated / OWNER_FILE).write_text(json.dumps({"owner_pid": 1}))
+    try:
+        assert ChromeLifecycle.reap_orphans() == 0
+        assert sorted(os.listdir(root)) == sorted(
+            [
+                os.path.basename(live_dir),
+                TEMPLATE_DIRNAME,
+                "chrome_selenium_no_owner",
+                "other",
+            ]
+        )
+    finally:
+        live.terminate()
+
+
+def test_tracked_pids_with_a_new_start_time_are_not_signalled(root):
+    # The PID was reused by an unrelated process (this one)
+    orphan_profile(root, "1234_reused", tracked={str(os.getpid()): -1})
+    assert ChromeLifecycle.reap_orphans() == 1
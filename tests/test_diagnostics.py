@@ -0,0 +1,91 @@
+import json
+import os
+import pytest
+from diagnostics import Diagnostics
+from metrics import RunMetrics
+
+
+class FakeDriver:
+    current_url = "https://clinic.example/patients"
+
+    def __init__(self, screenshot=b"png", dom="<app-root></app-root>"):
+        self.screenshot = screenshot
+        self.dom = dom
+
+    def get_screenshot_as_png(self):
+        return self.screenshot
+
+    def execute_script(self, script):
+        return self.dom
+
+
+@pytest.fixture
+def diagnostics(tmp_path):
+    diagnostics = Diagnostics(
+        directory=str(tmp_path),
+        capacity=3,
+        max_captures=2,
+        max_screenshot_bytes=10,
+        max_dom_bytes=8,
+        metrics=RunMetrics(),
+    )
+    yield diagnostics
+    diagnostics.close()
+
+
+def read_report(prefix):
+    with open(f"{prefix}.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_small_artifacts_are_written(diagnostics):
+    for step in ("login", "search", "open", "filter"):
+        diagnostics.record("step_ok", step=step)
+    prefix = diagnostics.capture(FakeDriver(dom="<p>1</p>"), "patient 1/2")
+    diagnostics.close()
+
+    assert os.path.basename(prefix).endswith("_patient_1_2")
+    with open(f"{prefix}.png", "rb") as f:
+        assert f.read() == b"png"
+    with open(f"{prefix}.html", encoding="utf-8") as f:
+        assert f.read() == "<p>1</p>"
+    report = read_report(prefix)
+    assert report["url"] == FakeDriver.current_url
+    # Only the last `capacity` events are kept
+    assert [event["step"] for event in report["events"]] == [
+        "search",
+        "open",
+        "filter",
+    ]
+
+
+def test_large_artifacts_are_capped(diagnostics):
+    prefix = diagnostics.capture(FakeDriver(b"x" * 11, "<p>Atenção</p>"), "big")
+    diagnostics.close()
+
+    assert not os.path.exists(f"{prefix}.png")
+    with open(f"{prefix}.html", "rb") as f:
+        data = f.read()
+    # 8 bytes would split the "ç"; the cut keeps the file valid UTF-8
+    assert data.decode("utf-8") == "<p>Aten"
+    report = read_report(prefix)
+    assert report["screenshot_skipped"] == "11 bytes"
+    assert report["dom_truncated"] == f"{len('<p>Atenção</p>'.encode())} bytes"
+
+
+def test_captures_stop_at_the_limit(diagnostics):
+    assert diagnostics.capture(None, "first")
+    assert diagnostics.capture(None, "second")
+    assert diagnostics.capture(None, "third") is None
+    diagnostics.close()
+    assert diagnostics.metrics.counters == {
+        "diagnostics_captures": 2,
+        "diagnostics_dropped": 1,
+    }
+
+
+def test_no_thread_or_file_without_a_failure(diagnostics, tmp_path):
+    diagnostics.record("step_ok", step="login")
+    diagnostics.close()
+    assert diagnostics._writer is None
+    assert os.listdir(tmp_path) == []
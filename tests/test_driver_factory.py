@@ -0,0 +1,104 @@
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from driver_factory import DriverFactory, PooledSession
+
+
+class FakeDriver:
+    def __init__(self, number):
+        self.number = number
+        self.quit_called = False
+
+    def quit(self):
+        self.quit_called = True
+
+
+class FakeLifecycle:
+    def __init__(self):
+        self.terminated = False
+
+    def terminate(self, timeout=5.0):
+        self.terminated = True
+
+
+class FakeService:
+    def stop(self):
+        pass
+
+
+class FakeFactory(DriverFactory):
+    """A pool whose sessions are fakes; chromedriver is never started."""
+
+    def __init__(self, pool_size):
+        super().__init__(pool_size=pool_size)
+        self.numbers = itertools.count(1)
+        self.reset_ok = True
+        self.service = FakeService()
+        self._executor = ThreadPoolExecutor(max_workers=pool_size)
+        self._fill_pool()
+
+    def _create_session(self):
+        return PooledSession(FakeDriver(next(self.numbers)), FakeLifecycle())
+
+    def _reset_session(self, session):
+        return self.reset_ok
+
+
+@pytest.fixture
+def factory():
+    factory = FakeFactory(pool_size=1)
+    yield factory
+    factory.close()
+
+
+def test_released_sessions_are_reused(factory):
+    session = factory.acquire()
+    assert session.driver.number == 1
+    factory.release(session)
+
+    again = factory.acquire()
+    assert again is session
+    assert again.uses == 2
+    assert factory.metrics.counters["session_pool_hits"] == 2
+    assert factory.metrics.counters["session_reuses"] == 1
+
+
+def test_discarded_session_is_replaced(factory):
+    session = factory.acquire()
+    factory.release(session, reuse=False)
+    assert session.driver.quit_called
+    assert session.lifecycle.terminated
+
+    replacement = factory.acquire()
+    assert replacement.driver.number == 2
+    assert factory.metrics.counters["session_pool_hits"] == 2
+
+
+def test_session_that_cannot_be_reset_is_discarded(factory):
+    session = factory.acquire()
+    factory.reset_ok = False
+    factory.release(session)
+    assert session.driver.quit_called
+    assert factory.acquire() is not session
+
+
+def test_pool_keeps_at_most_pool_size_sessions(factory):
+    first = factory.acquire()
+    second = factory.acquire()
+    assert factory.metrics.counters["session_pool_misses"] == 1
+
+    # Leased sessions count against the pool, so the first one back is quit
+    factory.release(first)
+    factory.release(second)
+    assert first.driver.quit_called
+    assert not second.driver.quit_called
+    assert [future.result() for future in factory._ready] == [second]
+
+
+def test_close_quits_ready_and_leased_sessions():
+    factory = FakeFactory(pool_size=2)
+    leased = factory.acquire()
+    ready = factory._ready[0].result()
+    factory.close()
+    assert leased.driver.quit_called and ready.driver.quit_called
+    assert factory.service is None
@@ -0,0 +1,116 @@
+import pytest
+from history_store import HistoryStore, parse_run_file, record_hash, record_key
+
+
+@pytest.fixture
+def store(tmp_path):
+    with HistoryStore(str(tmp_path / "history.sqlite")) as store:
+        yield store
+
+
+def test_parse_run_file_reads_account_and_time():
+    assert parse_run_file("runs/patient_data_unit-a_20250525_081500.json") == (
+        "unit-a",
+        "2025-05-25T08:15:00",
+    )
+    assert parse_run_file("patient_data_20250525_081500.json")[0] == ""
+
+
+def test_record_hash_ignores_volatile_fields(patient):
+    record = patient(1, 1, "2025-01-01T10:00:00")
+    later = dict(
+        record,
+        extraction_timestamp="2025-02-02 00:00:00",
+        total_patients="120",
+        page_number=4,
+        patient_index_on_page=7,
+    )
+    assert record_hash(record) == record_hash(later)
+
+
+def test_record_key_prefers_patient_id(patient):
+    record = patient(1, 1, "2025-01-01T10:00:00", key="ana")
+    assert record_key(record, record_hash(record)) == "ana"
+    # Files written before patient_id existed
+    del record["patient_id"]
+    assert record_key(record, record_hash(record)) == "1:1"
+    assert record_key({"date_hour": "x"}, "abc") == "abc"
+
+
+def test_runs_store_only_changes(store, write_run, patient):
+    first = [patient(1, 1, "01/01/2025 10:00"), patient(1, 2, "02/01/2025 10:00")]
+    second = [patient(1, 1, "01/01/2025 10:00"), patient(1, 2, "05/01/2025 09:00")]
+    assert store.add_run(write_run("20250101_080000", first))["changed"] == 2
+    stats = store.add_run(write_run("20250102_080000", second))
+    assert stats["changed"] == 1
+    assert stats["new_records"] == 1
+
+
+def test_snapshot_at_a_past_run(store, write_run, patient):
+    store.add_run(write_run("20250101_080000", [patient(1, 1, "01/01/2025 10:00")]))
+    store.add_run(write_run("20250102_080000", [patient(1, 2, "02/01/2025 10:00")]))
+
+    assert [r["date_hour"] for r in store.snapshot(at="2025-01-01")] == [
+        "2025-01-01T10:00:00"
+    ]
+    # Patient 1:1 is gone from the second run
+    assert [r["patient_index_on_page"] for r in store.snapshot()] == [2]
+
+
+def test_moving_in_the_list_is_not_a_change(store, write_run, patient):
+    first = [
+        patient(1, 1, "01/01/2025 10:00", key="ana"),
+        patient(1, 2, "02/01/2025 10:00", key="bia"),
+    ]
+    second = [
+        patient(1, 1, "02/01/2025 10:00", key="bia"),
+        patient(1, 2, "01/01/2025 10:00", key="ana"),
+    ]
+    store.add_run(write_run("20250101_080000", first))
+    assert store.add_run(write_run("20250102_080000", second))["changed"] == 0
+
+
+def test_single_patient_runs_record_one_change(store, write_run):
+    def run(date_hour):
+        return [{"patient_id": "ana", "date_hour": date_hour, "medical_care": "x"}]
+
+    store.add_run(write_run("20250101_080000", run("01/01/2025 10:00")))
+    stats = store.add_run(write_run("20250102_080000", run("02/01/2025 10:00")))
+    assert stats["changed"] == 1
+    assert [r["date_hour"] for r in store.snapshot()] == ["2025-01-02T10:00:00"]
+
+
+def test_snapshot_is_in_list_order(store, write_run, patient):
+    records = [
+        patient(page, index, "01/01/2025 10:00", f"{page}-{index}")
+        for page in (10, 2, 1)
+        for index in (10, 2, 1)
+    ]
+    store.add_run(write_run("20250101_080000", records))
+    assert [r["medical_care"] for r in store.snapshot()] == [
+        "1-1",
+        "1-2",
+        "1-10",
+        "2-1",
+        "2-2",
+        "2-10",
+        "10-1",
+        "10-2",
+        "10-10",
+    ]
+
+
+def test_skips_repeated_and_older_runs(store, write_run, patient):
+    newer = write_run("20250102_080000", [patient(1, 1, "01/01/2025 10:00")])
+    older = write_run("20250101_080000", [patient(1, 1, "01/01/2025 10:00")])
+    assert store.add_run(newer)
+    assert store.add_run(newer) is None
+    assert store.add_run(older) is None
+
+
+def test_accounts_are_kept_apart(store, write_run, patient):
+    store.add_run(write_run("20250101_080000", [patient(1, 1, "01/01/2025")], "a"))
+    store.add_run(write_run("20250101_080000", [patient(1, 1, "02/01/2025")], "b"))
+    assert [r["date_hour"] for r in store.snapshot(account="b")] == [
+        "2025-01-02T00:00:00"
+    ]
@@ -0,0 +1,80 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+import main
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # main() sets up the logger, which writes under ./logs
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_no_command_runs_scrape(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        main, "run_scrape", lambda args, logger: calls.append(args) or 0
+    )
+    assert main.main([]) == 0
+    assert [args.command for args in calls] == ["scrape"]
+
+
+@pytest.mark.parametrize(
+    "argv, handler",
+    [
+        (["scrape-all", "--budget", "60"], "run_scrape"),
+        (["scrape-accounts", "accounts.json"], "run_scrape_accounts"),
+        (["replay", "trace.json"], "run_replay"),
+        (["clean"], "run_clean"),
+        (["export", "-f", "ndjson"], "run_export"),
+        (["compact"], "run_compact"),
+        (["search", "cardio"], "run_search"),
+    ],
+)
+def test_commands_dispatch_to_their_handler(argv, handler):
+    args = main.build_parser().parse_args(argv)
+    assert args.handler is getattr(main, handler)
+
+
+def test_clean_command(workdir):
+    path = workdir / "patient_data_20250101_080000.json"
+    path.write_text(
+        json.dumps([{"date_hour": "Data/hora\n01/01/2025 10:00"}]), encoding="utf-8"
+    )
+    assert main.main(["clean", str(path)]) == 0
+    assert json.loads(path.read_text(encoding="utf-8"))[0]["date_hour"] == (
+        "2025-01-01T10:00:00"
+    )
+    assert main.main(["clean", str(workdir / "missing_*.json")]) == 1
+
+
+def test_snapshot_is_not_saved_as_a_run(workdir, write_run, patient):
+    run = write_run("20250101_080000", [patient(1, 1, "01/01/2025 10:00")])
+    assert main.main(["compact", run, "--db", "history.sqlite"]) == 0
+    os.remove(run)
+
+    assert main.main(["snapshot", "--at", "2025-01-01", "--db", "history.sqlite"]) == 0
+    assert main.main(["snapshot", "--db", "history.sqlite"]) == 0
+    assert sorted(path.name for path in workdir.glob("*.json")) == [
+        "snapshot_20250101.json",
+        "snapshot_latest.json",
+    ]
+
+
+def test_offline_commands_do_not_import_selenium(workdir):
+    code = (
+        "import sys, main; main.build_parser(); "
+        "print(sorted({m.split('.')[0] for m in sys.modules} "
+        "& {'selenium', 'multiprocessing', 'dotenv'}))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=os.path.dirname(main.__file__),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,129 @@
+import json
+from concurrent.futures import Future
+import pytest
+import multi_account
+from multi_account import browsers_per_account, load_accounts, run_accounts
+
+
+def write_config(tmp_path, config):
+    path = tmp_path / "accounts.json"
+    path.write_text(json.dumps(config), encoding="utf-8")
+    return str(path)
+
+
+def account(name, password="p"):
+    return {
+        "name": name,
+        "url": "https://clinic",
+        "username": "u",
+        "password": password,
+    }
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # Run summaries default to the working directory
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_credentials_come_from_the_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv("PASSWORD_A", "secret")
+    path = write_config(
+        tmp_path, {"accounts": [account("a", password="${PASSWORD_A}")]}
+    )
+    assert load_accounts(path)[0]["password"] == "secret"
+
+
+def test_a_plain_list_is_accepted(tmp_path):
+    assert [a["name"] for a in load_accounts(write_config(tmp_path, [account("a")]))]
+
+
+@pytest.mark.parametrize(
+    "config, message",
+    [
+        ({"accounts": {"name": "a"}}, "expected a list of accounts"),
+        ([account("a", password="$UNSET_PASSWORD")], "Account a is missing password"),
+        ([{"url": "https://clinic"}], "Account #1 is missing name, username"),
+        ([account("a"), account("a")], "Duplicate account name a"),
+    ],
+)
+def test_invalid_configs(tmp_path, monkeypatch, config, message):
+    monkeypatch.delenv("UNSET_PASSWORD", raising=False)
+    with pytest.raises(ValueError, match=message):
+        load_accounts(write_config(tmp_path, config))
+
+
+class InlineExecutor:
+    """Runs the accounts in this process and records the worker count."""
+
+    instances = []
+
+    def __init__(self, max_workers, initializer=None):
+        self.max_workers = max_workers
+        InlineExecutor.instances.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+@pytest.fixture
+def inline(monkeypatch):
+    InlineExecutor.instances.clear()
+    monkeypatch.setattr(multi_account, "ProcessPoolExecutor", InlineExecutor)
+
+    def scrape(account, options):
+        if account["name"] == "crash":
+            raise RuntimeError("worker died")
+        return {"name": account["name"], "status": "ok", "records": 2}
+
+    monkeypatch.setattr(multi_account, "scrape_account", scrape)
+    return InlineExecutor.instances
+
+
+@pytest.mark.parametrize(
+    "pool_size, max_browsers, workers", [(None, 3, 3), (2, 5, 2), (3, 3, 1)]
+)
+def test_workers_fit_the_browser_cap(
+    inline, tmp_path, pool_size, max_browsers, workers
+):
+    accounts = [account(name) for name in "abcd"]
+    summary = run_accounts(
+        accounts,
+        {"pool_size": pool_size},
+        max_browsers=max_browsers,
+        summary_file=str(tmp_path / "summary.json"),
+    )
+    assert inline[0].max_workers == workers
+    assert workers * browsers_per_account({"pool_size": pool_size}) <= max_browsers
+    assert summary["records"] == 8
+
+
+def test_browser_cap_too_small_for_one_account(inline):
+    with pytest.raises(ValueError, match="cannot fit one account"):
+        run_accounts([account("a")], {"pool_size": 3}, max_browsers=2)
+    assert inline == []
+
+
+def test_crashed_worker_is_reported_in_order(inline, tmp_path):
+    summary_file = tmp_path / "summary.json"
+    summary = run_accounts(
+        [account("crash"), account("b")], {}, summary_file=str(summary_file)
+    )
+    assert [(r["name"], r["status"]) for r in summary["results"]] == [
+        ("crash", "failed"),
+        ("b", "ok"),
+    ]
+    assert summary["succeeded"] == 1
+    assert json.loads(summary_file.read_text(encoding="utf-8")) == summary
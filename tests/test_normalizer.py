@@ -0,0 +1,63 @@
+from datetime import datetime
+from normalizer import (
+    NOT_FOUND,
+    Normalizer,
+    default_normalizer,
+    fold_accents,
+    normalize_date_hour,
+    normalize_medical_care,
+    parse_date_hour,
+    repair_encoding,
+)
+
+
+def test_parse_date_hour_with_prefix_and_time():
+    assert parse_date_hour("Data/hora\n 25/05/2025 14:30") == datetime(
+        2025, 5, 25, 14, 30
+    )
+
+
+def test_parse_date_hour_without_time():
+    assert parse_date_hour("01/02/2024") == datetime(2024, 2, 1)
+
+
+def test_parse_date_hour_rejects_invalid_dates():
+    assert parse_date_hour("31/02/2024") is None
+    assert parse_date_hour("no date here") is None
+
+
+def test_normalize_date_hour_keeps_unparseable_text():
+    assert normalize_date_hour("25/05/2025 às 08h05") == "2025-05-25T08:05:00"
+    assert normalize_date_hour("Data/hora\n sem data") == "sem data"
+
+
+def test_repair_encoding_fixes_mojibake_only():
+    assert repair_encoding("avaliaÃ§Ã£o") == "avaliação"
+    assert repair_encoding("avaliação") == "avaliação"
+
+
+def test_normalize_medical_care():
+    text = "Dados do atendimento\n  Paciente   estável \r\n\n\n\nRetorno em 7 dias  "
+    assert normalize_medical_care(text) == "Paciente estável\n\nRetorno em 7 dias"
+
+
+def test_fold_accents():
+    assert fold_accents("Avaliação CARDIOLÓGICA") == "avaliacao cardiologica"
+
+
+def test_default_normalizer_skips_missing_values():
+    record = {"date_hour": NOT_FOUND, "medical_care": "", "page_number": 1}
+    assert default_normalizer().normalize_record(record) == record
+
+
+def test_normalize_record_returns_a_copy():
+    record = {"date_hour": "25/05/2025 14:30"}
+    normalized = default_normalizer().normalize_record(record)
+    assert normalized["date_hour"] == "2025-05-25T14:30:00"
+    assert record["date_hour"] == "25/05/2025 14:30"
+
+
+def test_rules_run_in_registration_order():
+    normalizer = Normalizer().register("x", str.strip).register("x", str.upper)
+    assert normalizer.fields() == ["x"]
+    assert normalizer.normalize_batch([{"x": " a "}]) == [{"x": "A"}]
@@ -0,0 +1,97 @@
+from pacing import RateGovernor
+
+
+def observe(governor, step, latencies):
+    for seconds in latencies:
+        governor.observe_latency(step, seconds)
+
+
+def test_steady_latencies_keep_the_minimum_delay():
+    governor = RateGovernor(window=10)
+    observe(governor, "page_ready", [1.0, 1.2, 0.9, 1.1] * 10)
+    assert governor.delay == 0.0
+    assert not governor.backing_off
+
+
+def test_jitter_on_fast_steps_is_not_congestion():
+    governor = RateGovernor(window=10, min_baseline=0.25)
+    observe(governor, "patient_click", [0.01, 0.2] * 20)
+    assert not governor.backing_off
+
+
+def test_slowdown_backs_off_multiplicatively():
+    governor = RateGovernor(window=10, backoff_floor=0.5, max_delay=4.0)
+    observe(governor, "page_ready", [1.0] * 20)
+    observe(governor, "page_ready", [5.0] * 10)
+    assert governor.delay == 0.5
+    assert governor.backing_off
+    governor.observe_error()
+    observe(governor, "page_ready", [5.0] * 9)
+    assert governor.delay == 1.0
+
+
+def test_sustained_slowness_keeps_backing_off():
+    governor = RateGovernor(window=10, backoff_floor=0.5, max_delay=4.0)
+    observe(governor, "page_ready", [1.0] * 10)
+    observe(governor, "page_ready", [5.0] * 40)
+    assert governor.delay == 4.0
+    # The slow waits never became the baseline
+    assert governor.baseline("page_ready") == 1.0
+
+    observe(governor, "page_ready", [1.0] * 160)
+    assert governor.delay == 0.0
+
+
+def test_tabs_grow_additively_and_halve_on_congestion():
+    governor = RateGovernor(window=10, min_tabs=1, max_tabs=4)
+    assert governor.tabs == 1
+    observe(governor, "page_ready", [1.0] * 40)
+    assert governor.tabs == 4
+    observe(governor, "page_ready", [5.0] * 10)
+    assert (governor.tabs, governor.delay) == (2, 0.5)
+    for _ in range(10):
+        governor.observe_error()
+    assert governor.tabs == 1
+
+
+def test_tabs_grow_only_once_the_delay_is_back_at_minimum():
+    governor = RateGovernor(window=10, initial_delay=0.5, max_tabs=2)
+    observe(governor, "page_ready", [1.0] * 20)
+    assert (governor.delay, governor.tabs) == (0.0, 1)
+    observe(governor, "page_ready", [1.0] * 10)
+    assert governor.tabs == 2
+
+
+def test_errors_back_off_and_recovery_is_additive():
+    governor = RateGovernor(window=10, additive_step=0.25)
+    for _ in range(10):
+        governor.observe_error()
+    assert governor.delay == 0.5
+
+    observe(governor, "page_ready", [1.0] * 30)
+    assert governor.delay == 0.0
+
+
+def test_delay_stays_within_bounds():
+    governor = RateGovernor(window=2, min_delay=0.1, max_delay=1.0)
+    for _ in range(20):
+        governor.observe_error()
+    assert governor.delay == 1.0
+    assert RateGovernor(min_delay=0.1, initial_delay=5.0, max_delay=2.0).delay == 2.0
+    assert RateGovernor(min_tabs=0, max_tabs=0).tabs == 1
+
+
+def test_baseline_is_a_floored_median():
+    governor = RateGovernor(min_baseline=0.25)
+    assert governor.baseline("page_ready") == 0.25
+    observe(governor, "page_ready", [1.0, 3.0, 2.0])
+    assert governor.baseline("page_ready") == 2.0
+
+
+def test_pace_spaces_calls(monkeypatch):
+    slept = []
+    monkeypatch.setattr("pacing.time.sleep", slept.append)
+    governor = RateGovernor(initial_delay=1.0)
+    assert governor.pace() == 0.0
+    governor.pace()
+    assert slept and 0 < slept[0] <= 1.0
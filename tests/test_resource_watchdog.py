@@ -0,0 +1,88 @@
+import tracemalloc
+import pytest
+from metrics import RunMetrics
+from resource_watchdog import MB, ResourceWatchdog
+
+
+class FakeDriver:
+    def __init__(self, js_heap_mb=None):
+        self.js_heap_mb = js_heap_mb
+
+    def execute(self, command, params):
+        if self.js_heap_mb is None:
+            raise RuntimeError("CDP is not available")
+        return {"value": {"usedSize": self.js_heap_mb * MB, "totalSize": 0}}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("resource_watchdog.time.monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture(autouse=True)
+def memory(monkeypatch):
+    sizes = {}
+    monkeypatch.setattr("resource_watchdog.process_memory", sizes.get)
+    was_tracing = tracemalloc.is_tracing()
+    yield sizes
+    if not was_tracing:
+        tracemalloc.stop()
+
+
+def watchdog(**kwargs):
+    return ResourceWatchdog(
+        interval=60, max_browser_mb=1000, max_js_heap_mb=200, **kwargs
+    )
+
+
+def test_samples_only_once_per_interval(clock, memory):
+    memory.update({1: 300 * MB, 2: 200 * MB})
+    dog = watchdog(metrics=RunMetrics())
+
+    assert dog.check(FakeDriver(50), [1, 2]) is None
+    assert dog.metrics.samples == {}
+    clock[0] += 60
+    assert dog.check(FakeDriver(50), [1, 2, 3]) is None
+    clock[0] += 30
+    assert dog.check(FakeDriver(50), [1, 2]) is None
+
+    [sample] = dog.metrics.samples["resources"]
+    assert sample["browser_mb"] == 500.0
+    # PID 3 has exited
+    assert sample["browser_processes"] == 2
+    assert sample["js_heap_mb"] == 50.0
+    assert sample["python_heap_mb"] is not None
+
+
+@pytest.mark.parametrize(
+    "browser_mb, js_heap_mb, reason",
+    [
+        (1500, 50, "Chrome uses 1500.0 MB"),
+        (500, 300, "JS heap is 300.0 MB"),
+        (500, None, None),
+    ],
+)
+def test_limits(clock, memory, browser_mb, js_heap_mb, reason):
+    memory[1] = browser_mb * MB
+    dog = watchdog()
+    dog.check(FakeDriver(), [1])
+    clock[0] += 60
+    assert dog.check(FakeDriver(js_heap_mb), [1]) == reason
+
+
+def test_chromedriver_memory_is_reported(clock, memory):
+    memory.update({1: 100 * MB, 9: 20 * MB})
+    sample = watchdog().sample(FakeDriver(), [1], driver_pid=9)
+    assert sample["chromedriver_mb"] == 20.0
+    assert sample["js_heap_mb"] is None
+
+
+def test_disabled_watchdog_never_traces_allocations(clock):
+    if tracemalloc.is_tracing():
+        pytest.skip("tracemalloc already enabled for this test run")
+    dog = ResourceWatchdog(interval=0)
+    clock[0] += 3600
+    assert dog.check(FakeDriver(), [1]) is None
+    assert not tracemalloc.is_tracing()
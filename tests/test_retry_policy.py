@@ -0,0 +1,114 @@
+import pytest
+from selenium.common.exceptions import (
+    InvalidSessionIdException,
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
+from retry_policy import (
+    CircuitBreaker,
+    Deadline,
+    DeadlineExceeded,
+    RetryPolicy,
+    is_session_error,
+)
+
+
+def no_sleep(monkeypatch):
+    monkeypatch.setattr("retry_policy.time.sleep", lambda seconds: None)
+
+
+def failing(exceptions, result="ok"):
+    """Callable raising each of exceptions in turn, then returning result."""
+    calls = []
+
+    def func():
+        calls.append(1)
+        if len(calls) <= len(exceptions):
+            raise exceptions[len(calls) - 1]
+        return result
+
+    return func, calls
+
+
+def test_retries_transient_errors(monkeypatch):
+    no_sleep(monkeypatch)
+    func, calls = failing([StaleElementReferenceException(), NoSuchElementException()])
+    assert RetryPolicy(max_attempts=3).call(func) == "ok"
+    assert len(calls) == 3
+
+
+def test_gives_up_after_max_attempts(monkeypatch):
+    no_sleep(monkeypatch)
+    func, calls = failing([NoSuchElementException()] * 5)
+    with pytest.raises(NoSuchElementException):
+        RetryPolicy(max_attempts=2).call(func)
+    assert len(calls) == 2
+
+
+def test_timeouts_and_session_errors_are_not_retried(monkeypatch):
+    no_sleep(monkeypatch)
+    for error in (TimeoutException(), InvalidSessionIdException()):
+        func, calls = failing([error])
+        with pytest.raises(type(error)):
+            RetryPolicy(max_attempts=3).call(func)
+        assert len(calls) == 1
+
+
+def test_backoff_is_capped_exponential_jitter():
+    policy = RetryPolicy(base_delay=0.5, max_delay=2.0)
+    for attempt, ceiling in ((1, 0.5), (2, 1.0), (3, 2.0), (6, 2.0)):
+        for _ in range(50):
+            assert 0 <= policy.backoff(attempt) <= ceiling
+
+
+def test_expired_deadline_stops_before_calling():
+    func, calls = failing([])
+    with pytest.raises(DeadlineExceeded):
+        RetryPolicy().call(func, deadline=Deadline(0))
+    assert not calls
+
+
+def test_deadline_within_reserves_time():
+    deadline = Deadline(30)
+    inner = deadline.within(10)
+    assert inner.seconds == 20
+    assert 19 < inner.remaining() <= 20
+    assert Deadline(None).within(10).remaining() == float("inf")
+    assert Deadline(5).cap(10) <= 5
+
+
+def test_first_success_falls_through_strategies(monkeypatch):
+    no_sleep(monkeypatch)
+
+    def broken():
+        raise NoSuchElementException()
+
+    strategies = [("broken", broken), ("no", lambda: False), ("yes", lambda: True)]
+    assert RetryPolicy(max_attempts=2).first_success(strategies) == "yes"
+
+
+def test_first_success_raises_session_errors():
+    def dead():
+        raise InvalidSessionIdException()
+
+    with pytest.raises(InvalidSessionIdException):
+        RetryPolicy().first_success([("dead", dead), ("never", lambda: True)])
+
+
+def test_is_session_error_reads_messages():
+    assert is_session_error(WebDriverException("chrome not reachable"))
+    assert not is_session_error(WebDriverException("element not found"))
+    assert not is_session_error(ValueError("invalid session id"))
+
+
+def test_circuit_breaker_trips_once_per_streak():
+    breaker = CircuitBreaker(failure_threshold=2)
+    assert not breaker.record_failure()
+    assert breaker.record_failure()
+    assert breaker.tripped
+    assert not breaker.record_failure()
+    breaker.record_success()
+    assert not breaker.tripped
+    assert breaker.trips == 1
@@ -0,0 +1,72 @@
+import json
+import pytest
+from run_diff import changed_fields, changes_filename, diff_runs
+
+
+def read_changes(path):
+    with open(path, encoding="utf-8") as f:
+        return sorted((json.loads(line) for line in f), key=lambda c: c["key"])
+
+
+def test_changes_filename():
+    assert (
+        changes_filename("runs/patient_data_20250525_081500.json")
+        == "runs/changes_20250525_081500.ndjson"
+    )
+
+
+def test_changed_fields_ignores_volatile_fields(patient):
+    before = patient(1, 1, "a", "x", "ana")
+    after = dict(
+        patient(3, 2, "b", "x", "ana"),
+        extraction_timestamp="2025-01-02 00:00:00",
+        total_patients="120",
+    )
+    assert changed_fields(before, after) == ["date_hour"]
+
+
+@pytest.mark.parametrize("buckets", [1, 4, 64])
+def test_diff_runs(tmp_path, write_run, patient, buckets):
+    previous = write_run(
+        "20250101_080000",
+        [
+            patient(1, 1, "01/01/2025 10:00", key="ana"),
+            patient(1, 2, "01/01/2025 11:00", key="bia"),
+            patient(1, 3, "01/01/2025 12:00", "Consulta", "caio"),
+        ],
+    )
+    current = write_run(
+        "20250102_080000",
+        [
+            # Only formatting and list position differ: not a change
+            patient(1, 2, "01/01/2025 10:00:00", key="ana"),
+            patient(1, 1, "01/01/2025 12:00", "Consulta de retorno", "caio"),
+            patient(2, 1, "02/01/2025 09:00", key="davi"),
+        ],
+    )
+    output = str(tmp_path / "changes.ndjson")
+
+    summary = diff_runs(previous, current, output, buckets=buckets)
+
+    assert {k: summary[k] for k in ("added", "changed", "removed", "unchanged")} == {
+        "added": 1,
+        "changed": 1,
+        "removed": 1,
+        "unchanged": 1,
+    }
+    assert summary["new_consultations"] == 0
+    changes = read_changes(output)
+    assert [(c["change"], c["key"]) for c in changes] == [
+        ("removed", "bia"),
+        ("changed", "caio"),
+        ("added", "davi"),
+    ]
+    assert changes[1]["fields"] == ["medical_care"]
+
+
+def test_new_consultation_is_counted(tmp_path, write_run, patient):
+    previous = write_run("20250101_080000", [patient(1, 1, "01/01/2025 10:00")])
+    current = write_run("20250102_080000", [patient(1, 1, "02/01/2025 10:00")])
+    summary = diff_runs(previous, current, str(tmp_path / "changes.ndjson"))
+    assert summary["changed"] == 1
+    assert summary["new_consultations"] == 1
@@ -0,0 +1,439 @@
+import asyncio
+import itertools
+import threading
+from contextlib import aclosing
+from types import SimpleNamespace
+import pytest
+from selenium.common.exceptions import (
+    InvalidSessionIdException,
+    NoSuchElementException,
+    StaleElementReferenceException,
+)
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webelement import WebElement
+from adaptive_timeouts import AdaptiveTimeouts
+from budget import patient_id
+from diagnostics import Diagnostics
+from pacing import RateGovernor
+from retry_policy import SessionResetError
+from scraper import Scraper
+from session_clone import READ_STORAGE_SCRIPT
+
+URL = "https://clinic.example/login"
+PAGINATION_XPATH = (
+    '//*[@id="app-patient-search"]/div/div[2]/div/div[5]/div/ngb-pagination'
+)
+
+
+class Element(WebElement):
+    """Element of one rendering of a fake tab; stale once the tab navigates."""
+
+    def __init__(self, clinic, kind, text="", **data):
+        super().__init__(clinic, f"e{next(clinic.ids)}")
+        self.clinic = clinic
+        self.tab = clinic.tab
+        self.version = self.tab["version"]
+        self.kind = kind
+        self.data = data
+        self._text = text
+
+    def _check(self):
+        if self.tab is not self.clinic.tab or self.version != self.tab["version"]:
+            raise StaleElementReferenceException(f"stale {self.kind}")
+
+    @property
+    def text(self):
+        self._check()
+        return self._text
+
+    def is_displayed(self):
+        self._check()
+        return True
+
+    def is_enabled(self):
+        self._check()
+        return True
+
+    def get_attribute(self, name):
+        self._check()
+        return self.data.get(name)
+
+    def find_element(self, by=By.ID, value=None):
+        self._check()
+        if self.kind == "row" and value == Scraper.PATIENT_OPEN_XPATH:
+            return Element(self.clinic, "open", **self.data)
+        if self.kind == "next" and value == "..":
+            last = self.tab["page"] == self.clinic.pages
+            return Element(self.clinic, "li", **{"class": "disabled" if last else ""})
+        if self.kind == "item" and value == "a":
+            return Element(self.clinic, "menu_link")
+        raise NoSuchElementException(value)
+
+    def find_elements(self, by=By.ID, value=None):
+        self._check()
+        if self.kind == "menu" and value == "li":
+            return [Element(self.clinic, "item") for _ in range(3)]
+        return []
+
+    def click(self):
+        self._check()
+        self.clinic.clicked(self)
+
+
+class SwitchTo:
+    def __init__(self, clinic):
+        self.clinic = clinic
+
+    def window(self, handle):
+        if handle not in self.clinic.tabs:
+            raise NoSuchElementException(f"no such window: {handle}")
+        self.clinic.handle = handle
+
+    def new_window(self, kind="tab"):
+        self.clinic.open_tab()
+
+
+class FakeClinic:
+    """
+    WebDriver for a clinic app with `pages` list pages of `per_page` patients.
+
+    Each tab has its own view (home, list page, patient with or without the
+    timeline filter) and back history; only the selectors the scraper uses
+    are answered.
+    """
+
+    def __init__(self, pages=2, per_page=3):
+        self.pages = pages
+        self.per_page = per_page
+        self.ids = itertools.count(1)
+        self.command_executor = SimpleNamespace(poll_interval=0.001)
+        self.switch_to = SwitchTo(self)
+        self.tabs = {}
+        self.handle = None
+        self.most_tabs = 0
+        self.opens = 0
+        self.open_tab(view="home")
+
+    # Browser
+
+    @property
+    def tab(self):
+        return self.tabs[self.handle]
+
+    @property
+    def current_window_handle(self):
+        return self.handle
+
+    @property
+    def window_handles(self):
+        return list(self.tabs)
+
+    @property
+    def current_url(self):
+        return "https://clinic.example/app"
+
+    def open_tab(self, view="blank"):
+        self.handle = f"tab{next(self.ids)}"
+        self.tabs[self.handle] = {
+            "view": view,
+            "page": None,
+            "patient": None,
+            "history": [],
+            "version": 0,
+        }
+        self.most_tabs = max(self.most_tabs, len(self.tabs))
+
+    def close(self):
+        del self.tabs[self.handle]
+
+    def navigate(self, **state):
+        tab = self.tab
+        tab["history"].append({key: tab[key] for key in ("view", "page", "patient")})
+        tab.update(state)
+        tab["version"] += 1
+
+    def back(self):
+        if self.tab["history"]:
+            self.tab.update(self.tab["history"].pop())
+            self.tab["version"] += 1
+
+    def get(self, url):
+        self.navigate(view="home", page=None, patient=None)
+
+    def execute(self, command, params=None):
+        cmd = (params or {}).get("cmd")
+        if cmd == "Network.getAllCookies":
+            return {"value": {"cookies": []}}
+        if cmd == "Page.addScriptToEvaluateOnNewDocument":
+            return {"value": {"identifier": "1"}}
+        return {"value": {}}
+
+    def execute_script(self, script, *args):
+        if script == "return document.readyState":
+            return "complete"
+        if script == "arguments[0].click();":
+            return args[0].click()
+        if script == READ_STORAGE_SCRIPT:
+            return {"origin": "https://clinic.example", "local": {}, "session": {}}
+        return None
+
+    def get_screenshot_as_png(self):
+        return b""
+
+    # App
+
+    def record(self, page, index):
+        return {
+            "date_hour": f"2025-01-{page:02d} 0{index}:00",
+            "medical_care": f"Consulta {page}-{index}",
+        }
+
+    def row_text(self, page, index):
+        return f"Paciente {page}-{index}"
+
+    def clicked(self, element):
+        if element.kind == "menu_link":
+            self.navigate(view="list", page=1, patient=None)
+        elif element.kind == "open":
+            self.opens += 1
+            self.navigate(view="patient", patient=element.data["patient"])
+        elif element.kind == "next" and self.tab["page"] < self.pages:
+            self.navigate(page=self.tab["page"] + 1)
+        elif element.kind == "filter":
+            # Filters the timeline in place, not a navigation
+            self.tab["view"] = "timeline"
+
+    def find_elements(self, by=By.ID, value=None):
+        try:
+            return [self.find_element(by, value)]
+        except NoSuchElementException:
+            pass
+        if value == Scraper.PATIENT_ROW_XPATH and self.tab["view"] == "list":
+            page = self.tab["page"]
+            return [
+                Element(self, "row", self.row_text(page, index), patient=(page, index))
+                for index in range(1, self.per_page + 1)
+            ]
+        return []
+
+    def find_element(self, by=By.ID, value=None):
+        view = self.tab["view"]
+        signed_in = view != "blank"
+        if value in ("body", "app-root") and signed_in:
+            return Element(self, value)
+        if value in ("menu-collapse", "#menu-collapse") and signed_in:
+            return Element(self, "menu")
+        if value == Scraper.PATIENT_MENU_XPATH and signed_in:
+            return Element(self, "menu_link")
+        if view == "list":
+            if value == "app-patient-search":
+                return Element(self, "list")
+            if value == Scraper.TOTAL_PATIENTS_XPATH:
+                return Element(self, "total", str(self.pages * self.per_page))
+            if value == PAGINATION_XPATH:
+                return Element(self, "pagination")
+            if value == Scraper.BUTTON_XPATH:
+                return Element(self, "open", patient=(self.tab["page"], 1))
+            if value == Scraper.NEXT_PAGE_XPATH:
+                return Element(self, "next", "›", **{"class": "page-link"})
+        if view == "patient" and value == Scraper.FILTER_INPUT_XPATH:
+            return Element(self, "filter")
+        if view == "timeline":
+            record = self.record(*self.tab["patient"])
+            if value == Scraper.DATE_HOUR_XPATH:
+                return Element(self, "date_hour", record["date_hour"])
+            if value == Scraper.MEDICAL_CARE_XPATH:
+                return Element(self, "medical_care", record["medical_care"])
+        raise NoSuchElementException(value)
+
+
+@pytest.fixture
+def scraper(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def build(clinic, **kwargs):
+        scraper = Scraper(
+            URL,
+            "maria",
+            "s3cret",
+            timeouts=AdaptiveTimeouts(state_file=None),
+            diagnostics=Diagnostics(directory=str(tmp_path / "images")),
+            **kwargs,
+        )
+        scraper.attach_driver(clinic)
+        return scraper
+
+    return build
+
+
+def expected(clinic):
+    return [
+        {
+            "patient_id": patient_id(clinic.row_text(page, index)),
+            "page_number": page,
+            "patient_index_on_page": index,
+            "total_patients": str(clinic.pages * clinic.per_page),
+            **clinic.record(page, index),
+        }
+        for page in range(1, clinic.pages + 1)
+        for index in range(1, clinic.per_page + 1)
+    ]
+
+
+def crawled(records):
+    return [
+        {key: value for key, value in record.items() if key != "extraction_timestamp"}
+        for record in records
+    ]
+
+
+def test_single_patient_scrape_identifies_the_patient(scraper):
+    clinic = FakeClinic()
+    [record] = scraper(clinic).extract_patient_data()
+
+    assert record["patient_id"] == patient_id(clinic.row_text(1, 1))
+    assert record["medical_care"] == clinic.record(1, 1)["medical_care"]
+
+
+def test_crawl_visits_every_patient_on_every_page(scraper):
+    clinic = FakeClinic(pages=3, per_page=3)
+    records = scraper(clinic).extract_all_patients_data()
+
+    assert crawled(records) == expected(clinic)
+    assert clinic.most_tabs == 1
+
+
+def test_prefetched_tabs_give_the_same_records(scraper):
+    clinic = FakeClinic(pages=3, per_page=3)
+    governor = RateGovernor(min_tabs=3, max_tabs=3)
+    crawler = scraper(clinic, governor=governor)
+    records = crawler.extract_all_patients_data()
+
+    assert crawled(records) == expected(clinic)
+    # All but the first patient of each page, and pages 2 and 3
+    assert crawler.metrics.counters["prefetch_hits"] == 3 * 2 + 2
+    # Looking for a page 4 once
+    assert crawler.metrics.counters["prefetch_failures"] == 1
+    assert clinic.most_tabs == 3
+
+
+def test_spare_tabs_shrink_with_the_governor(scraper):
+    clinic = FakeClinic(pages=2, per_page=3)
+    governor = RateGovernor(min_tabs=1, max_tabs=3)
+    governor.tabs = 3
+    crawler = scraper(clinic, governor=governor)
+    patients = crawler.iter_patients()
+
+    next(patients)
+    assert len(clinic.tabs) == 3
+    governor.tabs = 1
+    rest = list(patients)
+
+    assert len(rest) == 5
+    assert len(clinic.tabs) == 1
+
+
+# Previous run's dates; patient 3 of page 3 is new
+DATES = {
+    (1, 1): "2025-03-01 08:00",
+    (1, 2): "2024-01-01 08:00",
+    (1, 3): "2025-05-01 08:00",
+    (2, 1): "2025-06-01 08:00",
+    (2, 2): "2023-01-01 08:00",
+    (2, 3): "2025-01-15 08:00",
+    (3, 1): "2025-02-01 08:00",
+    (3, 2): "2025-04-01 08:00",
+}
+
+
+@pytest.mark.parametrize("tabs", [1, 3])
+def test_priorities_order_patients_across_pages(scraper, tabs):
+    clinic = FakeClinic(pages=3, per_page=3)
+    priorities = {
+        patient_id(clinic.row_text(*patient)): date for patient, date in DATES.items()
+    }
+    governor = RateGovernor(min_tabs=tabs, max_tabs=tabs)
+    records = scraper(clinic, governor=governor).extract_all_patients_data(
+        priorities=priorities
+    )
+
+    visited = [(r["page_number"], r["patient_index_on_page"]) for r in records]
+    assert visited == [
+        (3, 3),
+        (2, 1),
+        (1, 3),
+        (3, 2),
+        (1, 1),
+        (3, 1),
+        (2, 3),
+        (1, 2),
+        (2, 2),
+    ]
+    position = {patient: n for n, patient in enumerate(visited)}
+    assert crawled(records) == sorted(
+        expected(clinic),
+        key=lambda r: position[r["page_number"], r["patient_index_on_page"]],
+    )
+
+
+class CrashingClinic(FakeClinic):
+    def clicked(self, element):
+        if element.kind == "open":
+            raise InvalidSessionIdException("invalid session id")
+        super().clicked(element)
+
+
+def test_a_session_that_cannot_be_reset_stops_the_crawl(scraper):
+    crawler = scraper(CrashingClinic())
+    crawler.reset_session = lambda page_number=1: False
+
+    with pytest.raises(SessionResetError):
+        crawler.extract_all_patients_data()
+
+
+def test_closing_the_generator_stops_the_crawl(scraper):
+    clinic = FakeClinic(pages=2, per_page=3)
+    patients = scraper(clinic).iter_patients()
+
+    first = next(patients)
+    patients.close()
+
+    assert first["patient_index_on_page"] == 1
+    assert clinic.opens == 1
+
+
+def crawler_threads():
+    return [t for t in threading.enumerate() if t.name == "patient-crawler"]
+
+
+def test_async_consumer_that_breaks_stops_the_crawler(scraper):
+    clinic = FakeClinic(pages=3, per_page=3)
+    crawler = scraper(clinic)
+
+    async def consume():
+        records = []
+        async with aclosing(crawler.aiter_patients(buffer=1)) as patients:
+            async for record in patients:
+                records.append(record)
+                if len(records) == 2:
+                    break
+        return records
+
+    records = asyncio.run(consume())
+
+    assert len(records) == 2
+    assert crawler_threads() == []
+    # At most the buffer and the record being handed over ran ahead
+    assert clinic.opens <= 4
+
+
+def test_async_crawl_reraises_a_failed_reset(scraper):
+    crawler = scraper(CrashingClinic())
+    crawler.reset_session = lambda page_number=1: False
+
+    async def consume():
+        return [record async for record in crawler.aiter_patients()]
+
+    with pytest.raises(SessionResetError):
+        asyncio.run(consume())
+    assert crawler_threads() == []
@@ -0,0 +1,75 @@
+import pytest
+from search_index import MedicalCareIndex, tokenize
+
+
+@pytest.fixture
+def index(tmp_path):
+    with MedicalCareIndex(str(tmp_path / "index.sqlite")) as index:
+        yield index
+
+
+def test_tokenize_folds_case_and_accents():
+    assert tokenize("Avaliação CARDIOLÓGICA, PA 12/8") == [
+        "avaliacao",
+        "cardiologica",
+        "pa",
+        "12",
+    ]
+
+
+def test_search_requires_every_term(index, write_run, patient):
+    index.add_file(
+        write_run(
+            "20250101_080000",
+            [
+                patient(1, 1, "01/01/2025 10:00", "Avaliação cardiológica", "ana"),
+                patient(1, 2, "02/01/2025 10:00", "Avaliação ortopédica", "bia"),
+                patient(1, 3, "03/01/2025 10:00", "Retorno cardiologia", "caio"),
+            ],
+        )
+    )
+    results = index.search("avaliacao cardio*")
+    assert [r["patient"] for r in results] == ["ana"]
+    assert [r["patient"] for r in index.search("cardio*")] == ["caio", "ana"]
+    assert index.search("pediatria") == []
+    assert index.search("!!") == []
+
+
+def test_search_with_many_matches(index, patient):
+    # More matching documents than SQLite allows bound parameters
+    records = (
+        patient(i // 10, i % 10, "01/01/2025 10:00", f"Consulta {i}")
+        for i in range(40000)
+    )
+    with index.conn:
+        index.add_records(records, "", "2025-01-01T08:00:00")
+    assert len(index.search("consulta", limit=100000)) == 40000
+    assert [r["medical_care"] for r in index.search("consulta 123")] == ["Consulta 123"]
+
+
+def test_indexing_is_incremental(index, write_run, patient):
+    records = [patient(1, 1, "01/01/2025 10:00", "Avaliação")]
+    first = write_run("20250101_080000", records)
+    assert index.add_file(first) == 1
+    assert index.add_file(first) is None
+    # The same consultation in the next run is not a new document
+    assert index.add_file(write_run("20250102_080000", records)) == 0
+    assert index.stats()["documents"] == 1
+
+
+def test_moving_in_the_list_adds_no_document(index, write_run, patient):
+    first = [patient(1, 1, "01/01/2025 10:00", "Avaliação", "ana")]
+    moved = [
+        patient(1, 1, "02/01/2025 10:00", "Retorno", "bia"),
+        patient(1, 2, "01/01/2025 10:00", "Avaliação", "ana"),
+    ]
+    index.add_file(write_run("20250101_080000", first))
+    assert index.add_file(write_run("20250102_080000", moved)) == 1
+    assert [r["patient"] for r in index.search("avaliacao")] == ["ana"]
+
+
+def test_search_by_account(index, write_run, patient):
+    records = [patient(1, 1, "01/01/2025 10:00", "Avaliação")]
+    index.add_file(write_run("20250101_080000", records, "a"))
+    index.add_file(write_run("20250101_080000", records, "b"))
+    assert [r["account"] for r in index.search("avaliacao", account="b")] == ["b"]
@@ -0,0 +1,101 @@
+import json
+import pytest
+from session_clone import (
+    AuthState,
+    _cookie_params,
+    apply_auth_state,
+    same_site,
+)
+
+COOKIE = {
+    "name": "sid",
+    "value": "abc",
+    "domain": "clinic.example",
+    "path": "/",
+    "secure": True,
+    "httpOnly": True,
+    "sameSite": "Lax",
+    "size": 6,
+    "sameParty": False,
+}
+
+
+class FakeDriver:
+    """Records the CDP commands and navigations issued by apply_auth_state."""
+
+    def __init__(self, fail_navigation=False):
+        self.calls = []
+        self.fail_navigation = fail_navigation
+
+    def execute(self, command, params):
+        self.calls.append((params["cmd"], params["params"]))
+        if params["cmd"] == "Page.addScriptToEvaluateOnNewDocument":
+            return {"value": {"identifier": "1"}}
+        return {"value": {}}
+
+    def get(self, url):
+        self.calls.append(("get", url))
+        if self.fail_navigation:
+            raise RuntimeError("page crashed")
+
+
+def test_session_cookies_are_sent_without_expiry():
+    assert _cookie_params(dict(COOKIE, expires=-1, session=True)) == {
+        "name": "sid",
+        "value": "abc",
+        "domain": "clinic.example",
+        "path": "/",
+        "secure": True,
+        "httpOnly": True,
+        "sameSite": "Lax",
+    }
+    # Some Chrome versions report session cookies with a positive expiry
+    assert "expires" not in _cookie_params(dict(COOKIE, expires=1.7e9, session=True))
+
+
+def test_persistent_cookies_keep_their_expiry():
+    params = _cookie_params(dict(COOKIE, expires=1.7e9, session=False))
+    assert params["expires"] == 1.7e9
+    # Read-only fields returned by Network.getAllCookies are dropped
+    assert "size" not in params and "sameParty" not in params
+
+
+def test_cookies_are_set_before_the_page_loads():
+    state = AuthState(
+        url="https://clinic.example/app",
+        origin="https://clinic.example",
+        cookies=[dict(COOKIE, expires=-1, session=True)],
+        local_storage={"token": "t"},
+        session_storage={},
+    )
+    driver = FakeDriver()
+    apply_auth_state(driver, state, "https://clinic.example/patients")
+
+    assert [name for name, _ in driver.calls] == [
+        "Network.setCookies",
+        "Page.addScriptToEvaluateOnNewDocument",
+        "get",
+        "Page.removeScriptToEvaluateOnNewDocument",
+    ]
+    assert '"token": "t"' in driver.calls[1][1]["source"]
+    assert driver.calls[2][1] == "https://clinic.example/patients"
+
+
+def test_seed_script_is_removed_when_navigation_fails():
+    state = AuthState("https://clinic.example", "https://clinic.example", [], {}, {})
+    driver = FakeDriver(fail_navigation=True)
+    with pytest.raises(RuntimeError):
+        apply_auth_state(driver, state)
+    assert driver.calls[-1][0] == "Page.removeScriptToEvaluateOnNewDocument"
+
+
+def test_auth_state_round_trip():
+    state = AuthState("https://a", "https://a", [COOKIE], {"k": "v"}, {"s": "1"})
+    data = json.loads(json.dumps(state.to_dict()))
+    assert AuthState.from_dict(data).to_dict() == state.to_dict()
+
+
+def test_same_site():
+    assert same_site("https://clinic.example/a", "https://clinic.example/b?x=1")
+    assert not same_site("https://clinic.example", "http://clinic.example")
+    assert not same_site("https://clinic.example", "https://other.example")
@@ -0,0 +1,45 @@
+import json
+import pytest
+from utils import iter_json_array
+
+CHUNK_SIZES = (1, 2, 3, 7, 64 * 1024)
+
+
+def write(tmp_path, text):
+    path = tmp_path / "data.json"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_streams_every_element(tmp_path, chunk_size):
+    data = [
+        {"medical_care": "Avaliação, retorno [7 dias]", "page_number": 1},
+        1.5,
+        -2e-3,
+        12345678,
+        "x,y",
+        True,
+        None,
+        [],
+    ]
+    path = write(tmp_path, json.dumps(data, ensure_ascii=False, indent=2))
+    assert list(iter_json_array(path, chunk_size)) == data
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("text", ["[]", " [ ] ", "[\n]"])
+def test_empty_array(tmp_path, chunk_size, text):
+    assert list(iter_json_array(write(tmp_path, text), chunk_size)) == []
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("text", ["[1,,2]", "[1 2]", "[1,]", "[,1]", "[1,2", "[1.x]"])
+def test_rejects_malformed_arrays(tmp_path, chunk_size, text):
+    with pytest.raises(ValueError):
+        list(iter_json_array(write(tmp_path, text), chunk_size))
+
+
+def test_rejects_non_arrays(tmp_path):
+    with pytest.raises(ValueError):
+        list(iter_json_array(write(tmp_path, '{"a": 1}')))
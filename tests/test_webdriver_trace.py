@@ -0,0 +1,188 @@
+import time
+import pytest
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from webdriver_trace import (
+    REDACTED,
+    TRACE_VERSION,
+    ReplayExecutor,
+    TraceRecorder,
+    redact,
+    replay_driver,
+)
+
+ELEMENT = {"element-6066-11e4-a52e-4f735466cecf": "e1"}
+SECRETS = ["s3cret", "maria"]
+
+
+@pytest.mark.parametrize(
+    "command, params",
+    [
+        ("getElementText", {"id": "e1"}),
+        ("getElementAttribute", {"id": "e1", "name": "title"}),
+        ("getElementProperty", {"id": "e1", "name": "value"}),
+        ("screenshot", {}),
+        ("elementScreenshot", {"id": "e1"}),
+        ("getPageSource", {}),
+        ("executeScript", {"script": "return arguments[0].innerText", "args": []}),
+        (
+            "executeScript",
+            {"script": "/* getAttribute */return (function(){}).apply()", "args": []},
+        ),
+    ],
+)
+def test_page_content_is_kept_only_on_request(command, params):
+    response = {"value": "Paciente: João"}
+    assert redact(command, params, response, [])[1] == {"value": REDACTED}
+    assert redact(command, params, response, [], keep_content=True)[1] == response
+
+
+def test_typed_text_and_secrets_are_always_redacted():
+    params, _ = redact(
+        "sendKeysToElement", {"id": "e1", "text": "anything"}, {"value": None}, []
+    )
+    assert params == {"id": "e1", "text": REDACTED}
+
+    params, response = redact(
+        "get",
+        {"url": "https://clinic/?user=maria&pass=s3cret"},
+        {"value": "maria"},
+        SECRETS,
+        keep_content=True,
+    )
+    assert params["url"] == f"https://clinic/?user={REDACTED}&pass={REDACTED}"
+    assert response == {"value": REDACTED}
+
+
+def test_cookies_and_storage_are_always_redacted():
+    _, response = redact(
+        "executeCdpCommand",
+        {"cmd": "Network.getAllCookies", "params": {}},
+        {"value": {"cookies": [{"name": "sid"}]}},
+        [],
+        keep_content=True,
+    )
+    assert response == {"value": REDACTED}
+    _, response = redact(
+        "executeScript",
+        {"script": "return window.localStorage", "args": []},
+        {"value": {"token": "t"}},
+        [],
+        keep_content=True,
+    )
+    assert response == {"value": REDACTED}
+
+
+class FakeExecutor:
+    def __init__(self, responses):
+        self.responses = responses
+
+    def execute(self, command, params):
+        response = self.responses[command]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+class FakeDriver:
+    caps = {"browserName": "chrome", "user": "maria"}
+
+    def __init__(self, executor):
+        self.command_executor = executor
+
+
+def test_recorder_redacts_what_it_records():
+    driver = FakeDriver(
+        FakeExecutor(
+            {
+                "getElementText": {"value": "Consulta"},
+                "findElement": WebDriverException("no such element: maria"),
+            }
+        )
+    )
+    recorder = TraceRecorder(secrets=SECRETS)
+    recorder.attach(driver)
+    recorder.attach(driver)
+
+    driver.command_executor.execute("getElementText", {"id": "e1"})
+    with pytest.raises(WebDriverException):
+        driver.command_executor.execute("findElement", {"value": "x"})
+
+    assert recorder.capabilities["user"] == REDACTED
+    first, second = recorder.commands
+    assert first["response"] == {"value": REDACTED}
+    assert second["response"] is None
+    assert "maria" not in second["error"]
+
+
+def trace(*commands):
+    return {
+        "version": TRACE_VERSION,
+        "capabilities": {"browserName": "chrome"},
+        "commands": [
+            {"command": command, "params": params, "response": response, "elapsed": 0.2}
+            for command, params, response in commands
+        ],
+    }
+
+
+def test_replay_answers_in_order_then_repeats_the_last():
+    executor = ReplayExecutor(
+        trace(
+            ("findElements", {"using": "xpath", "value": "//a"}, {"value": []}),
+            ("findElements", {"using": "xpath", "value": "//a"}, {"value": [ELEMENT]}),
+        )
+    )
+    params = {"using": "xpath", "value": "//a", "sessionId": "other"}
+    assert executor.execute("findElements", params) == {"value": []}
+    assert executor.execute("findElements", params) == {"value": [ELEMENT]}
+    assert executor.execute("findElements", params) == {"value": [ELEMENT]}
+    assert executor.stats == {
+        "replayed": 2,
+        "repeated": 1,
+        "missing": 0,
+        "stalled_waits": 0,
+    }
+
+
+def test_replay_of_commands_missing_from_the_trace():
+    executor = ReplayExecutor(trace())
+    assert executor.execute("findElements", {"value": "x"}) == {"value": []}
+    assert executor.execute("findElement", {"value": "x"})["status"] == 404
+    assert "unknown command" in executor.execute("getTitle", {})["value"]
+    assert executor.execute("quit", {}) == {"value": None}
+
+
+def test_redacted_commands_still_match():
+    recorder = TraceRecorder(secrets=SECRETS)
+    recorder.add("sendKeysToElement", {"id": "e1", "text": "s3cret"}, {}, 0.1)
+    executor = ReplayExecutor({"commands": recorder.commands})
+    executor.execute("sendKeysToElement", {"id": "e1", "text": "other password"})
+    assert executor.stats["replayed"] == 1
+
+
+def test_replayed_wait_ends_when_the_trace_runs_out():
+    driver = replay_driver(
+        trace(("get", {"url": "https://clinic"}, {"value": None})), realtime=False
+    )
+    driver.get("https://clinic")
+
+    start = time.perf_counter()
+    wait = WebDriverWait(
+        driver, 10, poll_frequency=driver.command_executor.poll_interval
+    )
+    with pytest.raises(TimeoutException):
+        wait.until(EC.presence_of_element_located((By.ID, "missing")))
+    assert time.perf_counter() - start < 2
+    assert driver.command_executor.stats["stalled_waits"] == 1
+
+
+def test_realtime_replay_keeps_recorded_durations(monkeypatch):
+    slept = []
+    monkeypatch.setattr("webdriver_trace.time.sleep", slept.append)
+    executor = ReplayExecutor(trace(("getTitle", {}, {"value": "x"})), realtime=True)
+    assert executor.poll_interval is None
+    executor.execute("getTitle", {})
+    assert slept == [0.2]